@@ -0,0 +1,114 @@
+"""
+Radar-to-BLE association.
+
+Radar points are grouped into objects by grid clustering, then each object is
+matched to at most one tag whose uncertainty circle (plus a margin) contains it.
+Objects left without a tag are untagged intruders. Both steps hash into a grid
+of gate-sized cells and only look at neighbouring cells, so the cost per frame
+stays close to linear in points and tags.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+CLUSTER_DISTANCE = 0.4  # meters, points closer than this belong to one object
+GATE_MARGIN = 0.3  # meters added to the tag uncertainty radius
+
+
+@dataclass
+class RadarObject:
+    x: float
+    y: float
+    points: int
+    tag: Optional[int] = None
+    distance: Optional[float] = None  # to the matched tag, meters
+    in_keepout: bool = False
+
+
+def _neighbours(cell):
+    cx, cy = cell
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            yield cx + dx, cy + dy
+
+
+def cluster_points(xs, ys, distance=CLUSTER_DISTANCE) -> List[RadarObject]:
+    """Single-linkage clusters of points closer than distance, as centroid objects"""
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    count = len(xs)
+    if count == 0:
+        return []
+
+    cells = np.floor(np.stack([xs, ys], axis=-1) / distance).astype(int)
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    for i, cell in enumerate(map(tuple, cells.tolist())):
+        grid.setdefault(cell, []).append(i)
+
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    limit = distance * distance
+    for cell, members in grid.items():
+        for other in _neighbours(cell):
+            if other < cell or other not in grid:
+                continue  # every pair of cells is visited once
+            for i in members:
+                for j in grid[other]:
+                    if j <= i and other == cell:
+                        continue
+                    if (xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2 <= limit:
+                        ri, rj = find(i), find(j)
+                        if ri != rj:
+                            parent[ri] = rj
+
+    roots = np.array([find(i) for i in range(count)])
+    _, labels, sizes = np.unique(roots, return_inverse=True, return_counts=True)
+    cx = np.bincount(labels, weights=xs) / sizes
+    cy = np.bincount(labels, weights=ys) / sizes
+    return [RadarObject(float(x), float(y), int(n)) for x, y, n in zip(cx, cy, sizes)]
+
+
+def associate(objects: List[RadarObject], tags: Dict[int, Tuple[float, float, float]],
+              margin=GATE_MARGIN) -> List[RadarObject]:
+    """
+    Gated nearest-neighbour assignment of tags to radar objects, one tag per object.
+
+    Args:
+        objects: radar objects in the same frame as the tags
+        tags: tag number -> (x, y, uncertainty_radius)
+
+    Returns:
+        the same objects with tag and distance filled in where matched
+    """
+    if not objects or not tags:
+        return objects
+
+    cell_size = max(r for _, _, r in tags.values()) + margin
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    for tag, (x, y, _) in tags.items():
+        grid.setdefault((int(np.floor(x / cell_size)), int(np.floor(y / cell_size))), []).append(tag)
+
+    pairs = []
+    for k, obj in enumerate(objects):
+        cell = (int(np.floor(obj.x / cell_size)), int(np.floor(obj.y / cell_size)))
+        for other in _neighbours(cell):
+            for tag in grid.get(other, ()):
+                x, y, radius = tags[tag]
+                distance = float(np.hypot(obj.x - x, obj.y - y))
+                if distance <= radius + margin:
+                    pairs.append((distance, k, tag))
+
+    pairs.sort()
+    used_tags = set()
+    for distance, k, tag in pairs:
+        if objects[k].tag is None and tag not in used_tags:
+            objects[k].tag = tag
+            objects[k].distance = distance
+            used_tags.add(tag)
+    return objects
@@ -0,0 +1,127 @@
+import serial
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# Rates the anchor may already be running at, tried in order when probing
+PROBE_BAUD_RATES = [115200, 921600, 460800, 230400]
+
+# AT+UDFCFG parameter tags (u-connectLocate AT command manual)
+UDFCFG_REPORT_INTERVAL = 3  # minimum time between +UUDF events per tag, ms
+UDFCFG_REPORT_FIELDS = 4    # bitmask of optional fields in the +UUDF event
+
+at_timeout = 0.5
+settle_time = 0.1  # anchors need a moment after the UART switches rate
+
+
+class AnchorConfigError(Exception):
+    pass
+
+
+@dataclass
+class AnchorSettings:
+    baud_rate: int = 921600
+    report_interval_ms: int = 20
+    report_fields: int = 0
+    flow_control: bool = False
+    extra_commands: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            baud_rate=int(data.get("baud_rate", cls.baud_rate)),
+            report_interval_ms=int(data.get("report_interval_ms", cls.report_interval_ms)),
+            report_fields=int(data.get("report_fields", cls.report_fields)),
+            flow_control=bool(data.get("flow_control", cls.flow_control)),
+            extra_commands=list(data.get("extra_commands", [])),
+        )
+
+
+def send_command(ser, cmd, timeout=at_timeout):
+    """
+    Send one AT command and collect the response lines until a final result code.
+
+    Returns:
+        list of response lines (without the final "OK")
+
+    Raises:
+        AnchorConfigError: on "ERROR" or when no final result code arrives in time
+    """
+    ser.write((cmd + "\r").encode())
+    lines = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        line = ser.readline().decode('utf-8', errors='ignore').strip()
+        if not line or line == cmd:  # skip blank lines and the command echo
+            continue
+        if line == "OK":
+            return lines
+        if line == "ERROR":
+            raise AnchorConfigError(f"{cmd} -> ERROR {lines}")
+        if line.startswith("+UUDF"):  # reports keep flowing while configuring
+            continue
+        lines.append(line)
+    raise AnchorConfigError(f"{cmd} -> no response {lines}")
+
+
+def probe_baud_rate(port, candidates=PROBE_BAUD_RATES):
+    """Find the rate the anchor is currently talking at, None if it does not answer"""
+    for baud in candidates:
+        try:
+            with serial.Serial(port, baud, timeout=at_timeout / 5) as ser:
+                ser.reset_input_buffer()
+                send_command(ser, "AT")
+                return baud
+        except AnchorConfigError:
+            continue
+    return None
+
+
+def build_commands(settings: AnchorSettings) -> List[str]:
+    """Commands sent at the current rate, before the UART switch"""
+    commands = [
+        "ATE0",  # no echo, keeps the response parsing simple
+        f"AT+UDFCFG={UDFCFG_REPORT_INTERVAL},{settings.report_interval_ms}",
+        f"AT+UDFCFG={UDFCFG_REPORT_FIELDS},{settings.report_fields}",
+    ]
+    commands.extend(settings.extra_commands)
+    return commands
+
+
+def configure_anchor(port, settings: AnchorSettings) -> Tuple[int, Optional[str]]:
+    """
+    Configure one anchor and switch it to settings.baud_rate.
+
+    The UART switch uses AT+UMRS with change_after_confirm=1, so the anchor
+    answers OK at the old rate and only then changes. The port is reopened at the
+    new rate and checked with a plain "AT".
+
+    Returns:
+        (baud rate to open the port with, error message or None)
+    """
+    current = probe_baud_rate(port, [settings.baud_rate] + [b for b in PROBE_BAUD_RATES if b != settings.baud_rate])
+    if current is None:
+        return PROBE_BAUD_RATES[0], f"{port}: anchor not responding to AT"
+
+    try:
+        with serial.Serial(port, current, timeout=at_timeout / 5) as ser:
+            ser.reset_input_buffer()
+            for cmd in build_commands(settings):
+                send_command(ser, cmd)
+            if current == settings.baud_rate:
+                return current, None
+            flow = 1 if settings.flow_control else 2
+            # <baud>,<flow_control>,<data_bits>,<stop_bits>,<parity>,<change_after_confirm>
+            send_command(ser, f"AT+UMRS={settings.baud_rate},{flow},8,1,1,1")
+            ser.flush()
+    except (AnchorConfigError, serial.SerialException) as e:
+        return current, f"{port}: {e}"
+
+    time.sleep(settle_time)
+    try:
+        with serial.Serial(port, settings.baud_rate, timeout=at_timeout / 5) as ser:
+            ser.reset_input_buffer()
+            send_command(ser, "AT")
+    except (AnchorConfigError, serial.SerialException) as e:
+        return current, f"{port}: no answer at {settings.baud_rate} baud ({e})"
+    return settings.baud_rate, None
@@ -0,0 +1,165 @@
+"""
+Loopback stand-in for a u-blox AoA anchor on a pseudo terminal.
+
+Point ble.py (or anchor_config.configure_anchor) at AnchorSimulator.port instead
+of a /dev/ttyUSB device. The simulator answers the AT commands used by
+anchor_config, only understands commands sent at its current baud rate (read back
+from the pty line settings) and streams +UUDF reports in between.
+"""
+import os
+import math
+import select
+import termios
+import tty
+import threading
+import time
+import random
+from anchor_config import UDFCFG_REPORT_INTERVAL
+
+
+class AnchorSimulator:
+    def __init__(self, baud_rate=115200, anchor_id="6C1DEBA41F2B",
+                 tags=("6C1DEBA79E4E",), report_interval_ms=50, stream=True):
+        self.baud_rate = baud_rate
+        self.anchor_id = anchor_id
+        self.tags = list(tags)
+        self.report_interval_ms = report_interval_ms
+        self.stream = stream
+        self.echo = True
+        self.udfcfg = {}
+        self.commands = []  # every command received at the right rate, in order
+
+        self.master_fd, self.slave_fd = os.openpty()
+        self.port = os.ttyname(self.slave_fd)
+        tty.setraw(self.slave_fd)  # no echo or line editing, like a real UART
+        self._set_line_speed(baud_rate)
+        os.set_blocking(self.master_fd, False)
+
+        self._counter = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _set_line_speed(self, baud):
+        attrs = termios.tcgetattr(self.slave_fd)
+        speed = getattr(termios, f"B{baud}")
+        attrs[4] = attrs[5] = speed
+        termios.tcsetattr(self.slave_fd, termios.TCSANOW, attrs)
+
+    def _line_speed_matches(self):
+        speed = termios.tcgetattr(self.slave_fd)[5]
+        return speed == getattr(termios, f"B{self.baud_rate}")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _noise(self):
+        # What the host sees of a report sent at another baud rate
+        try:
+            os.write(self.master_fd, bytes(random.getrandbits(8) for _ in range(24)))
+        except BlockingIOError:
+            pass
+
+    def _write(self, text):
+        try:
+            os.write(self.master_fd, (text + "\r\n").encode())
+        except BlockingIOError:
+            pass  # nobody is reading, drop it like an overrunning UART
+
+    def _report(self):
+        if not self._line_speed_matches():
+            self._noise()
+            return
+        for i, tag in enumerate(self.tags):
+            t = time.monotonic()
+            azimuth = int(40 * math.sin(t / 2 + i))
+            elevation = int(10 * math.cos(t / 3 + i))
+            rssi = -50 - random.randint(0, 10)
+            timestamp = int(t * 1000) & 0xFFFFFFFF
+            self._write(f'+UUDF:{tag},{rssi},{azimuth},{elevation},0,37,'
+                        f'"{self.anchor_id}","",{timestamp},{self._counter}')
+        self._counter += 1
+
+    def _handle(self, cmd):
+        if not self._line_speed_matches():
+            return  # host is talking at the wrong rate, the anchor only sees noise
+        self.commands.append(cmd)
+        if self.echo:
+            self._write(cmd)
+
+        if cmd == "AT":
+            self._write("OK")
+        elif cmd == "ATE0":
+            self.echo = False
+            self._write("OK")
+        elif cmd.startswith("AT+UDFCFG="):
+            try:
+                tag, value = cmd.split("=", 1)[1].split(",", 1)
+                self.udfcfg[int(tag)] = value
+                if int(tag) == UDFCFG_REPORT_INTERVAL:
+                    self.report_interval_ms = int(value)
+                self._write("OK")
+            except ValueError:
+                self._write("ERROR")
+        elif cmd.startswith("AT+UMRS="):
+            args = cmd.split("=", 1)[1].split(",")
+            try:
+                baud = int(args[0])
+                getattr(termios, f"B{baud}")
+            except (ValueError, AttributeError):
+                self._write("ERROR")
+                return
+            self._write("OK")
+            # change_after_confirm: switch only after the OK went out
+            if len(args) < 6 or args[5] == "1":
+                self.baud_rate = baud
+        else:
+            self._write("ERROR")
+
+    def _run(self):
+        buffer = b""
+        next_report = time.monotonic()
+        while not self._stop.is_set():
+            timeout = max(0.0, next_report - time.monotonic()) if self.stream else 0.05
+            ready, _, _ = select.select([self.master_fd], [], [], timeout)
+            if ready:
+                try:
+                    buffer += os.read(self.master_fd, 1024)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    break
+                while b"\r" in buffer:
+                    raw, buffer = buffer.split(b"\r", 1)
+                    cmd = raw.decode('utf-8', errors='ignore').strip()
+                    if cmd:
+                        self._handle(cmd)
+            if self.stream and time.monotonic() >= next_report:
+                self._report()
+                next_report += self.report_interval_ms / 1000.0
+
+
+def main():
+    with AnchorSimulator() as sim:
+        print(f"Simulated anchor on {sim.port}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Exiting...")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,27 @@ import glob
 import json
 import threading
 import time
+import argparse
+import sys
 from collections import defaultdict, deque
+from anchor_config import AnchorSettings, configure_anchor
+from recording import Recorder, replay
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shm_ring import ShmRing, BLE_RECORD
+from discovery import discover_cached
 
 CONFIG_FILE = "config.json"
 BAUD_RATE = 115200
+CONFIGURE_ANCHORS = True  # switch anchors to AnchorSettings.baud_rate on startup
 
 AZIMUTH_PATTERN = re.compile(r'\+UUDF:([0-9A-Fa-f]{12}),(-?\d+),(-?\d+),(-?\d+),(\d+),(\d+),"([0-9A-Fa-f]{12})","",(\d+),(\d+)')
 DIRECT_PATTERN = re.compile(r'\+UUDF:([0-9A-Fa-f]{12}),(-?\d+),(-?\d+),(-?\d+),(\d+),(\d+),"([0-9A-Fa-f]{12})","",(\d+),(\d+)')
 
 
 tag_ids = []
+ring = None  # shared-memory ring of the fusion process, replaces the printed lines when set
+ring_lock = threading.Lock()  # one reader thread per anchor shares the single-producer ring and tag_ids
 
 ble_dir = os.path.dirname(os.path.abspath(__file__))
 config_path = os.path.join(ble_dir, CONFIG_FILE)
@@ -58,14 +69,19 @@ def parse_message(message, station):
         periodic_event_counter = int(match.group(9))
         
         # match and save the tag ids
-        if ed_instance_id not in tag_ids:
-            tag_ids.append(ed_instance_id)
-
-        tag_num = tag_ids.index(ed_instance_id) + 1
+        with ring_lock:
+            if ed_instance_id not in tag_ids:
+                tag_ids.append(ed_instance_id)
+            tag_num = tag_ids.index(ed_instance_id) + 1
 
         # Calculate average frequency for the tag based on the current timestamp and readout time
         avg_frequency = calculate_frequency(tag_num, timestamp)
 
+        if ring is not None:
+            with ring_lock:
+                ring.write_struct(BLE_RECORD, time.monotonic(), int(station), tag_num,
+                                  rssi, angle_1, angle_2, timestamp & 0xFFFFFFFF)
+            return
 
         # Display the parsed data in a formatted way with set width
         print(
@@ -110,7 +126,18 @@ def select_two_ports():
                 print("Enter a valid number.")
     return selected_ports
 
+def discover_ports(anchor_ids=None):
+    """Anchor ports found by probing, in the order of anchor_ids (config.json) if given"""
+    anchors = discover_cached().anchors(anchor_ids)
+    if len(anchors) < 2:
+        print(f"Discovery found {len(anchors)} anchor(s).")
+        return None
+    ports = [anchors[0].port, anchors[1].port]
+    print("Discovered anchor ports:", ports)
+    return ports
+
 def load_or_select_ports():
+    config = {}
     if os.path.exists(config_path):
         try:
             with open(config_path, 'r') as f:
@@ -120,22 +147,51 @@ def load_or_select_ports():
                     return config["ports"]
         except (json.JSONDecodeError, IOError) as e:
             print(f"Error reading config file: {e}")
+    discovered = discover_ports(config.get("anchor_ids"))
+    if discovered:
+        return discovered
+    if not sys.stdin.isatty():
+        return None  # nobody to ask
     selected_ports = select_two_ports()
     if selected_ports:
+        config["ports"] = selected_ports  # keep the "anchor" and "anchor_ids" sections
         with open(config_path, 'w') as f:
-            json.dump({"ports": selected_ports}, f)
+            json.dump(config, f)
         print("Saved selected ports to config.")
     return selected_ports
 
-def read_from_port(port, station):
+def load_anchor_settings():
+    """Anchor settings from the "anchor" section of config.json, defaults otherwise"""
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+                if "anchor" in config:
+                    return AnchorSettings.from_dict(config["anchor"])
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error reading config file: {e}")
+    return AnchorSettings()
+
+def read_from_port(port, station, settings=None, recorder=None):
+    baud_rate = BAUD_RATE
+    if settings is not None:
+        baud_rate, error = configure_anchor(port, settings)
+        if error:
+            print(f"Anchor configuration failed: {error}. Using {baud_rate} baud.")
+        else:
+            print(f"Anchor on {port} configured, {baud_rate} baud.")
     while True:
         try:
-            with serial.Serial(port, BAUD_RATE, timeout=1) as ser:
+            with serial.Serial(port, baud_rate, timeout=1) as ser:
                 ser.reset_input_buffer()  # Flush input buffer
                 print(f"Listening on {port}...")
+                if recorder:
+                    recorder.add_port(station, port)
                 while True:
                     line = ser.readline().decode('utf-8', errors='ignore').strip()
                     if line:
+                        if recorder:
+                            recorder.add_line(station, line)
                         parse_message(line, station)
         except serial.SerialException as e:
             print(f"Error opening serial port {port}: {e}. Retrying in 5 seconds...")
@@ -145,12 +201,30 @@ def read_from_port(port, station):
             break
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="append raw anchor lines to this file")
+    parser.add_argument("--replay", help="replay a recording instead of reading the anchors")
+    parser.add_argument("--fast", action="store_true", help="replay as fast as possible")
+    parser.add_argument("--shm", help="write records to this shared-memory ring instead of stdout")
+    args = parser.parse_args()
+
+    global ring
+    if args.shm:
+        ring = ShmRing.attach(args.shm)
+
+    if args.replay:
+        count, elapsed = replay(args.replay, parse_message, realtime=not args.fast)
+        print(f"Replayed {count} lines in {elapsed:.2f} s ({count / max(elapsed, 1e-9):.0f} lines/s)")
+        return
+
+    recorder = Recorder(args.record) if args.record else None
     selected_ports = load_or_select_ports()
     if selected_ports and len(selected_ports) == 2:
         port1, port2 = selected_ports
         print(f"Using ports: {port1} and {port2}")
-        thread1 = threading.Thread(target=read_from_port, args=(port1, "1",))
-        thread2 = threading.Thread(target=read_from_port, args=(port2, "2",))
+        settings = load_anchor_settings() if CONFIGURE_ANCHORS else None
+        thread1 = threading.Thread(target=read_from_port, args=(port1, "1", settings, recorder))
+        thread2 = threading.Thread(target=read_from_port, args=(port2, "2", settings, recorder))
         thread1.start()
         thread2.start()
         try:
@@ -158,6 +232,9 @@ def main():
             thread2.join()
         except KeyboardInterrupt:
             print("Exiting...")
-            
+        finally:
+            if recorder:
+                recorder.close()
+
 if __name__ == "__main__":
     main()
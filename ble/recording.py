@@ -0,0 +1,108 @@
+"""
+Append-only recording of raw anchor lines.
+
+File layout: a magic header followed by records of
+    <type:u8> <host monotonic time:f64> <station:u8> <length:u16> <payload>
+Type 0 announces the port a station reads from (payload is the port path),
+type 1 is one raw line as received from that station, type 2 starts a recording
+session (station 0, payload is the wall-clock start time). Recorder appends to an
+existing file, so a file can hold several sessions whose monotonic times are not
+comparable (another run, or another boot); replay restarts its clock at each one.
+"""
+import struct
+import threading
+import time
+
+MAGIC = b"KTIBLE1\n"
+RECORD_HEADER = struct.Struct("<BdBH")
+RECORD_PORT = 0
+RECORD_LINE = 1
+RECORD_SESSION = 2
+
+
+class Recorder:
+    def __init__(self, path, flush_interval=1.0):
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        self._write(RECORD_SESSION, 0, time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+
+    def _write(self, record_type, station, payload, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        data = payload.encode("utf-8", errors="ignore")
+        with self.lock:
+            self.file.write(RECORD_HEADER.pack(record_type, timestamp, int(station), len(data)))
+            self.file.write(data)
+            if timestamp - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = timestamp
+
+    def add_port(self, station, port):
+        self._write(RECORD_PORT, station, port)
+
+    def add_line(self, station, line, timestamp=None):
+        self._write(RECORD_LINE, station, line, timestamp)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_records(path):
+    """Yield (type, timestamp, station, payload) tuples, stops at a truncated tail"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a BLE recording")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            record_type, timestamp, station, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield record_type, timestamp, station, payload.decode("utf-8", errors="ignore")
+
+
+def replay(path, handler, realtime=True, speed=1.0):
+    """
+    Feed recorded lines to handler(line, station).
+
+    Args:
+        realtime: keep the recorded spacing between lines (scaled by speed),
+                  otherwise replay as fast as the handler allows
+
+    Returns:
+        (number of lines, elapsed seconds)
+    """
+    count = 0
+    begin = start = time.monotonic()
+    first = None
+    for record_type, timestamp, station, payload in read_records(path):
+        if record_type == RECORD_SESSION:
+            # Times of the next session only relate to each other, not to this one
+            first = None
+            start = time.monotonic()
+            continue
+        if record_type != RECORD_LINE:
+            continue
+        if realtime:
+            if first is None:
+                first = timestamp
+            delay = (timestamp - first) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        handler(payload, str(station))
+        count += 1
+    return count, time.monotonic() - begin
+
+
+def ports(path):
+    """Station -> port path as announced in the recording"""
+    return {str(station): payload
+            for record_type, _, station, payload in read_records(path)
+            if record_type == RECORD_PORT}
@@ -0,0 +1,125 @@
+"""
+Bounded channels between the sensor threads and the Tk loop.
+
+Every channel has a capacity and an overflow policy:
+    BLOCK        the producer waits for room (up to block_timeout, then the new item is dropped)
+    DROP_OLDEST  the oldest pending item makes room for the new one
+    COALESCE     an item with the same key as a pending one replaces it in place,
+                 new keys fall back to BLOCK when the channel is full
+
+put(force=True) accepts an item even when the channel is full, for the few items
+that must not be lost (the overshoot is counted as overflowed); with block=False
+anything else that does not fit is dropped at once.
+
+On DROP_OLDEST channels, items older than max_lag when the consumer drains them
+are discarded as well, so a consumer that falls behind catches up to the present
+instead of replaying the backlog. BLOCK and COALESCE channels never lose an
+accepted item, their lag is bounded by capacity instead.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Optional
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+
+
+@dataclass
+class ChannelStats:
+    name: str
+    policy: str
+    capacity: int
+    depth: int = 0
+    max_depth: int = 0
+    puts: int = 0
+    dropped: int = 0  # overflowed or too old
+    overflowed: int = 0  # forced in over capacity
+    coalesced: int = 0  # replaced by a newer item with the same key
+    blocked: float = 0.0  # seconds producers spent waiting for room
+    last_lag: float = 0.0  # seconds between put and drain of the last item
+    max_lag: float = 0.0
+
+
+class BoundedChannel:
+    def __init__(self, name: str, capacity: int, policy: str = BLOCK,
+                 max_lag: Optional[float] = None, block_timeout: float = 0.5):
+        if policy not in (BLOCK, DROP_OLDEST, COALESCE):
+            raise ValueError(f"unknown channel policy {policy!r}")
+        self.capacity = capacity
+        self.policy = policy
+        self.max_lag = max_lag
+        self.block_timeout = block_timeout
+        self.stats = ChannelStats(name, policy, capacity)
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (put time, item)
+        self._seq = 0  # key for items put without one
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item: Any, key: Optional[Hashable] = None, block: bool = True, force: bool = False) -> bool:
+        """
+        Queue item, False if it was dropped; block=False never waits (use it on the
+        consumer thread), force=True never drops and never waits
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.stats.puts += 1
+            if key is not None and self.policy == COALESCE and key in self._items:
+                self._items[key] = (self._items[key][0], item)  # keep the slot and its age
+                self.stats.coalesced += 1
+                return True
+
+            if len(self._items) >= self.capacity:
+                if force:
+                    self.stats.overflowed += 1
+                elif self.policy == DROP_OLDEST:
+                    self._items.popitem(last=False)
+                    self.stats.dropped += 1
+                elif not block or not self._wait_for_room(now):
+                    self.stats.dropped += 1
+                    return False
+
+            if key is None or self.policy != COALESCE:
+                self._seq += 1
+                key = ("seq", self._seq)
+            self._items[key] = (now, item)
+            self.stats.depth = len(self._items)
+            self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+            return True
+
+    def _wait_for_room(self, start) -> bool:
+        deadline = start + self.block_timeout
+        while len(self._items) >= self.capacity:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._not_full.wait(remaining)
+        self.stats.blocked += time.monotonic() - start
+        return len(self._items) < self.capacity
+
+    def drain(self, max_items: Optional[int] = None) -> List[Any]:
+        """Remove and return pending items in order, at most max_items"""
+        now = time.monotonic()
+        items = []
+        with self._lock:
+            while self._items and (max_items is None or len(items) < max_items):
+                _, (put_time, item) = self._items.popitem(last=False)
+                lag = now - put_time
+                if self.max_lag is not None and lag > self.max_lag and self.policy == DROP_OLDEST:
+                    self.stats.dropped += 1
+                    continue
+                self.stats.last_lag = lag
+                self.stats.max_lag = max(self.stats.max_lag, lag)
+                items.append(item)
+            self.stats.depth = len(self._items)
+            self._not_full.notify_all()
+        return items
+
+    def snapshot(self) -> ChannelStats:
+        with self._lock:
+            return ChannelStats(**vars(self.stats))
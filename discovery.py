@@ -0,0 +1,378 @@
+"""
+Non-interactive discovery of radar and BLE anchor serial ports.
+
+Every /dev/ttyACM* and /dev/ttyUSB* is probed at the same time, each in its own
+thread, listening for LISTEN_TIME and waiting REPLY_TIME for answers to requests:
+
+- radar data port: the mmw demo magic word in the byte stream
+- radar CLI port:  the "mmwDemo:/>" prompt after sending a newline
+- BLE anchor:      +UUDF reports (or OK to AT) at 921600 or 115200 baud
+
+A port is first only listened to, then sent a bare newline; AT goes out only to
+ports that did not show a radar, and never to ports a previous result knows as
+radar ports. Ports another process has open (found in /proc, or holding a flock
+like pyserial's exclusive mode) are not touched at all and keep their previous
+role, and the line settings of a probed port are restored afterwards.
+
+A radar that is not streaming yet has a silent data port; it is paired with its
+CLI port by USB serial number, or failing that as the next port by name. The
+result is cached in devices.json with a fingerprint of the attached devices
+(port names, USB ids and serial numbers from sysfs), so later starts skip the
+probe until something is plugged in or out.
+
+The probe uses raw termios file descriptors, so pseudo terminals work as well:
+run this file with --simulate to discover pty stand-ins for two anchors and a
+radar.
+"""
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import re
+import select
+import termios
+import time
+import tty
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from typing import List, Optional, Sequence, Tuple
+
+CANDIDATE_GLOBS = ("/dev/ttyACM*", "/dev/ttyUSB*")
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "devices.json")
+LISTEN_TIME = 0.25  # seconds listening for a streaming radar or anchor, longer than a radar frame period
+REPLY_TIME = 0.1  # seconds waiting for the answer to a newline or AT, which comes within milliseconds
+ANCHOR_BAUD_RATES = (921600, 115200)  # configured rate first, then the u-blox default
+RADAR_CLI_BAUD = 115200
+RADAR_DATA_BAUD = 921600  # set by configDataPort in rad.py
+
+# (baud rate, request) in probe order; an empty request only listens
+PROBE_STEPS = ((RADAR_DATA_BAUD, b""), (RADAR_CLI_BAUD, b"\r\n")) + tuple((baud, b"AT\r") for baud in ANCHOR_BAUD_RATES)
+
+RADAR_MAGIC = b"\x02\x01\x04\x03\x06\x05\x08\x07"
+RADAR_PROMPT = b"mmwDemo:/>"
+
+ROLE_RADAR_CLI = "radar_cli"
+ROLE_RADAR_DATA = "radar_data"
+ROLE_ANCHOR = "anchor"
+
+
+@dataclass
+class PortInfo:
+    port: str
+    role: Optional[str] = None
+    baud_rate: Optional[int] = None
+    anchor_id: Optional[str] = None
+    usb_id: Optional[str] = None  # "vid:pid"
+    usb_serial: Optional[str] = None
+    interface: Optional[str] = None  # USB interface number
+    radar_cli: Optional[str] = None  # CLI port of the same radar, on data ports
+    busy: bool = False  # open in another process, not probed
+
+
+@dataclass
+class Discovery:
+    fingerprint: str
+    ports: List[PortInfo] = field(default_factory=list)
+    elapsed: float = 0.0  # seconds the probe took, 0 when loaded from the cache
+
+    def with_role(self, role) -> List[PortInfo]:
+        return [p for p in self.ports if p.role == role]
+
+    def anchors(self, order: Optional[Sequence[str]] = None) -> List[PortInfo]:
+        """Anchor ports in station order: by anchor id when order is given, else by port name"""
+        anchors = sorted(self.with_role(ROLE_ANCHOR), key=lambda p: _natural_key(p.port))
+        if order:
+            rank = {anchor_id: i for i, anchor_id in enumerate(order)}
+            anchors.sort(key=lambda p: rank.get(p.anchor_id, len(rank)))
+        return anchors
+
+    def radars(self) -> List[Tuple[str, Optional[str]]]:
+        """(CLI port, data port) of every radar, by CLI port name"""
+        data_ports = self.with_role(ROLE_RADAR_DATA)
+        pairs = []
+        for cli in sorted(self.with_role(ROLE_RADAR_CLI), key=lambda p: _natural_key(p.port)):
+            data = next((p for p in data_ports if p.radar_cli == cli.port), None)
+            pairs.append((cli.port, data.port if data else None))
+        return pairs
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def candidate_ports() -> List[str]:
+    ports = []
+    for pattern in CANDIDATE_GLOBS:
+        ports.extend(glob.glob(pattern))
+    return sorted(ports, key=_natural_key)
+
+
+def usb_info(port) -> PortInfo:
+    """PortInfo with the USB identity of port filled in from sysfs (left empty for ptys)"""
+    info = PortInfo(port)
+    device = os.path.join("/sys/class/tty", os.path.basename(port), "device")
+    if not os.path.exists(device):
+        return info
+    interface = os.path.realpath(device)
+    usb_device = os.path.dirname(interface)
+
+    def read(path):
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    info.interface = read(os.path.join(interface, "bInterfaceNumber"))
+    vendor = read(os.path.join(usb_device, "idVendor"))
+    product = read(os.path.join(usb_device, "idProduct"))
+    if vendor and product:
+        info.usb_id = f"{vendor}:{product}"
+    info.usb_serial = read(os.path.join(usb_device, "serial"))
+    return info
+
+
+def ports_in_use(ports: Sequence[str]) -> set:
+    """The ports among ports that another process has open, from /proc/<pid>/fd"""
+    wanted = {os.path.realpath(p): p for p in ports}
+    own = str(os.getpid())
+    busy = set()
+    for fd_dir in glob.glob("/proc/[0-9]*/fd"):
+        if fd_dir.split("/")[2] == own:
+            continue
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue  # gone, or another user's process
+        for fd in fds:
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            if target in wanted:
+                busy.add(wanted[target])
+    return busy
+
+
+def same_device(a: PortInfo, b: PortInfo) -> bool:
+    return a.port == b.port and a.usb_id == b.usb_id and a.usb_serial == b.usb_serial
+
+
+def fingerprint(infos: Sequence[PortInfo]) -> str:
+    text = "\n".join(f"{i.port}|{i.usb_id}|{i.usb_serial}|{i.interface}" for i in infos)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def _open_raw(port, baud):
+    """(fd, original termios attributes) of port switched to raw at baud; BlockingIOError if it is locked"""
+    fd = os.open(port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        original = termios.tcgetattr(fd)
+        tty.setraw(fd)
+        attrs = termios.tcgetattr(fd)
+        speed = getattr(termios, f"B{baud}")
+        attrs[4] = attrs[5] = speed
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+        termios.tcflush(fd, termios.TCIOFLUSH)
+    except (OSError, termios.error, AttributeError):
+        os.close(fd)
+        raise
+    return fd, original
+
+
+def _exchange(port, baud, request: bytes, done, duration) -> bytes:
+    """Open port at baud, send request and read until done(data) or duration passes"""
+    fd, original = _open_raw(port, baud)
+    data = b""
+    try:
+        if request:
+            try:
+                os.write(fd, request)
+            except OSError:
+                pass
+        deadline = time.monotonic() + duration
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            try:
+                chunk = os.read(fd, 4096)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break
+            data += chunk
+            if done(data):
+                break
+    finally:
+        try:
+            termios.tcsetattr(fd, termios.TCSADRAIN, original)
+        except termios.error:
+            pass
+        os.close(fd)
+    return data
+
+
+def _anchor_id(data: bytes) -> Optional[str]:
+    match = re.search(rb'\+UUDF:[^,]*,[^,]*,[^,]*,[^,]*,[^,]*,[^,]*,"([0-9A-Fa-f]+)"', data)
+    return match.group(1).decode() if match else None
+
+
+def _identified(data: bytes) -> bool:
+    # A bare OK is only taken at the end of the window, a report may still name the anchor
+    return RADAR_MAGIC in data or RADAR_PROMPT in data or _anchor_id(data) is not None
+
+
+def _taken_over(info: PortInfo, known: Optional[PortInfo]) -> PortInfo:
+    """info marked busy, with the role known from a previous result for the same device"""
+    if known is not None and same_device(info, known):
+        info.role, info.baud_rate, info.anchor_id = known.role, known.baud_rate, known.anchor_id
+    info.busy = True
+    return info
+
+
+def probe_port(port, listen_time=LISTEN_TIME, known: Optional[PortInfo] = None, reply_time=REPLY_TIME) -> PortInfo:
+    """Identify port; known is its entry in a previous result, if any"""
+    info = usb_info(port)
+    radar = known is not None and same_device(info, known) and known.role in (ROLE_RADAR_CLI, ROLE_RADAR_DATA)
+    try:
+        for baud, request in PROBE_STEPS:
+            if radar and request.startswith(b"AT"):
+                continue
+            data = _exchange(port, baud, request, _identified, reply_time if request else listen_time)
+            if RADAR_MAGIC in data:
+                info.role, info.baud_rate = ROLE_RADAR_DATA, baud
+            elif RADAR_PROMPT in data:
+                info.role, info.baud_rate = ROLE_RADAR_CLI, baud
+            elif b"+UUDF" in data or b"OK" in data:
+                info.role, info.baud_rate = ROLE_ANCHOR, baud
+                info.anchor_id = _anchor_id(data)
+            if info.role:
+                break
+    except BlockingIOError:
+        return _taken_over(info, known)  # another process holds the lock
+    except OSError as e:
+        print(f"Discovery: cannot probe {port}: {e}")
+    return info
+
+
+def _pair_radar_ports(infos: List[PortInfo]):
+    """
+    Give every radar CLI port its data port: the other interface of the same USB
+    device, or without USB identity the next port by name. A data port that is
+    still silent (radar not started yet) is recognised this way too.
+    """
+    by_name = sorted(infos, key=lambda p: _natural_key(p.port))
+
+    def free(p):
+        return p.role in (None, ROLE_RADAR_DATA) and p.radar_cli is None
+
+    for i, cli in enumerate(by_name):
+        if cli.role != ROLE_RADAR_CLI:
+            continue
+        if cli.usb_serial:
+            data = next((p for p in by_name if p is not cli and free(p) and p.usb_serial == cli.usb_serial), None)
+        else:
+            data = by_name[i + 1] if i + 1 < len(by_name) and free(by_name[i + 1]) else None
+        if data is not None:
+            data.role = ROLE_RADAR_DATA
+            data.baud_rate = data.baud_rate or RADAR_DATA_BAUD
+            data.radar_cli = cli.port
+
+
+def discover(ports: Optional[Sequence[str]] = None, listen_time=LISTEN_TIME,
+             previous: Optional[Discovery] = None) -> Discovery:
+    """Probe all ports concurrently, skipping ports in use; previous supplies roles already known"""
+    ports = list(ports) if ports is not None else candidate_ports()
+    known = {p.port: p for p in previous.ports} if previous is not None else {}
+    busy = ports_in_use(ports)
+    start = time.monotonic()
+
+    def probe(port):
+        if port in busy:
+            return _taken_over(usb_info(port), known.get(port))
+        return probe_port(port, listen_time, known.get(port))
+
+    with ThreadPoolExecutor(max_workers=max(len(ports), 1)) as pool:
+        infos = list(pool.map(probe, ports))
+    _pair_radar_ports(infos)
+    return Discovery(fingerprint([usb_info(p) for p in ports]), infos, time.monotonic() - start)
+
+
+def load_cache(path=CACHE_FILE) -> Optional[Discovery]:
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return Discovery(data["fingerprint"], [PortInfo(**p) for p in data["ports"]])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_cache(discovery: Discovery, path=CACHE_FILE):
+    with open(path, 'w') as f:
+        json.dump({"fingerprint": discovery.fingerprint,
+                   "ports": [asdict(p) for p in discovery.ports]}, f, indent=2)
+
+
+def discover_cached(ports: Optional[Sequence[str]] = None, refresh=False, path=CACHE_FILE) -> Discovery:
+    """
+    The cached discovery if the attached devices still match its fingerprint,
+    otherwise a fresh probe. ble.py and rad.py start together, so the probe runs
+    under a file lock and the second caller picks up the first one's result. A
+    result with a busy port of unknown role is not cached, so that port is probed
+    again on the next start.
+    """
+    ports = list(ports) if ports is not None else candidate_ports()
+    current = fingerprint([usb_info(p) for p in ports])
+    with open(path + ".lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        cached = None if refresh else load_cache(path)
+        if cached is not None and cached.fingerprint == current:
+            return cached
+        discovery = discover(ports, previous=cached)
+        if not any(p.busy and p.role is None for p in discovery.ports):
+            save_cache(discovery, path)
+        return discovery
+
+
+def simulate():
+    """Discover pty stand-ins for two anchors and one radar and report the cold start time"""
+    import sys
+    import tempfile
+    root = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:0] = [os.path.join(root, "ble"), os.path.join(root, "radar")]
+    from anchor_sim import AnchorSimulator
+    from radar_sim import RadarSimulator
+
+    with AnchorSimulator(anchor_id="6C1DEBA41F2B") as a1, \
+            AnchorSimulator(anchor_id="6C1DEBA41F3C", baud_rate=921600) as a2, \
+            RadarSimulator() as radar:
+        ports = [a1.port, a2.port, radar.cli_port, radar.data_port]
+        cache = os.path.join(tempfile.mkdtemp(), "devices.json")
+        for attempt in ("cold", "cached"):
+            start = time.monotonic()
+            result = discover_cached(ports, path=cache)
+            print(f"{attempt} start: {time.monotonic() - start:.3f} s")
+        for info in result.ports:
+            print(f"  {info.port}: {info.role} @ {info.baud_rate} {info.anchor_id or ''}")
+        print("anchors:", [p.port for p in result.anchors()])
+        print("radars:", result.radars())
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Find radar and BLE anchor serial ports")
+    parser.add_argument("--simulate", action="store_true", help="discover pty stand-ins instead of real devices")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cached result")
+    args = parser.parse_args()
+    if args.simulate:
+        simulate()
+    else:
+        result = discover_cached(refresh=args.refresh)
+        for info in result.ports:
+            print(f"{info.port}: {info.role} @ {info.baud_rate} {info.anchor_id or ''}")
@@ -0,0 +1,544 @@
+"""
+Headless BLE + radar fusion.
+
+FusionEngine takes timestamped BLE and radar events, keeps tag and radar state
+in plain data structures and decides "tag in", "radar" and "safe". Anything that
+wants to follow along (the Tk visualizer, a logger, an actuator) subscribes and
+receives FusionEvents; none of them can hold up a decision.
+
+With FusionConfig.tick_rate set, sensor events only feed the trackers and
+run_scheduler evaluates the scene at a fixed rate instead: bearings are
+extrapolated by their trackers to the tick time, the newest radar frame is used
+as is, and ticks with no new data since the last one are skipped.
+
+Run this file directly to execute the safety logic without a display.
+"""
+import subprocess
+import traceback
+import time
+from dataclasses import dataclass, field
+from threading import Thread, Lock, Event
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from parsed_data import ParsedDataRadar, parse_string
+from triangulation import AnchorArray, AnchorPose
+from tracking import SmoothingConfig, SmoothingFilter, ScalarTracker, PositionTracker
+from zones import Zone, ZoneIndex, ROLE_KEEPOUT, ROLE_PRESENCE
+from association import RadarObject, cluster_points, associate
+from shm_ring import ShmRing, BLE_RECORD, BLE_SLOT_SIZE, RADAR_SLOT_SIZE, unpack_radar
+from timebase import TimeBase
+from radar_array import RadarPose, CloudMerger, MERGE_WINDOW
+import numpy as np
+
+RADAR_POINTS_TRESHOLD = 2  # points in the keepout box that raise the radar decision
+RADAR_RELEASE_TRESHOLD = 1  # at or below this many points the radar decision drops
+TAG_IN_Y = 2.5  # tags closer than this to the anchor line count as "in"
+GHOST_Y = 0.1  # mirrored radar ghosts show up along y = 0 ...
+GHOST_X = 0.15  # ... symmetric about x = 0 within this tolerance
+PRESENCE_EXTENT = 50.0  # meters, reach of the default presence zone
+FUSION_TICK_RATE = 20.0  # Hz, scene evaluation rate of run_scheduler
+
+
+@dataclass
+class BleEvent:
+    t: float  # host monotonic seconds when measured (aligned anchor timestamp, else receive time)
+    station: int
+    tag: int
+    rssi: float
+    azimuth: float
+    elevation: float
+    timestamp: Optional[int] = None  # anchor clock, ms
+    received: Optional[float] = None  # host monotonic seconds
+
+
+@dataclass
+class RadarEvent:
+    t: float  # host monotonic seconds when measured (aligned timeCpuCycles, else receive time)
+    frame_number: int
+    x_coords: Sequence[float]
+    y_coords: Sequence[float]
+    cpu_cycles: Optional[int] = None  # radar timeCpuCycles
+    received: Optional[float] = None  # host monotonic seconds
+    radar: int = 0  # index into FusionConfig.radar_poses; coordinates are in that sensor's frame
+
+
+@dataclass
+class FusionEvent:
+    """
+    kind is one of
+    - "angle": key=(tag, station), value=smoothed azimuth in degrees
+    - "tag": key=tag, value=(x, y, uncertainty_radius) in meters
+    - "radar": key=None, value=(x_coords, y_coords) of all radars after ghost filtering, in world coordinates
+    - "objects": key=None, value=list of RadarObject matched against the tags
+    - "decision": key="tag_in" / "radar" / "intruder" / "safe", value=bool; "tag_in"
+      events carry the tag number in tag
+    """
+    kind: str
+    t: float
+    key: object
+    value: object
+    tag: Optional[int] = None
+
+
+@dataclass
+class FusionConfig:
+    anchor_poses: List[AnchorPose]
+    smoothing: SmoothingConfig = field(default_factory=SmoothingConfig)
+    keepout_width: float = 2.0  # meters, centered on the radar boresight
+    keepout_height: float = 2.0  # meters in front of the radar
+    radar_points_threshold: int = RADAR_POINTS_TRESHOLD
+    radar_release_threshold: int = RADAR_RELEASE_TRESHOLD
+    tag_in_y: float = TAG_IN_Y
+    tags: Optional[Set[int]] = None  # tag numbers to track, None for all
+    zones: Optional[ZoneIndex] = None  # None builds default_zones() from the values above
+    radar_x: float = 0.0  # radar position on the anchor X axis, used when radar_poses is None
+    radar_poses: Optional[List[RadarPose]] = None  # world pose of every radar, by RadarEvent.radar
+    radar_merge_window: float = MERGE_WINDOW
+    tick_rate: Optional[float] = None  # Hz; None fuses on every sensor event, otherwise see run_scheduler
+
+
+def radar_poses(config: FusionConfig) -> List[RadarPose]:
+    return config.radar_poses or [RadarPose(x=config.radar_x)]
+
+
+def default_zones(config: FusionConfig) -> ZoneIndex:
+    """The keepout box in front of the first radar and everything closer than tag_in_y as presence area"""
+    half_width = config.keepout_width / 2
+    radar = radar_poses(config)[0]
+    return ZoneIndex([
+        Zone.rectangle("keepout", radar.x - half_width, radar.y,
+                       radar.x + half_width, radar.y + config.keepout_height, ROLE_KEEPOUT),
+        Zone.rectangle("tag_in", -PRESENCE_EXTENT, -PRESENCE_EXTENT, PRESENCE_EXTENT, config.tag_in_y, ROLE_PRESENCE),
+    ])
+
+
+@dataclass
+class TagState:
+    azimuth: Dict[int, float] = field(default_factory=dict)  # station -> smoothed azimuth
+    elevation: Dict[int, float] = field(default_factory=dict)
+    rssi: Dict[int, float] = field(default_factory=dict)
+    angle_trackers: Dict[int, ScalarTracker] = field(default_factory=dict)
+    position_tracker: Optional[PositionTracker] = None
+    x: Optional[float] = None
+    y: Optional[float] = None
+    radius: Optional[float] = None
+    inside: bool = False
+    last_update: Optional[float] = None
+    dirty: bool = False  # new bearings since the last tick
+
+
+@dataclass
+class SchedulerStats:
+    ticks: int = 0
+    idle: int = 0  # ticks skipped because nothing changed
+    overruns: int = 0  # ticks started late by more than a period
+    radar_frames_skipped: int = 0  # frames replaced by a newer one before their tick
+    last_duration: float = 0.0  # seconds spent in the last evaluated tick
+    max_duration: float = 0.0
+
+
+@dataclass
+class RadarState:
+    x_coords: List[float] = field(default_factory=list)
+    y_coords: List[float] = field(default_factory=list)
+    points_in_box: int = 0  # most points inside any one keepout zone
+    points_in_zone: Dict[str, int] = field(default_factory=dict)
+    objects: List[RadarObject] = field(default_factory=list)  # in anchor (tag) coordinates
+    intruder: bool = False  # an untagged object inside a keepout zone
+    detected: bool = False
+    last_update: Optional[float] = None
+
+
+class FusionEngine:
+    def __init__(self, config: FusionConfig):
+        self.config = config
+        self.anchor_array = AnchorArray(config.anchor_poses)
+        self.zones = config.zones if config.zones is not None else default_zones(config)
+        self.keepout_mask = self.zones.role_mask(ROLE_KEEPOUT)
+        self.presence_mask = self.zones.role_mask(ROLE_PRESENCE)
+        self.tags: Dict[int, TagState] = {}
+        self.radar = RadarState()
+        self.safe = False
+        self.lock = Lock()
+        self.subscribers: List[Callable[[FusionEvent], None]] = []
+        self.timebase = TimeBase()
+        self.radar_merger = CloudMerger(radar_poses(config), config.radar_merge_window)
+        self.pending_radar: Dict[int, RadarEvent] = {}  # newest frame per radar not yet fused (tick mode)
+        self.scheduler_stats = SchedulerStats()
+
+    def subscribe(self, callback: Callable[[FusionEvent], None]):
+        self.subscribers.append(callback)
+
+    def _publish(self, events):
+        for event in events:
+            for callback in self.subscribers:
+                callback(event)
+
+    def _tag(self, tag):
+        state = self.tags.get(tag)
+        if state is None:
+            state = TagState(position_tracker=self.config.smoothing.position_tracker())
+            self.tags[tag] = state
+        return state
+
+    def _update_safe(self, t, events):
+        # Something is in the keepout, a tag is there and nothing in it is untagged
+        safe = (any(state.inside for state in self.tags.values())
+                and self.radar.detected and not self.radar.intruder)
+        if safe != self.safe:
+            self.safe = safe
+            events.append(FusionEvent("decision", t, "safe", safe))
+
+    def on_ble(self, event: BleEvent):
+        if self.config.tags is not None and event.tag not in self.config.tags:
+            return
+        events = []
+        with self.lock:
+            state = self._tag(event.tag)
+            tracker = state.angle_trackers.get(event.station)
+            if tracker is None:
+                tracker = state.angle_trackers[event.station] = self.config.smoothing.angle_tracker()
+            angle = SmoothingFilter.smooth_angle(event.azimuth, tracker, self.config.smoothing, event.t)
+            state.azimuth[event.station] = angle
+            state.elevation[event.station] = event.elevation
+            state.rssi[event.station] = event.rssi
+            if self.config.tick_rate:
+                state.dirty = True
+                return
+            events.append(FusionEvent("angle", event.t, (event.tag, event.station), angle, event.tag))
+            self._fuse_tags([(event.tag, state, state.azimuth)], event.t, events)
+            self._update_safe(event.t, events)
+        self._publish(events)
+
+    def _fuse_tags(self, readings: List[Tuple[int, TagState, Dict[int, float]]], t, events):
+        """Locate every (tag, state, azimuth per station) in one batched solve and check presence"""
+        located = self._locate(readings, t)
+        if not located:
+            return
+        xs = [state.x for _, state in located]
+        ys = [state.y for _, state in located]
+        presence = self.zones.contains(xs, ys)[:, self.presence_mask].any(axis=1).tolist()
+        for (tag, state), inside in zip(located, presence):
+            events.append(FusionEvent("tag", t, tag, (state.x, state.y, state.radius), tag))
+            if inside != state.inside:
+                state.inside = inside
+                events.append(FusionEvent("decision", t, "tag_in", inside, tag))
+
+    def _locate(self, readings, t: float) -> List[Tuple[int, TagState]]:
+        """Solve the tag positions from one bearing per anchor, the (tag, state) pairs that got one"""
+        stations = range(1, len(self.config.anchor_poses) + 1)
+        readings = [(tag, state, azimuth) for tag, state, azimuth in readings
+                    if sum(s in azimuth for s in stations) >= 2]
+        if not readings:
+            return []
+        # (T, N) bearings of all tags, solved together
+        mask = np.array([[s in azimuth for s in stations] for _, _, azimuth in readings])
+        azimuth = np.array([[azimuth.get(s, 0.0) for s in stations] for _, _, azimuth in readings])
+        elevation = np.array([[state.elevation.get(s, 0.0) for s in stations] for _, state, _ in readings])
+        rssi = np.array([[state.rssi.get(s, 0.0) for s in stations] for _, state, _ in readings])
+        xs, ys, radii, valid = self.anchor_array.solve_rssi(azimuth, elevation, rssi, mask)
+
+        located = []
+        for (tag, state, _), x, y, radius, ok in zip(readings, xs.tolist(), ys.tolist(), radii.tolist(),
+                                                      valid.tolist()):
+            if not ok:
+                continue
+            state.x, state.y = SmoothingFilter.smooth_position(
+                x, y, state.position_tracker, self.config.smoothing, t, (radius / 2) ** 2)
+            state.radius = radius
+            state.last_update = t
+            located.append((tag, state))
+        return located
+
+    def on_radar(self, event: RadarEvent):
+        if self.config.tick_rate:
+            with self.lock:
+                if event.radar in self.pending_radar:
+                    self.scheduler_stats.radar_frames_skipped += 1
+                self.pending_radar[event.radar] = event
+            return
+        events = []
+        with self.lock:
+            self._merge_radar(event)
+            self._fuse_radar(event.t, events)
+            self._update_safe(event.t, events)
+        self._publish(events)
+
+    def _merge_radar(self, event: RadarEvent):
+        # Ghosts mirror about the sensor's own boresight, so they are removed before the transform
+        xs, ys = filter_ghosts(event.x_coords, event.y_coords)
+        self.radar_merger.add(event.radar, event.t, xs, ys)
+
+    def _fuse_radar(self, t: float, events):
+        """Zone counts, detection and association on the merged world cloud"""
+        xs, ys = self.radar_merger.merged(t)
+        xs, ys = xs.tolist(), ys.tolist()
+        counts = self.zones.count(xs, ys)
+        keepout_counts = counts[self.keepout_mask]
+        points_in_box = int(keepout_counts.max()) if len(keepout_counts) else 0
+        radar = self.radar
+        radar.x_coords, radar.y_coords = xs, ys
+        radar.points_in_box = points_in_box
+        radar.points_in_zone = dict(zip(self.zones.names, counts.tolist()))
+        radar.last_update = t
+        events.append(FusionEvent("radar", t, None, (xs, ys)))
+
+        if not radar.detected and points_in_box >= self.config.radar_points_threshold:
+            radar.detected = True
+            events.append(FusionEvent("decision", t, "radar", True))
+        elif radar.detected and points_in_box <= self.config.radar_release_threshold:
+            radar.detected = False
+            events.append(FusionEvent("decision", t, "radar", False))
+
+        self._associate(xs, ys, t, events)
+
+    def tick(self, t: float) -> bool:
+        """Evaluate the scene at time t from everything received so far, False if nothing changed"""
+        events = []
+        with self.lock:
+            dirty = [(tag, state) for tag, state in self.tags.items() if state.dirty]
+            radar, self.pending_radar = self.pending_radar, {}
+            if not dirty and not radar:
+                return False
+            smoothing = self.config.smoothing
+            readings = []
+            for tag, state in dirty:
+                state.dirty = False
+                azimuth = state.azimuth
+                if smoothing.enable_angle_smoothing:
+                    # Bearings of all anchors brought to the same instant
+                    azimuth = {station: tracker.predict(t, smoothing.max_extrapolation)
+                               for station, tracker in state.angle_trackers.items()}
+                for station, angle in azimuth.items():
+                    events.append(FusionEvent("angle", t, (tag, station), angle, tag))
+                readings.append((tag, state, azimuth))
+            if readings:
+                self._fuse_tags(readings, t, events)
+            if radar:
+                for event in radar.values():
+                    self._merge_radar(event)
+                self._fuse_radar(max(event.t for event in radar.values()), events)
+            self._update_safe(t, events)
+        self._publish(events)
+        return True
+
+    def _associate(self, xs, ys, t, events):
+        """Match radar objects to the tags' positions at the radar frame time"""
+        radar = self.radar
+        objects = cluster_points(xs, ys)
+        if objects:
+            in_keepout = self.zones.contains([o.x for o in objects], [o.y for o in objects])[:, self.keepout_mask].any(axis=1)
+            for obj, inside in zip(objects, in_keepout):
+                obj.in_keepout = bool(inside)
+
+        tags = {}
+        for tag, state in self.tags.items():
+            if state.last_update is None or t - state.last_update > self.config.smoothing.max_track_gap:
+                continue
+            position = self.predict_tag(tag, t) or (state.x, state.y)
+            tags[tag] = (position[0], position[1], state.radius)
+        radar.objects = associate(objects, tags)
+        events.append(FusionEvent("objects", t, None, radar.objects))
+
+        intruder = any(o.in_keepout and o.tag is None for o in radar.objects)
+        if intruder != radar.intruder:
+            radar.intruder = intruder
+            events.append(FusionEvent("decision", t, "intruder", intruder))
+
+    def tag_velocity(self, tag: int) -> Optional[Tuple[float, float]]:
+        """Tag velocity in m/s from its tracker, None if unknown"""
+        state = self.tags.get(tag)
+        if state is None or not self.config.smoothing.enable_position_smoothing:
+            return None
+        return state.position_tracker.x.rate, state.position_tracker.y.rate
+
+    def predict_tag(self, tag: int, t: float) -> Optional[Tuple[float, float]]:
+        """Tag position extrapolated to time t by its tracker, None if unknown"""
+        state = self.tags.get(tag)
+        if state is None or not self.config.smoothing.enable_position_smoothing:
+            return None
+        return state.position_tracker.predict(t, self.config.smoothing.max_extrapolation)
+
+
+def filter_ghosts(x_coords, y_coords):
+    """Drop points near y=0 that have a mirror image across x=0 (radar multipath ghosts)"""
+    xs = np.asarray(x_coords, dtype=float)
+    ys = np.asarray(y_coords, dtype=float)
+    near = np.abs(ys) < GHOST_Y
+    near_x = np.sort(xs[near])
+    # Mirror partners of each point among the near-axis points, found by binary search
+    partners = (np.searchsorted(near_x, -xs + GHOST_X, side='left')
+                - np.searchsorted(near_x, -xs - GHOST_X, side='right'))
+    partners -= near & (np.abs(2 * xs) < GHOST_X)  # a point close to x=0 mirrors itself
+    keep = ~(near & (partners > 0))
+    return xs[keep].tolist(), ys[keep].tolist()
+
+
+def run_radar(engine: FusionEngine, stop_event: Event, radar: int = 0):
+    """Reader of one radar process; start one per entry of radar_poses"""
+    parser = ParsedDataRadar()
+    process = subprocess.Popen(
+        ['python', '-u', './radar/rad.py', '--radar', str(radar)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1
+    )
+    try:
+        for line in process.stdout:
+            if stop_event.is_set():
+                break
+            line = line.strip()
+            if "Connected" in line:
+                print("Radar configured succesfully")
+                continue
+            if line:
+                if parser.parse_string(line):
+                    received = time.monotonic()
+                    t = engine.timebase.align_radar(parser.time_cpu_cycles, received, radar)
+                    engine.on_radar(RadarEvent(t, parser.frame_number, parser.x_coords, parser.y_coords,
+                                               parser.time_cpu_cycles, received, radar))
+    finally:
+        traceback.print_exc()
+        process.terminate()
+        process.wait()
+
+
+def run_ble(engine: FusionEngine, stop_event: Event, ble_args=()):
+    process = subprocess.Popen(
+        ['python', '-u', './ble/ble.py', *ble_args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1
+    )
+    try:
+        while not stop_event.is_set():
+            stdout_line = process.stdout.readline()
+            if not stdout_line:
+                break
+            if "Station" in stdout_line:
+                parsed_data = parse_string(stdout_line)
+                if parsed_data:
+                    received = time.monotonic()
+                    t = engine.timebase.align_ble(parsed_data.station, parsed_data.timestamp, received)
+                    engine.on_ble(BleEvent(t, parsed_data.station, parsed_data.tag, parsed_data.rssi,
+                                           parsed_data.azimuth, parsed_data.elevation,
+                                           parsed_data.timestamp, received))
+    finally:
+        traceback.print_exc()
+        process.terminate()
+        process.wait()
+
+
+def run_scheduler(engine: FusionEngine, stop_event: Event):
+    """Call engine.tick at engine.config.tick_rate until stopped; late ticks are dropped, not bunched"""
+    period = 1.0 / engine.config.tick_rate
+    stats = engine.scheduler_stats
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        now = time.monotonic()
+        if now < next_tick:
+            stop_event.wait(next_tick - now)
+            continue
+        if now - next_tick > period:
+            stats.overruns += 1
+            next_tick = now
+        start = time.monotonic()
+        if engine.tick(next_tick):
+            stats.last_duration = time.monotonic() - start
+            stats.max_duration = max(stats.max_duration, stats.last_duration)
+        else:
+            stats.idle += 1
+        stats.ticks += 1
+        next_tick += period
+
+
+SHM_SLOTS = 1024
+SHM_POLL_INTERVAL = 0.0005  # seconds the reader sleeps when its ring is empty
+
+
+def _drain_ring(ring: ShmRing, process, stop_event: Event, handle):
+    """Feed every record of the ring to handle until stopped or the producer exits"""
+    while not stop_event.is_set():
+        view = ring.peek()
+        if view is None:
+            if process.poll() is not None:
+                break
+            time.sleep(SHM_POLL_INTERVAL)
+            continue
+        try:
+            handle(view)
+        finally:
+            view.release()
+            ring.advance()
+
+
+def run_radar_shm(engine: FusionEngine, stop_event: Event, radar: int = 0):
+    """run_radar over a shared-memory ring instead of JSON lines on a pipe"""
+    ring = ShmRing.create(SHM_SLOTS, RADAR_SLOT_SIZE)
+    process = subprocess.Popen(['python', '-u', './radar/rad.py', '--radar', str(radar), '--shm', ring.name])
+
+    def handle(view):
+        received, frame_number, cpu_cycles, xs, ys = unpack_radar(view)
+        t = engine.timebase.align_radar(cpu_cycles, received, radar)
+        engine.on_radar(RadarEvent(t, frame_number, xs.tolist(), ys.tolist(), cpu_cycles, received, radar))
+
+    try:
+        _drain_ring(ring, process, stop_event, handle)
+    finally:
+        traceback.print_exc()
+        process.terminate()
+        process.wait()
+        ring.close()
+
+
+def run_ble_shm(engine: FusionEngine, stop_event: Event, ble_args=()):
+    """run_ble over a shared-memory ring instead of formatted lines on a pipe"""
+    ring = ShmRing.create(SHM_SLOTS, BLE_SLOT_SIZE)
+    process = subprocess.Popen(['python', '-u', './ble/ble.py', *ble_args, '--shm', ring.name])
+
+    def handle(view):
+        received, station, tag, rssi, azimuth, elevation, timestamp = BLE_RECORD.unpack_from(view)
+        t = engine.timebase.align_ble(station, timestamp, received)
+        engine.on_ble(BleEvent(t, station, tag, rssi, azimuth, elevation, timestamp, received))
+
+    try:
+        _drain_ring(ring, process, stop_event, handle)
+    finally:
+        traceback.print_exc()
+        process.terminate()
+        process.wait()
+        ring.close()
+
+
+def print_decisions(event: FusionEvent):
+    if event.kind == "decision":
+        name = f"tag {event.tag} in" if event.key == "tag_in" else event.key
+        print(f"{event.t:.3f} {name}: {'ON' if event.value else 'off'}")
+
+
+def main():
+    anchor1_dist = -1.8
+    engine = FusionEngine(FusionConfig(anchor_poses=[
+        AnchorPose(x=anchor1_dist, y=0),
+        AnchorPose(x=-anchor1_dist, y=0),
+    ], tick_rate=FUSION_TICK_RATE))
+    engine.subscribe(print_decisions)
+
+    stop_event = Event()
+    threads = [Thread(target=run_ble, args=(engine, stop_event)),
+               Thread(target=run_scheduler, args=(engine, stop_event))]
+    threads += [Thread(target=run_radar, args=(engine, stop_event, radar))
+                for radar in range(len(radar_poses(engine.config)))]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print("Exiting...")
+        stop_event.set()
+
+
+if __name__ == "__main__":
+    main()
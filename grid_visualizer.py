@@ -1,10 +1,32 @@
 import tkinter as tk
 from threading import Lock
+from collections import OrderedDict, deque
+from itertools import cycle
 from math import cos, sin, radians
-from queue import Queue
+from channels import BoundedChannel, COALESCE
 from dataclasses import dataclass
+import os
 import threading
+import time
 import colorsys
+import numpy as np
+
+ITEM_POOL_SIZE = 256  # hidden canvas items kept per kind for reuse
+POINT_CLOUD_MAX = 1024  # canvas items per point cloud layer, further points are not drawn
+GRID_COLOR = "#333333"  # gray20
+BORDER_COLOR = "#ffffff"
+MIN_GRID_PIXELS = 25  # closest grid line spacing before the step grows (1, 2, 5, 10 m ...)
+BACKGROUND_CACHE_SIZE = 8  # rendered backgrounds kept, zooming back and forth reuses them
+FRAME_INTERVAL_MS = 16  # target tick period
+FRAME_BUDGET_MS = 8  # drawing work per tick, the rest of the period is left to Tk
+MAX_FRAME_INTERVAL_MS = 100  # longest tick period the scheduler backs off to under load
+DRAIN_CHUNK = 32  # draw commands applied between budget checks
+RENDER_SAMPLES = 240  # tick durations kept for the p95
+OVERLAY_PERIOD = 0.25  # seconds between overlay refreshes
+TEXT_SIZE_CACHE_SIZE = 512  # measured (text, font size) pairs kept
+MIN_ZOOM = 0.25
+MAX_ZOOM = 50.0
+ZOOM_STEP = 1.25  # per mouse wheel notch
 
 # [Previous dataclass definitions remain the same...]
 @dataclass
@@ -50,6 +72,42 @@ class VisualSquare:
     id: int = None
     text_id: int = None
 
+@dataclass
+class VisualPointCloud:
+    layer: str
+    xs: np.ndarray  # meters
+    ys: np.ndarray  # meters
+    colors: object = "white"  # one color for all points, or one per point
+    radius_pixels: float = 3
+
+@dataclass
+class VisualRasterLayer:
+    layer: str
+    rgba: np.ndarray  # (rows, cols, 4) uint8, row 0 at the top, alpha blends over the canvas background
+    x: float  # meters, left edge
+    y: float  # meters, bottom edge
+    width: float  # meters
+    height: float  # meters
+
+@dataclass
+class UpdateStats:
+    requested: int = 0  # add/update/remove calls
+    coalesced: int = 0  # calls folded into a pending update of the same object
+    applied: int = 0  # updates drawn
+    ticks: int = 0
+    last_tick: int = 0  # updates drawn by the last tick
+    max_tick: int = 0
+
+@dataclass
+class RenderStats:
+    fps: float = 0.0  # ticks per second over the last OVERLAY_PERIOD or longer
+    interval_ms: float = FRAME_INTERVAL_MS  # current adaptive tick period
+    last_ms: float = 0.0  # duration of the last tick
+    p95_ms: float = 0.0
+    max_ms: float = 0.0
+    backlog: int = 0  # draw commands left pending by the last tick
+    deferred: int = 0  # ticks that ran out of budget with commands pending
+
 @dataclass
 class VisualRectangle:
     x: float
@@ -66,7 +124,9 @@ class VisualRectangle:
 class GridVisualizer:
     def __init__(self, width_meters, height_meters, background_ui="black", 
                  background_canvas="black", pixels_per_meter=50, margin_pixels=100,
-                 default_text_size=12):
+                 default_text_size=12, command_queue_size=512, frame_interval_ms=FRAME_INTERVAL_MS,
+                 frame_budget_ms=FRAME_BUDGET_MS, show_overlay=False, wakeup=False,
+                 backend="tk", frame_output=None, frame_rate=10):
         self.width_meters = width_meters
         self.height_meters = height_meters
         self.pixels_per_meter = pixels_per_meter
@@ -85,93 +145,110 @@ class GridVisualizer:
         self.grid_x_offset = margin_pixels
         self.grid_y_offset = margin_pixels
         
-        self.command_queue = Queue()
+        # Dirty set of objects: the channel holds one pending command per object (keyed
+        # by id(obj)) and the object itself carries its latest state, so however often
+        # an object is updated between two ticks, it is drawn once with that state.
+        # Producers never wait for room: when the channel is full an update is dropped
+        # (the object is drawn on its next update), while adding and removing objects
+        # is forced in over capacity, so a banner can neither stall nor stay behind
+        self.command_queue = BoundedChannel("draw", command_queue_size, COALESCE)
+        self.update_stats = UpdateStats()
+        # Render scheduler: each tick applies draw commands until frame_budget_ms is
+        # spent and leaves the rest pending; the tick period stretches while ticks run
+        # over budget and relaxes back to frame_interval_ms once they fit again
+        self.frame_interval_ms = frame_interval_ms
+        self.frame_budget_ms = frame_budget_ms
+        self.render_stats = RenderStats(interval_ms=frame_interval_ms)
+        self._render_times = deque(maxlen=RENDER_SAMPLES)
+        self._fps_ticks = 0
+        self._fps_since = time.perf_counter()
+        self.show_overlay = show_overlay
+        self._overlay = VisualText(0, 0, "", color="white")
+        self._overlay_due = False
+        self.channels = [self.command_queue]
+        self.tk_thread = threading.current_thread()
         self.lock = Lock()
         self.points = {}
         self.lines = {}
         self.texts = {}
         self.squares = {}
         self.rectangles = {}
-        
-        # Initialize Tkinter
-        self.root = tk.Tk()
+        # Retained canvas items: item id -> (kind, coords, options) as last drawn, and
+        # hidden items of removed objects kept per kind for reuse
+        self._items = {}
+        self._pool = {"oval": [], "line": [], "rectangle": [], "text": []}
+        # Point cloud layers: layer -> oval item ids, grown up to POINT_CLOUD_MAX and
+        # never shrunk; items past the current frame's point count are hidden
+        self.point_clouds = {}
+        self._text_sizes = OrderedDict()  # (text, font size) -> (width, height) pixels
+        self._measure_id = None
+        self.point_cloud_visible = {}
+        self.tick_callbacks = []
+        self.scene_listeners = []
+        
+        # Initialize Tkinter, or the offscreen raster backend with the same canvas interface
+        self.backend = backend
+        if backend == "raster":
+            from raster_canvas import HeadlessRoot
+            self.root = HeadlessRoot()
+        elif backend == "tk":
+            self.root = tk.Tk()
+        else:
+            raise ValueError(f"unknown GridVisualizer backend {backend!r}")
         self.root.configure(bg=background_ui)
-        
-        self.canvas = tk.Canvas(
-            self.root,
-            width=self.canvas_width,
-            height=self.canvas_height,
-            bg=background_canvas,
-            highlightthickness=0
-        )
+
+        # Wakeup mode: instead of polling every frame_interval_ms, a tick is scheduled
+        # when a producer signals new work (one byte on a self-pipe watched by Tk, or a
+        # <<Wake>> virtual event where Tk has no file handlers). Ticks stay at least
+        # frame_interval_ms apart and the loop sleeps when nothing changes.
+        self.wakeup = wakeup
+        self._tick_id = None  # after() id of the scheduled tick
+        self._last_tick = 0.0
+        self._wake_signalled = False
+        self._wake_fds = None
+        if wakeup:
+            if hasattr(self.root.tk, "createfilehandler"):
+                self._wake_fds = os.pipe()
+                os.set_blocking(self._wake_fds[0], False)
+                os.set_blocking(self._wake_fds[1], False)
+                self.root.tk.createfilehandler(self._wake_fds[0], tk.READABLE, self._on_wake_pipe)
+            else:
+                self.root.bind("<<Wake>>", lambda event: self._on_wake())
+        
+        if backend == "raster":
+            from raster_canvas import RasterCanvas
+            self.canvas = RasterCanvas(self.canvas_width, self.canvas_height, bg=background_canvas)
+        else:
+            self.canvas = tk.Canvas(
+                self.root,
+                width=self.canvas_width,
+                height=self.canvas_height,
+                bg=background_canvas,
+                highlightthickness=0
+            )
         self.canvas.pack(expand=True, fill='both')
         
-        # Draw grid area with border
-        self.canvas.create_rectangle(
-            self.grid_x_offset,
-            self.grid_y_offset,
-            self.grid_x_offset + self.grid_width_pixels,
-            self.grid_y_offset + self.grid_height_pixels,
-            outline='white',
-            width=2
-        )
-        
-        # Draw grid lines and dimension labels
-        # X-axis labels (horizontal)
-        for x in range(0, self.grid_width_pixels + 1, pixels_per_meter):
-            # Draw vertical grid line
-            self.canvas.create_line(
-                self.grid_x_offset + x,
-                self.grid_y_offset,
-                self.grid_x_offset + x,
-                self.grid_y_offset + self.grid_height_pixels,
-                fill='gray20',
-            )
-            
-            # Add X-axis label
-            x_meters = x / pixels_per_meter - width_meters/2
-            if abs(x_meters) >= 0.001:  # Avoid showing "0" multiple times
-                self.canvas.create_text(
-                    self.grid_x_offset + x,
-                    self.grid_y_offset - 10,
-                    text=f"{x_meters:.1f}",
-                    fill='white',
-                    anchor='s',
-                    font=("Arial", default_text_size)
-                )
-
-        # Y-axis labels (vertical)
-        for y in range(0, self.grid_height_pixels + 1, pixels_per_meter):
-            # Draw horizontal grid line
-            self.canvas.create_line(
-                self.grid_x_offset,
-                self.grid_y_offset + y,
-                self.grid_x_offset + self.grid_width_pixels,
-                self.grid_y_offset + y,
-                fill='gray20'
-            )
-            
-            # Add Y-axis label
-            y_meters = (self.grid_height_pixels - y) / pixels_per_meter
-            if abs(y_meters) >= 0.001:  # Avoid showing "0" multiple times
-                # Left side label
-                self.canvas.create_text(
-                    self.grid_x_offset - 10,
-                    self.grid_y_offset + y,
-                    text=f"{y_meters:.1f}",
-                    fill='white',
-                    anchor='e',
-                    font=("Arial", default_text_size)
-                )
-                # Right side label
-                self.canvas.create_text(
-                    self.grid_x_offset + self.grid_width_pixels + 10,
-                    self.grid_y_offset + y,
-                    text=f"{y_meters:.1f}",
-                    fill='white',
-                    anchor='w',
-                    font=("Arial", default_text_size)
-                )
+        # Viewport: world meters at the left and bottom edge of the grid area, and the
+        # zoom factor on top of pixels_per_meter. Grid lines and the border live in one
+        # cached image per view, grid labels in a small reused set of text items.
+        self.zoom = 1.0
+        self.view_left = -width_meters/2
+        self.view_bottom = 0.0
+        self._view_dirty = True
+        self._drag_start = None
+        self._backgrounds = OrderedDict()  # (zoom, left, bottom) -> PhotoImage
+        self._grid_labels = []
+        self.point_cloud_frames = {}  # layer -> VisualPointCloud last drawn, redrawn when the view changes
+        self.raster_layers = {}  # layer -> (image item id, image, VisualRasterLayer)
+        self.background_canvas = background_canvas
+        self.background_id = self.canvas.create_image(
+            self.grid_x_offset, self.grid_y_offset, anchor='nw')
+        self.canvas.bind("<ButtonPress-1>", self._on_drag_start)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<Double-Button-1>", lambda event: self.reset_view())
+        self.canvas.bind("<MouseWheel>", lambda event: self._on_zoom(event, 1 if event.delta > 0 else -1))
+        self.canvas.bind("<Button-4>", lambda event: self._on_zoom(event, 1))  # X11 wheel
+        self.canvas.bind("<Button-5>", lambda event: self._on_zoom(event, -1))
 
         # Add axis labels
         self.canvas.create_text(
@@ -191,8 +268,19 @@ class GridVisualizer:
             font=("Arial", default_text_size)
         )
             
+        # Rendered frames to files or a pipe (raster backend), frame_rate per second
+        self.frame_writer = None
+        if frame_output is not None:
+            if backend != "raster":
+                raise ValueError("frame_output needs the raster backend")
+            from raster_canvas import FrameWriter
+            self.frame_writer = FrameWriter(frame_output)
+            self.frame_rate = frame_rate
+            
         self.running = True
         self.update()
+        if self.frame_writer is not None and frame_rate:
+            self._write_frame()
 
     def get_contrasting_text_color(self, background_color):
         return "black"
@@ -215,65 +303,347 @@ class GridVisualizer:
         return "black" if luminance > 0.5 else "white"
 
     def meters_to_pixels(self, x_meters, y_meters, use_grid_offset=True):
-        """Convert meters to pixels, with (0,0) at bottom center of grid"""
-        x_pixels = (x_meters + self.width_meters/2) * self.pixels_per_meter
-        y_pixels = self.grid_height_pixels - y_meters * self.pixels_per_meter
-        
-        if use_grid_offset:
-            x_pixels += self.grid_x_offset
-            y_pixels += self.grid_y_offset
-            
+        """
+        Convert meters to canvas pixels through the current viewport, with (0,0) at
+        bottom center of the grid in the default view. Without grid offset the
+        position is relative to the grid area and ignores zoom and pan.
+        """
+        if not use_grid_offset:
+            return ((x_meters + self.width_meters/2) * self.pixels_per_meter,
+                    self.grid_height_pixels - y_meters * self.pixels_per_meter)
+        scale = self.pixels_per_meter * self.zoom
+        x_pixels = self.grid_x_offset + (x_meters - self.view_left) * scale
+        y_pixels = self.grid_y_offset + self.grid_height_pixels - (y_meters - self.view_bottom) * scale
         return x_pixels, y_pixels
 
+    def _visible(self, coords):
+        """Whether a bounding box (x1, y1, x2, y2, ...) reaches into the grid area plus margin"""
+        xs, ys = coords[0::2], coords[1::2]
+        margin = self.margin_pixels
+        return (max(xs) >= self.grid_x_offset - margin
+                and min(xs) <= self.grid_x_offset + self.grid_width_pixels + margin
+                and max(ys) >= self.grid_y_offset - margin
+                and min(ys) <= self.grid_y_offset + self.grid_height_pixels + margin)
+
+    def _grid_step(self):
+        """Grid line spacing in meters: 1, 2, 5, 10, 20, ... whichever keeps lines MIN_GRID_PIXELS apart"""
+        scale = self.pixels_per_meter * self.zoom
+        step = 1
+        for factor in cycle((2, 2.5, 2)):
+            if step * scale >= MIN_GRID_PIXELS:
+                return step
+            step *= factor
+
+    def _render_background(self):
+        """Grid lines and border of the current view as one image, cached per view"""
+        key = (self.zoom, self.view_left, self.view_bottom)
+        image = self._backgrounds.get(key)
+        if image is not None:
+            self._backgrounds.move_to_end(key)
+            return image
+        width, height = self.grid_width_pixels, self.grid_height_pixels
+        if self.backend == "raster":
+            from raster_canvas import RasterImage
+            image = RasterImage(width, height)
+        else:
+            image = tk.PhotoImage(width=width, height=height)
+        scale = self.pixels_per_meter * self.zoom
+        step = self._grid_step()
+        for x_meters in self._grid_values(self.view_left, width / scale, step):
+            x = int(round((x_meters - self.view_left) * scale))
+            if 0 <= x < width:
+                image.put(GRID_COLOR, to=(x, 0, x + 1, height))
+        for y_meters in self._grid_values(self.view_bottom, height / scale, step):
+            y = height - int(round((y_meters - self.view_bottom) * scale))
+            if 0 <= y < height:
+                image.put(GRID_COLOR, to=(0, y, width, y + 1))
+        for box in ((0, 0, width, 2), (0, height - 2, width, height), (0, 0, 2, height), (width - 2, 0, width, height)):
+            image.put(BORDER_COLOR, to=box)
+        self._backgrounds[key] = image
+        if len(self._backgrounds) > BACKGROUND_CACHE_SIZE:
+            self._backgrounds.popitem(last=False)
+        return image
+
+    @staticmethod
+    def _grid_values(start, span, step):
+        first = int(-(-start // step))  # ceil
+        last = int((start + span) // step)
+        return [i * step for i in range(first, last + 1)]
+
+    def _draw_grid_labels(self):
+        scale = self.pixels_per_meter * self.zoom
+        step = self._grid_step()
+        font = ("Arial", self.default_text_size)
+        labels = []  # (x, y, text, anchor)
+        top = self.grid_y_offset
+        for x_meters in self._grid_values(self.view_left, self.grid_width_pixels / scale, step):
+            if abs(x_meters) >= 0.001:  # Avoid showing "0" multiple times
+                x, _ = self.meters_to_pixels(x_meters, 0)
+                labels.append((x, top - 10, f"{x_meters:.1f}", 's'))
+        for y_meters in self._grid_values(self.view_bottom, self.grid_height_pixels / scale, step):
+            if abs(y_meters) >= 0.001:
+                _, y = self.meters_to_pixels(0, y_meters)
+                # Left and right side label
+                labels.append((self.grid_x_offset - 10, y, f"{y_meters:.1f}", 'e'))
+                labels.append((self.grid_x_offset + self.grid_width_pixels + 10, y, f"{y_meters:.1f}", 'w'))
+        while len(self._grid_labels) < len(labels):
+            self._grid_labels.append(None)
+        for i, (x, y, text, anchor) in enumerate(labels):
+            self._grid_labels[i] = self._draw(self._grid_labels[i], "text", (x, y), cull=False,
+                                              text=text, fill='white', anchor=anchor, font=font)
+        for item_id in self._grid_labels[len(labels):]:
+            if item_id is not None:
+                _, coords, options = self._items[item_id]
+                self._draw(item_id, "text", coords, cull=False, **dict(options, state='hidden'))
+
+    def _apply_view(self):
+        """Show the current viewport: cached background, grid labels, every world object moved"""
+        self._view_dirty = False
+        self.canvas.itemconfigure(self.background_id, image=self._render_background())
+        self._draw_grid_labels()
+        for point in list(self.points.values()):
+            self._add_point(point)
+        for line in list(self.lines.values()):
+            self._add_line(line)
+        for square in list(self.squares.values()):
+            self._add_square(square)
+        for rect in list(self.rectangles.values()):
+            self._add_rectangle(rect)
+        for cloud in list(self.point_cloud_frames.values()):
+            self._set_point_cloud(cloud)
+        for _, _, raster in list(self.raster_layers.values()):
+            self._set_raster_layer(raster)
+
+    def _on_drag_start(self, event):
+        self._drag_start = (event.x, event.y)
+
+    def _on_drag(self, event):
+        if self._drag_start is None:
+            return
+        scale = self.pixels_per_meter * self.zoom
+        x0, y0 = self._drag_start
+        self._drag_start = (event.x, event.y)
+        self.view_left -= (event.x - x0) / scale
+        self.view_bottom += (event.y - y0) / scale
+        self._view_dirty = True
+        self.wake()
+
+    def _on_zoom(self, event, direction):
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, self.zoom * ZOOM_STEP ** direction))
+        self.set_view(zoom, anchor=(x, y))
+
     def update(self):
-        while not self.command_queue.empty():
-            cmd, args = self.command_queue.get()
+        self._tick_id = None
+        start = self._last_tick = time.perf_counter()
+        # A callback returning True is still animating and asks for another tick
+        animating = [callback() for callback in self.tick_callbacks]
+
+        # Zoom and pan events only mark the view, it is applied once per tick
+        if self._view_dirty:
             with self.lock:
-                if cmd == 'point':
-                    self._add_point(*args)
-                elif cmd == 'line':
-                    self._add_line(*args)
-                elif cmd == 'text':
-                    self._add_text(*args)
-                elif cmd == 'square':
-                    self._add_square(*args)
-                elif cmd == 'rectangle':
-                    self._add_rectangle(*args)
-                elif cmd == 'remove':
-                    self._remove_object(*args)
-        
-        if self.running:
-            self.root.after(16, self.update)
+                self._apply_view()
+
+        deadline = start + self.frame_budget_ms / 1000
+        applied = 0
+        with self.lock:
+            while True:
+                commands = self.command_queue.drain(DRAIN_CHUNK)
+                for cmd, args in commands:
+                    if cmd == 'point':
+                        self._add_point(*args)
+                    elif cmd == 'line':
+                        self._add_line(*args)
+                    elif cmd == 'text':
+                        self._add_text(*args)
+                    elif cmd == 'square':
+                        self._add_square(*args)
+                    elif cmd == 'rectangle':
+                        self._add_rectangle(*args)
+                    elif cmd == 'cloud':
+                        self._set_point_cloud(*args)
+                    elif cmd == 'raster':
+                        self._set_raster_layer(*args)
+                    elif cmd == 'remove':
+                        self._remove_object(*args)
+                for listener in self.scene_listeners:
+                    listener(commands)
+                applied += len(commands)
+                if len(commands) < DRAIN_CHUNK or time.perf_counter() >= deadline:
+                    break
+            stats = self.update_stats
+            stats.applied += applied
+            stats.ticks += 1
+            stats.last_tick = applied
+            stats.max_tick = max(stats.max_tick, applied)
+            self._schedule_stats(start)
+            if self.show_overlay:
+                self._draw_overlay()
+            elif self._overlay.id is not None:
+                self._erase(self._overlay.id)
+                self._overlay.id = None
+        
+        if not self.running:
+            return
+        if not self.wakeup:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._tick_id = self.root.after(max(1, int(self.render_stats.interval_ms - elapsed_ms)), self.update)
+        elif any(animating) or len(self.command_queue) or self._view_dirty:
+            self._request_tick()
+
+    def _request_tick(self):
+        """Schedule a tick on the Tk thread, no sooner than the tick period after the last one"""
+        if self._tick_id is not None or not self.running:
+            return  # the scheduled tick picks this work up too
+        due_ms = (self._last_tick - time.perf_counter()) * 1000 + self.render_stats.interval_ms
+        self._tick_id = self.root.after(max(0, int(due_ms)), self.update)
+
+    def _on_wake_pipe(self, fd, mask):
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self._on_wake()
+
+    def _on_wake(self):
+        # Cleared before the tick drains, so a signal sent from now on is never lost
+        self._wake_signalled = False
+        self._request_tick()
+
+    def wake(self):
+        """
+        Signal new work for the next tick, from any thread. Draw commands do this
+        themselves; call it after feeding a tick callback through another channel.
+        """
+        if not self.wakeup:
+            return
+        if threading.current_thread() is self.tk_thread:
+            self._request_tick()
+            return
+        if self._wake_signalled:
+            return
+        self._wake_signalled = True
+        if self._wake_fds is not None:
+            try:
+                os.write(self._wake_fds[1], b"w")
+            except BlockingIOError:
+                pass  # pipe full, a wakeup is pending anyway
+        else:
+            self.root.event_generate("<<Wake>>", when="tail")
+
+    def _schedule_stats(self, start):
+        """Record the tick that began at start and adapt the tick period to the load"""
+        now = time.perf_counter()
+        elapsed_ms = (now - start) * 1000
+        stats = self.render_stats
+        self._render_times.append(elapsed_ms)
+        stats.last_ms = elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.backlog = len(self.command_queue)
+        if stats.backlog:
+            stats.deferred += 1
+        if elapsed_ms > self.frame_budget_ms:
+            stats.interval_ms = min(MAX_FRAME_INTERVAL_MS, stats.interval_ms * 1.25)
+        else:
+            stats.interval_ms = max(self.frame_interval_ms, stats.interval_ms * 0.9)
+
+        self._fps_ticks += 1
+        if now - self._fps_since >= OVERLAY_PERIOD:
+            stats.fps = self._fps_ticks / (now - self._fps_since)
+            times = sorted(self._render_times)
+            stats.p95_ms = times[int(0.95 * (len(times) - 1))]
+            self._fps_ticks = 0
+            self._fps_since = now
+            self._overlay_due = True
+
+    def _draw_overlay(self):
+        if not self._overlay_due and self._overlay.id is not None:
+            return
+        self._overlay_due = False
+        stats = self.render_stats
+        self._overlay.text = (f"{stats.fps:4.0f} fps  tick {stats.interval_ms:3.0f} ms  "
+                              f"queue {stats.backlog}  p95 {stats.p95_ms:.1f} ms")
+        overlay = self._overlay
+        overlay.id = self._draw(overlay.id, "text", (8, 8), cull=False, text=overlay.text,
+                                fill=overlay.color, font=("Arial", self.default_text_size), anchor='nw')
+
+    def set_overlay(self, visible):
+        """Show or hide the FPS / queue depth / p95 render time overlay"""
+        self.show_overlay = visible
+        self.wake()
+
+    def get_render_stats(self) -> RenderStats:
+        """Tick rate, period and render time statistics, safe to call from any thread"""
+        with self.lock:
+            return RenderStats(**vars(self.render_stats))
+
+    def _create(self, kind, coords, options):
+        pool = self._pool[kind]
+        if pool:
+            item_id = pool.pop()
+            self.canvas.coords(item_id, *coords)
+            self.canvas.itemconfigure(item_id, **options)
+            self.canvas.tag_raise(item_id)  # stack like a freshly created item
+            return item_id
+        return getattr(self.canvas, f"create_{kind}")(*coords, **options)
+
+    def _draw(self, item_id, kind, coords, cull=True, **options):
+        """
+        Create a canvas item, or move and restyle the existing one: only coordinates
+        and options that differ from the last call reach Tk. With cull, an item outside
+        the view is hidden and left where it was. Returns the item id.
+        """
+        coords = tuple(coords)
+        options.setdefault('state', 'normal')
+        previous = self._items.get(item_id) if item_id is not None else None
+        if cull and options['state'] == 'normal' and not self._visible(coords):
+            if previous is not None:
+                coords, options = previous[1], dict(previous[2], state='hidden')
+            else:
+                options['state'] = 'hidden'
+        if previous is None:
+            item_id = self._create(kind, coords, options)
+        else:
+            _, old_coords, old_options = previous
+            if coords != old_coords:
+                self.canvas.coords(item_id, *coords)
+            changed = {k: v for k, v in options.items() if old_options.get(k) != v}
+            if changed:
+                self.canvas.itemconfigure(item_id, **changed)
+        self._items[item_id] = (kind, coords, options)
+        return item_id
+
+    def _erase(self, item_id):
+        """Hide an item and keep it for reuse, or delete it once the pool is full"""
+        entry = self._items.pop(item_id, None) if item_id is not None else None
+        if entry is None:
+            return
+        pool = self._pool[entry[0]]
+        if len(pool) < ITEM_POOL_SIZE:
+            self.canvas.itemconfigure(item_id, state='hidden')
+            pool.append(item_id)
+        else:
+            self.canvas.delete(item_id)
+
+    def _draw_label(self, obj, text, x, y, color, anchor, cull=True):
+        """Create, update or remove the label item of obj (obj.text_id)"""
+        if text:
+            obj.text_id = self._draw(obj.text_id, "text", (x, y), cull=cull, text=text, fill=color,
+                                     font=("Arial", self.default_text_size), anchor=anchor)
+        elif obj.text_id is not None:
+            self._erase(obj.text_id)
+            obj.text_id = None
 
     def _add_point(self, point):
         x_pixels, y_pixels = self.meters_to_pixels(point.x, point.y)
-        
-        if point.id in self.points:
-            self.canvas.delete(self.points[point.id])
-            if point.text_id:
-                self.canvas.delete(point.text_id)
-        
-        point.id = self.canvas.create_oval(
-            x_pixels - point.radius_pixels,
-            y_pixels - point.radius_pixels,
-            x_pixels + point.radius_pixels,
-            y_pixels + point.radius_pixels,
-            fill=point.color,
-            outline=point.color
-        )
-        
-        if point.text:
-            text_color = self.get_contrasting_text_color(point.color)
-            point.text_id = self.canvas.create_text(
-                x_pixels,
-                y_pixels - point.radius_pixels - 5,  # Position text above point
-                text=point.text,
-                fill=text_color,
-                font=("Arial", self.default_text_size),
-                anchor='s'  # Bottom center anchor
-            )
-        
-        self.points[point.id] = point.id
+        r = point.radius_pixels
+        point.id = self._draw(point.id, "oval", (x_pixels - r, y_pixels - r, x_pixels + r, y_pixels + r),
+                              fill=point.color, outline=point.color)
+        # Position text above point, bottom center anchor
+        self._draw_label(point, point.text, x_pixels, y_pixels - r - 5,
+                         self.get_contrasting_text_color(point.color), 's')
+        self.points[point.id] = point
 
     def _calculate_line_endpoint(self, x_start, y_start, angle_rad):
         """
@@ -285,115 +655,82 @@ class GridVisualizer:
         right = self.grid_x_offset + self.grid_width_pixels
         top = self.grid_y_offset
         
-        # First calculate how far the line would go at this angle to reach the top
-        height_pixels = self.grid_height_pixels
-        t_to_top = height_pixels / cos(angle_rad)
-        
-        # Calculate where that would put our x coordinate
-        end_x = x_start + sin(angle_rad) * t_to_top
-        
-        # If that x position is outside grid boundaries, we need to find where we hit the side instead
-        if end_x < left:
-            # Hit left boundary
-            dx = left - x_start
-            t = dx / sin(angle_rad)
-            end_x = left
-            end_y = y_start - t * cos(angle_rad)
-        elif end_x > right:
-            # Hit right boundary
-            dx = right - x_start
-            t = dx / sin(angle_rad)
-            end_x = right
-            end_y = y_start - t * cos(angle_rad)
-        else:
-            # Hit top boundary as originally calculated
-            end_x = x_start + sin(angle_rad) * t_to_top
-            end_y = top  # top of grid
-        
-        return end_x, end_y
+        # Direction in canvas pixels (y grows downwards), t is the distance along it
+        dx, dy = sin(angle_rad), -cos(angle_rad)
+        t = float('inf')
+        if dy < 0:
+            t = (top - y_start) / dy
+        if dx < 0:
+            t = min(t, (left - x_start) / dx)
+        elif dx > 0:
+            t = min(t, (right - x_start) / dx)
+        if t == float('inf') or t < 0:
+            t = 0  # pointing away from the grid area
+        
+        return x_start + dx * t, y_start + dy * t
 
     def _add_line(self, line, text_position_percent=10):
         """
         Add or update a line with text positioned along its length
         text_position_percent: 0-100, where 0 is start of line, 100 is end, 50 is middle
         """
-        x_pixels, _ = self.meters_to_pixels(line.x, 0)
-        y_pixels = self.grid_y_offset + self.grid_height_pixels  # Bottom of grid
+        x_pixels, y_pixels = self.meters_to_pixels(line.x, 0)  # Bottom of grid in the default view
         
         angle_rad = radians(line.angle)
         end_x, end_y = self._calculate_line_endpoint(x_pixels, y_pixels, angle_rad)
         
-        if line.id in self.lines:
-            self.canvas.delete(self.lines[line.id])
-            if line.text_id:
-                self.canvas.delete(line.text_id)
-        
-        line.id = self.canvas.create_line(
-            x_pixels, y_pixels,
-            end_x, end_y,
-            fill=line.color,
-            width=line.thickness
-        )
-        
-        if line.text:
-            # Calculate text position based on percentage
-            text_x = x_pixels + (end_x - x_pixels) * (text_position_percent / 100)
-            text_y = y_pixels + (end_y - y_pixels) * (text_position_percent / 100)
-            
-            text_color = self.get_contrasting_text_color(line.color)
-            line.text_id = self.canvas.create_text(
-                text_x,
-                text_y,
-                text=line.text,
-                fill=text_color,
-                font=("Arial", self.default_text_size),
-                anchor='center'
-            )
+        line.id = self._draw(line.id, "line", (x_pixels, y_pixels, end_x, end_y),
+                             fill=line.color, width=line.thickness)
         
-        self.lines[line.id] = line.id
+        # Calculate text position based on percentage
+        text_x = x_pixels + (end_x - x_pixels) * (text_position_percent / 100)
+        text_y = y_pixels + (end_y - y_pixels) * (text_position_percent / 100)
+        self._draw_label(line, line.text, text_x, text_y,
+                         self.get_contrasting_text_color(line.color), 'center')
+        self.lines[line.id] = line
+
+    def _measure_text(self, text, font_size):
+        """(width, height) in pixels of text in Arial font_size, measured once per (text, size)"""
+        key = (text, font_size)
+        size = self._text_sizes.get(key)
+        if size is not None:
+            self._text_sizes.move_to_end(key)
+            return size
+        # One hidden item kept for measuring instead of a throwaway item per call
+        if self._measure_id is None:
+            self._measure_id = self.canvas.create_text(0, 0, anchor='center', state='hidden')
+        self.canvas.itemconfigure(self._measure_id, text=text, font=("Arial", font_size))
+        bbox = self.canvas.bbox(self._measure_id)
+        size = self._text_sizes[key] = (bbox[2] - bbox[0], bbox[3] - bbox[1]) if bbox else (0, 0)
+        if len(self._text_sizes) > TEXT_SIZE_CACHE_SIZE:
+            self._text_sizes.popitem(last=False)
+        return size
 
     def _add_text(self, text):
         x_pixels, y_pixels = self.meters_to_pixels(text.x, text.y, use_grid_offset=False)
         
-        if text.id in self.texts:
-            self.canvas.delete(self.texts[text.id])
-            if text.background_id:
-                self.canvas.delete(text.background_id)
-        
         # Use custom size if provided, otherwise use default
         font_size = text.text_size if text.text_size is not None else self.default_text_size
         
-        temp_text = self.canvas.create_text(
-            0, 0,
-            text=text.text,
-            anchor='center',
-            font=("Arial", font_size)
-        )
-        bbox = self.canvas.bbox(temp_text)
-        width = bbox[2] - bbox[0]
-        height = bbox[3] - bbox[1]
-        self.canvas.delete(temp_text)
-        
         if text.background:
+            width, height = self._measure_text(text.text, font_size)
             padding = 4
-            text.background_id = self.canvas.create_rectangle(
-                x_pixels - width/2 - padding,
-                y_pixels - height/2 - padding,
-                x_pixels + width/2 + padding,
-                y_pixels + height/2 + padding,
-                fill=text.background,
-                outline=text.background
-            )
+            new_background = text.background_id is None
+            text.background_id = self._draw(
+                text.background_id, "rectangle",
+                (x_pixels - width/2 - padding, y_pixels - height/2 - padding,
+                 x_pixels + width/2 + padding, y_pixels + height/2 + padding),
+                cull=False, fill=text.background, outline=text.background)
+            if new_background and text.id is not None:
+                self.canvas.tag_raise(text.id, text.background_id)  # keep the text readable
+        elif text.background_id is not None:
+            self._erase(text.background_id)
+            text.background_id = None
         
         text_color = self.get_contrasting_text_color(text.background) if text.background else text.color
-        text.id = self.canvas.create_text(
-            x_pixels, y_pixels,
-            text=text.text,
-            fill=text_color,
-            font=("Arial", font_size),
-            anchor='center'
-        )
-        self.texts[text.id] = text.id
+        text.id = self._draw(text.id, "text", (x_pixels, y_pixels), cull=False,
+                             text=text.text, fill=text_color, font=("Arial", font_size), anchor='center')
+        self.texts[text.id] = text
 
     def _add_square(self, square):
         x_pixels, _ = self.meters_to_pixels(square.x, 0)
@@ -403,154 +740,220 @@ class GridVisualizer:
         else:
             _, y_pixels = self.meters_to_pixels(square.x, square.y, use_grid_offset=True)
             
-        if square.id in self.squares:
-            self.canvas.delete(self.squares[square.id])
-            if square.text_id:
-                self.canvas.delete(square.text_id)
-            
-        square.id = self.canvas.create_rectangle(
-            x_pixels - square.size_pixels/2,
-            y_pixels - square.size_pixels/2,
-            x_pixels + square.size_pixels/2,
-            y_pixels + square.size_pixels/2,
-            fill=square.color,
-            outline=square.color
-        )
-        
-        if square.text:
-            text_color = self.get_contrasting_text_color(square.color)
-            square.text_id = self.canvas.create_text(
-                x_pixels,
-                y_pixels,
-                text=square.text,
-                fill=text_color,
-                font=("Arial", self.default_text_size),
-                anchor='center'
-            )
-        
-        self.squares[square.id] = square.id
+        half = square.size_pixels/2
+        # Squares under the grid stay on screen, they only follow the view horizontally
+        square.id = self._draw(square.id, "rectangle",
+                               (x_pixels - half, y_pixels - half, x_pixels + half, y_pixels + half),
+                               cull=not square.relative_to_grid, fill=square.color, outline=square.color)
+        self._draw_label(square, square.text, x_pixels, y_pixels,
+                         self.get_contrasting_text_color(square.color), 'center',
+                         cull=not square.relative_to_grid)
+        self.squares[square.id] = square
 
     def _add_rectangle(self, rect):
         x_pixels, y_pixels = self.meters_to_pixels(rect.x, rect.y)
         
-        if rect.id in self.rectangles:
-            self.canvas.delete(self.rectangles[rect.id])
-            if rect.text_id:
-                self.canvas.delete(rect.text_id)
-        
-        rect.id = self.canvas.create_rectangle(
-            x_pixels - rect.width_pixels/2,
-            y_pixels - rect.height_pixels/2,
-            x_pixels + rect.width_pixels/2,
-            y_pixels + rect.height_pixels/2,
-            fill=rect.fill if rect.fill else "",
-            outline=rect.outline if rect.outline else "",
-            width=rect.outline_width
-        )
-        
-        if rect.text:
-            text_color = self.get_contrasting_text_color(rect.fill) if rect.fill else "black"
-            rect.text_id = self.canvas.create_text(
-                x_pixels,
-                y_pixels,
-                text=rect.text,
-                fill=text_color,
-                font=("Arial", self.default_text_size),
-                anchor='center'
-            )
-        
-        self.rectangles[rect.id] = rect.id
+        half_width, half_height = rect.width_pixels/2, rect.height_pixels/2
+        rect.id = self._draw(rect.id, "rectangle",
+                             (x_pixels - half_width, y_pixels - half_height,
+                              x_pixels + half_width, y_pixels + half_height),
+                             fill=rect.fill if rect.fill else "",
+                             outline=rect.outline if rect.outline else "",
+                             width=rect.outline_width)
+        text_color = self.get_contrasting_text_color(rect.fill) if rect.fill else "black"
+        self._draw_label(rect, rect.text, x_pixels, y_pixels, text_color, 'center')
+        self.rectangles[rect.id] = rect
+
+    def _set_point_cloud(self, cloud):
+        self.point_cloud_frames[cloud.layer] = cloud
+        items = self.point_clouds.setdefault(cloud.layer, [])
+        xs = np.asarray(cloud.xs, dtype=float)[:POINT_CLOUD_MAX]
+        ys = np.asarray(cloud.ys, dtype=float)[:POINT_CLOUD_MAX]
+        n = len(xs)
+        # All pixel coordinates of the frame in one go
+        x_pixels, y_pixels = self.meters_to_pixels(xs, ys)
+        r = cloud.radius_pixels
+        boxes = np.stack([x_pixels - r, y_pixels - r, x_pixels + r, y_pixels + r], axis=-1).tolist()
+        colors = [cloud.colors] * n if isinstance(cloud.colors, str) else list(cloud.colors)
+
+        while len(items) < n:
+            items.append(None)
+        for i in range(n):
+            items[i] = self._draw(items[i], "oval", boxes[i], fill=colors[i], outline=colors[i], state='normal')
+        for i in range(n, self.point_cloud_visible.get(cloud.layer, 0)):
+            _, coords, options = self._items[items[i]]
+            self._draw(items[i], "oval", coords, **dict(options, state='hidden'))
+        self.point_cloud_visible[cloud.layer] = n
+
+    def _background_rgb(self):
+        if self.backend == "raster":
+            from raster_canvas import rgb
+            return np.array(rgb(self.background_canvas) or (0, 0, 0), dtype=float)
+        return np.array([v // 257 for v in self.root.winfo_rgb(self.background_canvas)], dtype=float)
+
+    def _set_raster_layer(self, raster):
+        """Resample raster onto the grid area of the current view, as one image item under the grid"""
+        width, height = self.grid_width_pixels, self.grid_height_pixels
+        if raster.rgba is None:
+            if raster.layer in self.raster_layers:
+                self.canvas.delete(self.raster_layers.pop(raster.layer)[0])
+            return
+        rows, cols = raster.rgba.shape[:2]
+        # World position of every pixel column / row of the grid area, then the raster cell under it
+        scale = self.pixels_per_meter * self.zoom
+        x_meters = self.view_left + (np.arange(width) + 0.5) / scale
+        y_meters = self.view_bottom + (height - np.arange(height) - 0.5) / scale
+        cell_cols = np.floor((x_meters - raster.x) / raster.width * cols).astype(int)
+        cell_rows = np.floor((raster.y + raster.height - y_meters) / raster.height * rows).astype(int)
+        inside_cols = (cell_cols >= 0) & (cell_cols < cols)
+        inside_rows = (cell_rows >= 0) & (cell_rows < rows)
+
+        background = self._background_rgb()
+        pixels = np.empty((height, width, 3), dtype=np.uint8)
+        pixels[:] = background.astype(np.uint8)
+        cells = raster.rgba[cell_rows[inside_rows]][:, cell_cols[inside_cols]].astype(float)
+        alpha = cells[..., 3:] / 255
+        pixels[np.ix_(inside_rows, inside_cols)] = (cells[..., :3] * alpha + background * (1 - alpha)).astype(np.uint8)
+
+        if self.backend == "raster":
+            from raster_canvas import RasterImage
+            image = RasterImage(width, height)
+            image.pixels[..., :3] = pixels
+            image.pixels[..., 3] = 255
+        else:
+            image = tk.PhotoImage(data=b"P6 %d %d 255\n" % (width, height) + pixels.tobytes(), format="PPM")
+        if raster.layer in self.raster_layers:
+            item_id = self.raster_layers[raster.layer][0]
+            self.canvas.itemconfigure(item_id, image=image)
+        else:
+            item_id = self.canvas.create_image(self.grid_x_offset, self.grid_y_offset, anchor='nw', image=image)
+            self.canvas.tag_lower(item_id, self.background_id)  # grid lines stay visible on top
+        self.raster_layers[raster.layer] = (item_id, image, raster)  # Tk needs the image referenced
 
     def _remove_object(self, obj):
         """Internal method to remove an object from the canvas"""
-        if isinstance(obj, VisualPoint):
-            if obj.id in self.points:
-                self.canvas.delete(obj.id)
-                if obj.text_id:
-                    self.canvas.delete(obj.text_id)
-                del self.points[obj.id]
-        elif isinstance(obj, VisualLine):
-            if obj.id in self.lines:
-                self.canvas.delete(obj.id)
-                if obj.text_id:
-                    self.canvas.delete(obj.text_id)
-                del self.lines[obj.id]
-        elif isinstance(obj, VisualText):
-            if obj.id in self.texts:
-                self.canvas.delete(obj.id)
-                if obj.background_id:
-                    self.canvas.delete(obj.background_id)
-                del self.texts[obj.id]
-        elif isinstance(obj, VisualSquare):
-            if obj.id in self.squares:
-                self.canvas.delete(obj.id)
-                if obj.text_id:
-                    self.canvas.delete(obj.text_id)
-                del self.squares[obj.id]
-        elif isinstance(obj, VisualRectangle):
-            if obj.id in self.rectangles:
-                self.canvas.delete(obj.id)
-                if obj.text_id:
-                    self.canvas.delete(obj.text_id)
-                del self.rectangles[obj.id]
+        registry = {VisualPoint: self.points, VisualLine: self.lines, VisualText: self.texts,
+                    VisualSquare: self.squares, VisualRectangle: self.rectangles}.get(type(obj))
+        if registry is not None and registry.get(obj.id) is obj:
+            del registry[obj.id]
+            self._erase(obj.id)
+            # Cleared so that adding the object again takes fresh items, not ones reused by now
+            if isinstance(obj, VisualText):
+                self._erase(obj.background_id)
+                obj.id = obj.background_id = None
+            else:
+                self._erase(obj.text_id)
+                obj.id = obj.text_id = None
+
+    _UPDATE_COMMANDS = {VisualPoint: 'point', VisualLine: 'line', VisualText: 'text',
+                        VisualSquare: 'square', VisualRectangle: 'rectangle'}
+
+    def _queue(self, cmd, obj, key=None, force=False):
+        # Never blocks: callers include the fusion thread delivering safety decisions
+        self.command_queue.put((cmd, (obj,)), key=id(obj) if key is None else key, block=False, force=force)
+        self.wake()
 
     # Public methods
     def add_point(self, x_meters, y_meters, radius_pixels, color, text=""):
         point = VisualPoint(x_meters, y_meters, radius_pixels, color, text)
-        self.command_queue.put(('point', (point,)))
+        self._queue('point', point, force=True)
         return point
 
     def add_line(self, x_meters, y_meters, angle_degrees, color="black", text="", thickness=1):
         line = VisualLine(x_meters, y_meters, angle_degrees, color, text, thickness)
-        self.command_queue.put(('line', (line,)))
+        self._queue('line', line, force=True)
         return line
 
     def add_text(self, x_meters, y_meters, text, color="black", background=None, text_size=None):
         text_obj = VisualText(x_meters, y_meters, text, color, background, text_size)
-        self.command_queue.put(('text', (text_obj,)))
+        self._queue('text', text_obj, force=True)
         return text_obj
 
     def add_square(self, x_meters, y_meters, size_pixels, color, text="", relative_to_grid=True):
         square = VisualSquare(x_meters, y_meters, size_pixels, color, text, relative_to_grid)
-        self.command_queue.put(('square', (square,)))
+        self._queue('square', square, force=True)
         return square
 
     def add_rectangle(self, x_meters, y_meters, width_pixels, height_pixels, 
                      fill=None, outline=None, outline_width=1, text=""):
         rect = VisualRectangle(x_meters, y_meters, width_pixels, height_pixels,
                              fill, outline, outline_width, text)
-        self.command_queue.put(('rectangle', (rect,)))
+        self._queue('rectangle', rect, force=True)
         return rect
 
+    def set_point_cloud(self, layer, xs, ys, colors="white", radius_pixels=3):
+        """
+        Show exactly the points xs, ys (meters, arrays or sequences) on layer, replacing
+        its previous points. A frame is one queued command, a newer frame of the same
+        layer replaces a pending one; the layer's canvas items are reused every frame.
+        """
+        cloud = VisualPointCloud(layer, xs, ys, colors, radius_pixels)
+        self._queue('cloud', cloud, key=('cloud', layer))
+        return cloud
+
+    def set_raster_layer(self, layer, rgba, x_meters, y_meters, width_meters, height_meters):
+        """
+        Show an RGBA image (rows, cols, 4 uint8, top row first) stretched over the world
+        rectangle with bottom left corner x_meters, y_meters, under the grid and all
+        objects; the alpha channel blends it over the canvas background. A newer
+        image of the same layer replaces a pending one, rgba=None removes the layer.
+        """
+        raster = VisualRasterLayer(layer, rgba, x_meters, y_meters, width_meters, height_meters)
+        self._queue('raster', raster, key=('raster', layer))
+        return raster
+
     def update_object(self, obj):
-        """Update any visual object's position or properties"""
-        if isinstance(obj, (VisualPoint, VisualLine, VisualText, VisualSquare, VisualRectangle)):
-            if isinstance(obj, VisualPoint):
-                self.command_queue.put(('point', (obj,)))
-            elif isinstance(obj, VisualLine):
-                self.command_queue.put(('line', (obj,)))
-            elif isinstance(obj, VisualText):
-                self.command_queue.put(('text', (obj,)))
-            elif isinstance(obj, VisualSquare):
-                self.command_queue.put(('square', (obj,)))
-            elif isinstance(obj, VisualRectangle):
-                self.command_queue.put(('rectangle', (obj,)))
+        """
+        Update any visual object's position or properties. Only marks obj dirty: the
+        next tick draws it once with whatever state it has by then.
+        """
+        cmd = self._UPDATE_COMMANDS.get(type(obj))
+        if cmd is not None:
+            self._queue(cmd, obj)
 
     def remove_object(self, obj):
         """Remove a visual object from the canvas"""
-        self.command_queue.put(('remove', (obj,)))
+        self._queue('remove', obj, force=True)
+
+    def get_update_stats(self) -> UpdateStats:
+        """Requested, coalesced and applied object updates, safe to call from any thread"""
+        channel = self.command_queue.snapshot()
+        with self.lock:
+            stats = UpdateStats(**vars(self.update_stats))
+        stats.requested = channel.puts
+        stats.coalesced = channel.coalesced
+        return stats
+
+    def add_channel(self, channel: BoundedChannel):
+        """Include another channel feeding this visualizer in channel_stats()"""
+        self.channels.append(channel)
+
+    def channel_stats(self):
+        """Depth, drop and lag counters of every channel, safe to call from any thread"""
+        return [channel.snapshot() for channel in self.channels]
+
+    def add_tick_callback(self, callback):
+        """Call callback() on the Tk thread at the start of every update tick"""
+        self.tick_callbacks.append(callback)
+
+    def add_scene_listener(self, listener):
+        """
+        Call listener(commands) on the Tk thread with every batch of applied draw
+        commands, (cmd, (obj,)) tuples; it must not block the render tick
+        """
+        self.scene_listeners.append(listener)
 
     def pixels_to_meters_x(self, pixels):
         """
         Convert X pixels (from canvas coordinates) to meters relative to grid center
         """
-        return (pixels - self.grid_x_offset) / self.pixels_per_meter - self.width_meters/2
+        return self.view_left + (pixels - self.grid_x_offset) / (self.pixels_per_meter * self.zoom)
 
     def pixels_to_meters_y(self, pixels):
         """
         Convert Y pixels (from canvas coordinates) to meters relative to grid center
         """
-        return -(pixels - self.grid_y_offset - self.grid_height_pixels) / self.pixels_per_meter
+        return self.view_bottom - (pixels - self.grid_y_offset - self.grid_height_pixels) / (self.pixels_per_meter * self.zoom)
 
     # And a convenience function that does both at once:
     def pixels_to_meters(self, x_pixels, y_pixels):
@@ -561,6 +964,32 @@ class GridVisualizer:
         return (self.pixels_to_meters_x(x_pixels), 
                 self.pixels_to_meters_y(y_pixels))
 
+    def set_view(self, zoom=None, center=None, anchor=None):
+        """
+        Zoom and/or pan the view, applied on the next tick. center is the world point
+        (meters) to put in the middle of the grid area; anchor is a canvas pixel
+        position that keeps showing the same world point while zooming.
+        """
+        zoom = self.zoom if zoom is None else zoom
+        if center is not None:
+            self.view_left = center[0] - self.grid_width_pixels / (2 * self.pixels_per_meter * zoom)
+            self.view_bottom = center[1] - self.grid_height_pixels / (2 * self.pixels_per_meter * zoom)
+        elif anchor is not None:
+            x_meters, y_meters = self.pixels_to_meters(*anchor)
+            self.view_left = x_meters - (anchor[0] - self.grid_x_offset) / (self.pixels_per_meter * zoom)
+            self.view_bottom = y_meters - (self.grid_y_offset + self.grid_height_pixels - anchor[1]) / (self.pixels_per_meter * zoom)
+        self.zoom = zoom
+        self._view_dirty = True
+        self.wake()
+
+    def reset_view(self):
+        """Back to the whole grid at zoom 1"""
+        self.zoom = 1.0
+        self.view_left = -self.width_meters/2
+        self.view_bottom = 0.0
+        self._view_dirty = True
+        self.wake()
+
     def start(self):
         """Start the visualization (must be called from main thread)"""
         if threading.current_thread() is threading.main_thread():
@@ -568,7 +997,24 @@ class GridVisualizer:
         else:
             raise RuntimeError("Visualization must be started from main thread")
 
+    def _write_frame(self):
+        if not self.running or self.frame_writer is None:
+            return
+        self.frame_writer.write(self.render_frame())
+        self.root.after(int(1000 / self.frame_rate), self._write_frame)
+
+    def render_frame(self):
+        """The current scene as a (height, width, 3) uint8 array, raster backend only"""
+        if self.backend != "raster":
+            raise RuntimeError("render_frame needs the raster backend")
+        with self.lock:
+            return self.canvas.render()
+
     def stop(self):
         """Stop the visualization"""
         self.running = False
+        if self._wake_fds is not None:
+            self.root.tk.deletefilehandler(self._wake_fds[0])
+        if self.frame_writer is not None:
+            self.frame_writer.close()
         self.root.quit()
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Occupancy heatmap of accumulated radar detections.
+
+A fixed grid of cells over the site counts detections with exponential decay
+(half_life seconds). Decay is not applied to the whole grid every frame: weights
+are stored relative to a reference time and new detections are added with weight
+exp(rate * (t - t_ref)), so a frame costs O(points) whatever the grid size, and
+the true values are the stored ones times exp(-rate * (now - t_ref)). The
+reference is moved forward once the weights would grow large, which the exponent
+is checked for before exp() is called, so any gap between detections is fine.
+Memory is the grid.
+"""
+from math import ceil, exp, log
+from threading import Lock
+import numpy as np
+
+HALF_LIFE = 120.0  # seconds until a detection counts half
+CELL_SIZE = 0.1  # meters
+RENORMALIZE_AT = 1e12  # largest weight before the reference time moves up
+RENORMALIZE_EXPONENT = log(RENORMALIZE_AT)
+VISIBLE_LEVEL = 0.05  # rendered level (0..1 of the ramp) below which a cell counts as faded
+
+# Color ramp from transparent through dark red and orange to pale yellow
+RAMP = np.array([[0, 0, 0, 0], [120, 0, 0, 150], [220, 40, 0, 200], [255, 160, 0, 230], [255, 255, 170, 255]],
+                dtype=float)
+
+
+class OccupancyHeatmap:
+    def __init__(self, x: float, y: float, width: float, height: float,
+                 cell_size: float = CELL_SIZE, half_life: float = HALF_LIFE):
+        self.x = x  # meters, left edge
+        self.y = y  # meters, bottom edge
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.rows = int(ceil(height / cell_size))
+        self.cols = int(ceil(width / cell_size))
+        self.rate = log(2) / half_life
+        self.lock = Lock()
+        self.weights = np.zeros(self.rows * self.cols)  # row 0 at y, scaled to t_ref
+        self.t_ref = None
+        self.detections = 0
+        self._peak = 0.0  # largest stored weight, an upper bound of the grid maximum
+        positions = np.linspace(0, 1, len(RAMP))
+        self._lut = np.stack([np.interp(np.linspace(0, 1, 256), positions, RAMP[:, c]) for c in range(4)],
+                             axis=-1).astype(np.uint8)
+
+    def add(self, xs, ys, t: float, weight: float = 1.0):
+        """Count the detections xs, ys (meters) seen at time t"""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        cols = np.floor((xs - self.x) / self.cell_size).astype(int)
+        rows = np.floor((ys - self.y) / self.cell_size).astype(int)
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        cells = rows[inside] * self.cols + cols[inside]
+        with self.lock:
+            if self.t_ref is None:
+                self.t_ref = t
+            exponent = self.rate * (t - self.t_ref)
+            if exponent > RENORMALIZE_EXPONENT:
+                # After a long gap exp(-exponent) underflows to zero: the old counts have faded
+                rescale = exp(-exponent)
+                self.weights *= rescale
+                self._peak *= rescale
+                self.t_ref = t
+                exponent = 0.0
+            np.add.at(self.weights, cells, weight * exp(exponent))
+            self.detections += len(cells)
+            if len(cells):
+                self._peak = max(self._peak, self.weights[cells].max())
+
+    def values(self, t: float) -> np.ndarray:
+        """Decayed counts at time t, (rows, cols) with row 0 at the top like an image"""
+        with self.lock:
+            if self.t_ref is None:
+                return np.zeros((self.rows, self.cols))
+            grid = self.weights.reshape(self.rows, self.cols) * exp(-self.rate * (t - self.t_ref))
+        return grid[::-1]
+
+    def peak(self, t: float) -> float:
+        """Upper bound of the largest decayed count at time t, without a pass over the grid"""
+        with self.lock:
+            if self.t_ref is None:
+                return 0.0
+            return self._peak * exp(min(-self.rate * (t - self.t_ref), 0.0))
+
+    def visible(self, t: float, saturation: float) -> bool:
+        """Whether render(t, saturation) still shows anything"""
+        return self.peak(t) >= saturation * VISIBLE_LEVEL ** 2  # render levels are square roots
+
+    def render(self, t: float, saturation: float = None) -> np.ndarray:
+        """(rows, cols, 4) uint8 RGBA of the heatmap at time t, saturating at saturation (default: the maximum)"""
+        grid = self.values(t)
+        top = saturation or grid.max()
+        if top <= 0:
+            return np.zeros((self.rows, self.cols, 4), dtype=np.uint8)
+        # Square root keeps rarely visited cells visible next to busy ones
+        level = np.sqrt(np.clip(grid / top, 0.0, 1.0))
+        return self._lut[(level * 255).astype(np.uint8)]
@@ -46,7 +46,9 @@ def parse_string(input_string):
 
 class ParsedDataRadar:
     def __init__(self):
+        self.radar = 0
         self.frame_number = 0
+        self.time_cpu_cycles = None
         self.num_det_obj = 0
         self.x_coords = []
         self.y_coords = []
@@ -59,7 +61,9 @@ class ParsedDataRadar:
         try:
             data = json.loads(line)
             
+            self.radar = data.get("radar", 0)
             self.frame_number = data["frame_number"]
+            self.time_cpu_cycles = data.get("time_cpu_cycles")
             self.num_det_obj = data["num_det_obj"]
             self.x_coords = data["x_coords"]
             self.y_coords = data["y_coords"]
@@ -96,6 +96,7 @@ def parser_helper(data, readNumBytes):
         @return numDetObj             : the number of detected objects contained in this mmw demo output packet
         @return numTlv                : the number of TLV contained in this mmw demo output packet
         @return subFrameNumber        : the sbuframe index (0,1,2 or 3) of the frame contained in this mmw demo output packet
+        @return timeCpuCycles         : the radar CPU cycle counter when the packet was created
     """
 
     headerStartIndex = -1
@@ -131,7 +132,7 @@ def parser_helper(data, readNumBytes):
     # print("numTlv              = %d" % (numTlv))
     # print("subFrameNumber      = %d" % (subFrameNumber))
 
-    return (headerStartIndex, totalPacketNumBytes, frameNumber, numDetObj, numTlv, subFrameNumber)
+    return (headerStartIndex, totalPacketNumBytes, frameNumber, numDetObj, numTlv, subFrameNumber, timeCpuCycles)
 
 
 def parser_one_mmw_demo_output_packet(data, readNumBytes):
@@ -157,6 +158,7 @@ def parser_one_mmw_demo_output_packet(data, readNumBytes):
         @return detectedElevAngle_array : 1-demension array holds each detected target's elevAngle of the mmw demo output packet
         @return detectedSNR_array     : 1-demension array holds each detected target's snr of the mmw demo output packet
         @return detectedNoise_array   : 1-demension array holds each detected target's noise of the mmw demo output packet
+        @return timeCpuCycles         : the radar CPU cycle counter when the packet was created
     """
 
     headerNumBytes = 40
@@ -176,7 +178,7 @@ def parser_one_mmw_demo_output_packet(data, readNumBytes):
     result = TC_PASS
 
     # call parser_helper() function to find the output packet header start location and packet size
-    (headerStartIndex, totalPacketNumBytes, frameNumber, numDetObj, numTlv, subFrameNumber) = parser_helper(data, readNumBytes)
+    (headerStartIndex, totalPacketNumBytes, frameNumber, numDetObj, numTlv, subFrameNumber, timeCpuCycles) = parser_helper(data, readNumBytes)
 
     if headerStartIndex == -1:
         result = TC_FAIL
@@ -296,5 +298,5 @@ def parser_one_mmw_demo_output_packet(data, readNumBytes):
             # for obj in range(numDetObj):
             #     print("    obj%3d: %12f %12f %12f %12f %12f %12f %12d %12d %12d" % (obj, detectedX_array[obj], detectedY_array[obj], detectedZ_array[obj], detectedV_array[obj], detectedRange_array[obj], detectedAzimuth_array[obj], detectedElevAngle_array[obj], detectedSNR_array[obj], detectedNoise_array[obj]))
 
-    return (result, headerStartIndex, totalPacketNumBytes, frameNumber, numDetObj, numTlv, subFrameNumber, detectedX_array, detectedY_array, detectedZ_array, detectedV_array, detectedRange_array, detectedAzimuth_array, detectedElevAngle_array, detectedSNR_array, detectedNoise_array)
+    return (result, headerStartIndex, totalPacketNumBytes, frameNumber, numDetObj, numTlv, subFrameNumber, detectedX_array, detectedY_array, detectedZ_array, detectedV_array, detectedRange_array, detectedAzimuth_array, detectedElevAngle_array, detectedSNR_array, detectedNoise_array, timeCpuCycles)
 
@@ -1,4 +1,6 @@
 import serial
+import argparse
+import sys
 import re
 import os
 import glob
@@ -9,6 +11,10 @@ from collections import defaultdict, deque
 from radar_interface import RadarInterface
 from radar_ui import RadarUI
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shm_ring import ShmRing, pack_radar
+from discovery import discover_cached
+
 RADAR_CONFIG = "./tdm/profile_2d_3AzimTx.cfg"
 
 CONFIG_FILE = "config.json"
@@ -50,12 +56,12 @@ def parse_cfg_file(file_path):
         return []
 
 
-def configure(port):
+def configure(port, cfg_path=radar_config_path):
     with serial.Serial(port, BAUD_RATE_CON, timeout=con_timeout) as ser:
         ser.reset_input_buffer()  # Flush input buffer
         try:
             # parse the config file
-            config_commands = parse_cfg_file(radar_config_path)
+            config_commands = parse_cfg_file(cfg_path)
             if len(config_commands) == 0: return
 
             config_commands.insert(-2, configDataPort)
@@ -116,30 +122,64 @@ def select_two_ports():
                 print("Enter a valid number.")
     return selected_ports
 
-def load_or_select_ports():
+def load_config():
+    """
+    config.json, either {"ports": [con, dat]} for a single radar or
+    {"radars": [{"ports": [con, dat], "config": "./tdm/....cfg"}, ...]} for several;
+    the old form is returned converted to the new one, other keys are kept
+    """
     if os.path.exists(config_path):
         try:
             with open(config_path, 'r') as f:
                 config = json.load(f)
-                if "ports" in config and len(config["ports"]) == 2:
-                    print("Loaded ports from config:", config["ports"])
-                    return config["ports"]
+                if "radars" not in config:
+                    ports = config.pop("ports", None)
+                    config["radars"] = [{"ports": ports}] if ports else []
+                return config
         except (json.JSONDecodeError, IOError) as e:
             print(f"Error reading config file: {e}")
+    return {"radars": []}
+
+def load_or_select_ports(radar=0):
+    """Ports and .cfg file path of one radar"""
+    config = load_config()
+    radars = config["radars"]
+    if radar < len(radars) and len(radars[radar].get("ports", [])) == 2:
+        entry = radars[radar]
+        print("Loaded ports from config:", entry["ports"])
+        return entry["ports"], os.path.join(radar_dir, entry.get("config", RADAR_CONFIG))
+    cfg_path = radar_config_path
+    if radar < len(radars):
+        cfg_path = os.path.join(radar_dir, radars[radar].get("config", RADAR_CONFIG))
+    discovered = discover_cached().radars()
+    if radar < len(discovered) and discovered[radar][1] is not None:
+        print("Discovered radar ports:", list(discovered[radar]))
+        return list(discovered[radar]), cfg_path
+    if not sys.stdin.isatty():
+        print(f"Discovery found {len(discovered)} radar(s).")
+        return None, cfg_path  # nobody to ask
     selected_ports = select_two_ports()
     if selected_ports:
+        while len(radars) <= radar:
+            radars.append({})
+        radars[radar]["ports"] = selected_ports
         with open(config_path, 'w') as f:
-            json.dump({"ports": selected_ports}, f)
+            json.dump(config, f)
         print("Saved selected ports to config.")
+        return selected_ports, os.path.join(radar_dir, radars[radar].get("config", RADAR_CONFIG))
+    return None, radar_config_path
 
-def print_sensor_data(parsed_data):
+def print_sensor_data(parsed_data, radar=0):
     """
     Takes the sensor data and prints it in a parseable format to stdout
     """
     _, _, _, frame_number, num_det_obj, _, _, detected_x_array, detected_y_array, *_ = parsed_data
+    time_cpu_cycles = parsed_data[-1]
     
     output_data = {
+        "radar": radar,
         "frame_number": frame_number,
+        "time_cpu_cycles": time_cpu_cycles,
         "num_det_obj": num_det_obj,
         "x_coords": detected_x_array,  # Convert numpy array to list if needed
         "y_coords": detected_y_array
@@ -147,12 +187,25 @@ def print_sensor_data(parsed_data):
     
     print(json.dumps(output_data))
 
+def write_sensor_data(ring, parsed_data):
+    """
+    Takes the sensor data and writes it to the fusion process's shared-memory ring
+    """
+    _, _, _, frame_number, _, _, _, detected_x_array, detected_y_array, *_ = parsed_data
+    pack_radar(ring, time.monotonic(), frame_number, detected_x_array, detected_y_array, parsed_data[-1])
+
 def main():
-    selected_ports = load_or_select_ports()
+    parser = argparse.ArgumentParser(description="Radar reader")
+    parser.add_argument("--shm", help="write frames to this shared-memory ring instead of stdout")
+    parser.add_argument("--radar", type=int, default=0, help="index of the radar in config.json")
+    args = parser.parse_args()
+    ring = ShmRing.attach(args.shm) if args.shm else None
+
+    selected_ports, cfg_path = load_or_select_ports(args.radar)
     if selected_ports and len(selected_ports) == 2:
         port1, port2 = selected_ports
         print(f"Using CONSOLE port: {port1} and DATA port: {port2}")
-        configure(port1)
+        configure(port1, cfg_path)
 
         print("Reading data")
         radar = RadarInterface(port=port2, baudrate=BAUD_RATE_DAT)
@@ -167,12 +220,17 @@ def main():
                     # Parse the radar data
                     parsed_results = radar.parse_frame(raw_data)
                     # print(parsed_results)
-                    print_sensor_data(parsed_results)
+                    if ring is not None:
+                        write_sensor_data(ring, parsed_results)
+                    else:
+                        print_sensor_data(parsed_results, args.radar)
                     # radarUI.update(parsed_results)
         except KeyboardInterrupt:
             print("Exiting...")
         finally:
             radar.close()
+            if ring is not None:
+                ring.close()
 
 
 if __name__ == "__main__":
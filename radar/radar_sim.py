@@ -0,0 +1,133 @@
+"""
+Loopback stand-in for a TI mmWave radar running the mmw demo, on two pseudo terminals.
+
+cli_port answers configuration commands like the demo CLI (echo, "Done", the
+mmwDemo:/> prompt); after sensorStart, data_port streams mmw demo packets with
+detected points (TLV type 1). Point rad.py or discovery at these ports instead
+of /dev/ttyACM devices.
+"""
+import math
+import os
+import select
+import struct
+import termios
+import threading
+import time
+import tty
+
+MAGIC = b"\x02\x01\x04\x03\x06\x05\x08\x07"
+PROMPT = "mmwDemo:/>"
+HEADER = struct.Struct("<8sIIIIIIII")  # magic, version, length, platform, frame, cpu cycles, objects, TLVs, subframe
+TLV_HEADER = struct.Struct("<II")
+POINT = struct.Struct("<ffff")  # x, y, z, v
+CPU_HZ = 600e6
+CLI_BAUD = termios.B115200
+
+
+def _pty():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    os.set_blocking(master, False)
+    return master, slave, os.ttyname(slave)
+
+
+class RadarSimulator:
+    def __init__(self, frame_period_ms=100, points=4, streaming=False):
+        self.frame_period_ms = frame_period_ms
+        self.points = points
+        self.streaming = streaming
+        self.commands = []
+        self.cli_master, self.cli_slave, self.cli_port = _pty()
+        self.data_master, self.data_slave, self.data_port = _pty()
+        self._frame = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        for fd in (self.cli_master, self.cli_slave, self.data_master, self.data_slave):
+            os.close(fd)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _write(self, fd, data):
+        try:
+            os.write(fd, data)
+        except BlockingIOError:
+            pass  # nobody is reading
+
+    def _cli_speed_matches(self):
+        return termios.tcgetattr(self.cli_slave)[5] == CLI_BAUD
+
+    def _handle(self, cmd):
+        self.commands.append(cmd)
+        reply = cmd + "\r\n"
+        if cmd == "sensorStart":
+            self.streaming = True
+        elif cmd == "sensorStop":
+            self.streaming = False
+        reply += "Done\r\n"
+        self._write(self.cli_master, (reply + PROMPT).encode())
+
+    def packet(self):
+        t = time.monotonic()
+        points = b"".join(POINT.pack(0.5 * math.sin(t + i), 1.0 + 0.2 * i, 0.0, 0.0) for i in range(self.points))
+        tlv = TLV_HEADER.pack(1, len(points)) + points
+        length = HEADER.size + len(tlv)
+        padding = (-length) % 32
+        header = HEADER.pack(MAGIC, 0x03050004, length + padding, 0xA6843, self._frame,
+                             int(t * CPU_HZ) & 0xFFFFFFFF, self.points, 1, 0)
+        self._frame += 1
+        return header + tlv + bytes(padding)
+
+    def _run(self):
+        buffer = b""
+        next_frame = time.monotonic()
+        while not self._stop.is_set():
+            timeout = max(0.0, next_frame - time.monotonic()) if self.streaming else 0.05
+            ready, _, _ = select.select([self.cli_master], [], [], timeout)
+            if ready:
+                try:
+                    buffer += os.read(self.cli_master, 1024)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    break
+                if not self._cli_speed_matches():
+                    buffer = b""  # host is talking at the wrong rate, the CLI only sees noise
+                buffer = buffer.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                while b"\n" in buffer:
+                    raw, buffer = buffer.split(b"\n", 1)
+                    cmd = raw.decode('utf-8', errors='ignore').strip()
+                    if cmd:
+                        self._handle(cmd)
+                    else:
+                        self._write(self.cli_master, ("\r\n" + PROMPT).encode())
+            if self.streaming and time.monotonic() >= next_frame:
+                self._write(self.data_master, self.packet())
+                next_frame += self.frame_period_ms / 1000.0
+            elif not self.streaming:
+                next_frame = time.monotonic()
+
+
+def main():
+    with RadarSimulator() as sim:
+        print(f"Simulated radar: CLI {sim.cli_port}, data {sim.data_port}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Exiting...")
+
+
+if __name__ == "__main__":
+    main()
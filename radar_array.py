@@ -0,0 +1,110 @@
+"""
+Several radars merged into one world point cloud.
+
+Every radar has a RadarPose in world coordinates (the anchor / tag frame, the
+same one AnchorPose uses). Its rotation and translation are precomputed once, so
+moving a frame into the world is a single (N, 2) @ (2, 2) product plus an add.
+CloudMerger keeps the newest world frame of every radar and joins those that are
+recent relative to each other into one cloud.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+MERGE_WINDOW = 0.15  # seconds, frames older than this relative to the newest are left out
+
+
+@dataclass
+class RadarPose:
+    x: float = 0.0  # meters
+    y: float = 0.0  # meters
+    yaw: float = 0.0  # degrees, same convention as azimuth (0° faces +Y, 90° faces +X)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(float(data.get("x", 0.0)), float(data.get("y", 0.0)), float(data.get("yaw", 0.0)))
+
+
+class RadarExtrinsics:
+    """Sensor -> world transform of one radar (sensor X right, Y along the boresight)"""
+
+    def __init__(self, pose: RadarPose):
+        self.pose = pose
+        yaw = np.radians(pose.yaw)
+        # Clockwise rotation seen from above, matching the azimuth convention; applied to row vectors
+        self.rotation = np.array([[np.cos(yaw), -np.sin(yaw)],
+                                  [np.sin(yaw), np.cos(yaw)]])
+        self.translation = np.array([pose.x, pose.y])
+
+    def to_world(self, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        points = np.stack([np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)], axis=-1)
+        world = points @ self.rotation + self.translation
+        return world[:, 0], world[:, 1]
+
+
+@dataclass
+class RadarFrame:
+    t: float
+    xs: np.ndarray  # world coordinates
+    ys: np.ndarray
+
+
+class CloudMerger:
+    def __init__(self, poses: List[RadarPose], window: float = MERGE_WINDOW):
+        self.extrinsics = [RadarExtrinsics(pose) for pose in poses]
+        self.window = window
+        self.frames: Dict[int, RadarFrame] = {}
+
+    def add(self, radar: int, t: float, xs, ys) -> RadarFrame:
+        """Store the newest frame of radar, given in its sensor coordinates"""
+        wx, wy = self.extrinsics[radar].to_world(xs, ys)
+        frame = self.frames[radar] = RadarFrame(t, wx, wy)
+        return frame
+
+    def merged(self, t: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """All frames within window of t (default: the newest frame) as one world cloud"""
+        if not self.frames:
+            return np.zeros(0), np.zeros(0)
+        if t is None:
+            t = max(frame.t for frame in self.frames.values())
+        frames = [frame for frame in self.frames.values() if t - frame.t <= self.window]
+        if len(frames) == 1:
+            return frames[0].xs, frames[0].ys
+        return np.concatenate([f.xs for f in frames]), np.concatenate([f.ys for f in frames])
+
+
+def benchmark(radar_counts=(1, 2, 4, 8), points=64, frames=200, tick_rate=20.0):
+    """
+    Fusion cost per tick with N simulated radars around the site, each delivering a
+    frame of points per tick (the per-radar reading and parsing runs in its own
+    rad.py process and is not part of this)
+    """
+    import time
+    from fusion import FusionEngine, FusionConfig, RadarEvent
+    from triangulation import AnchorPose
+
+    rng = np.random.default_rng(0)
+    print(f"{'radars':>6} {'points':>7} {'ms/tick':>8} {'us/radar':>9}")
+    for count in radar_counts:
+        poses = [RadarPose(x=3 * np.sin(2 * np.pi * i / count), y=3 - 3 * np.cos(2 * np.pi * i / count),
+                           yaw=360.0 * i / count) for i in range(count)]
+        engine = FusionEngine(FusionConfig([AnchorPose(-1.8, 0), AnchorPose(1.8, 0)], radar_poses=poses,
+                                           tick_rate=tick_rate))
+        # A few targets per frame: clusters of points in front of each sensor
+        clouds = [(rng.normal(rng.uniform(-1, 1, points // 8).repeat(8), 0.1),
+                   rng.normal(rng.uniform(1, 4, points // 8).repeat(8), 0.1)) for _ in range(16)]
+        elapsed = 0.0
+        for frame in range(frames):
+            t = frame / tick_rate
+            for radar in range(count):
+                xs, ys = clouds[(frame + radar) % len(clouds)]
+                engine.on_radar(RadarEvent(t, frame, xs.tolist(), ys.tolist(), radar=radar))
+            start = time.perf_counter()
+            engine.tick(t)
+            elapsed += time.perf_counter() - start
+        per_tick = elapsed / frames
+        print(f"{count:>6} {count * points:>7} {per_tick * 1e3:>8.2f} {per_tick / count * 1e6:>9.0f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,451 @@
+"""
+Offscreen stand-ins for the Tk root and canvas used by GridVisualizer.
+
+RasterCanvas keeps the canvas items GridVisualizer creates (ovals, lines,
+rectangles, text, images) in stacking order and rasterizes them into a NumPy
+RGB buffer on render(); HeadlessRoot runs the after() timers and file handlers
+without a display. With GridVisualizer(backend="raster") the whole public API
+works on a server, and FrameWriter streams the rendered frames:
+
+    frames/%06d.ppm   one PPM (or PNG with Pillow) file per frame
+    session.rgb       raw RGB24 frames appended to a file or named pipe
+    -                 raw RGB24 frames on stdout, e.g. into
+                      ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -i - out.mp4
+
+Text is drawn with Pillow when it is installed and left out otherwise.
+"""
+import heapq
+import itertools
+import os
+import select
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+
+try:
+    from PIL import Image, ImageColor, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+# X11 colors used by the UI, looked up without a Tk to ask
+COLORS = {
+    "black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0), "green": (0, 255, 0),
+    "blue": (0, 0, 255), "yellow": (255, 255, 0), "cyan": (0, 255, 255), "magenta": (255, 0, 255),
+    "gray": (190, 190, 190), "grey": (190, 190, 190), "orange": (255, 165, 0), "orangered": (255, 69, 0),
+    "gold": (255, 215, 0), "turquoise": (64, 224, 208), "dodgerblue": (30, 144, 255),
+    "firebrick1": (255, 48, 48), "green2": (0, 238, 0), "green3": (0, 205, 0), "red2": (238, 0, 0),
+    "cyan2": (0, 238, 238), "purple1": (155, 48, 255), "hotpink1": (255, 110, 180),
+}
+TEXT_WIDTH = 0.6  # estimated glyph width per point of font size, without Pillow
+TEXT_HEIGHT = 1.2  # line height per point of font size
+
+_unknown_colors = set()
+
+
+def rgb(color) -> Optional[tuple]:
+    """(r, g, b) of a Tk color name or #rgb / #rrggbb, None for no color"""
+    if not color:
+        return None
+    if color.startswith("#"):
+        digits = color[1:]
+        step = len(digits) // 3
+        return tuple(int(digits[i * step:(i + 1) * step], 16) * 255 // (16 ** step - 1) for i in range(3))
+    name = color.replace(" ", "").lower()
+    if name in COLORS:
+        return COLORS[name]
+    for prefix in ("gray", "grey"):
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            level = round(int(name[len(prefix):]) * 2.55)
+            return (level, level, level)
+    if Image is not None:
+        try:
+            return ImageColor.getrgb(color)[:3]
+        except ValueError:
+            pass
+    if color not in _unknown_colors:
+        _unknown_colors.add(color)
+        print(f"Raster canvas: unknown color {color!r}, drawn white")
+    return (255, 255, 255)
+
+
+class RasterImage:
+    """tk.PhotoImage replacement: an RGBA buffer filled with put(color, to=box)"""
+
+    def __init__(self, width, height):
+        self.pixels = np.zeros((height, width, 4), dtype=np.uint8)  # transparent
+
+    def put(self, color, to):
+        x1, y1, x2, y2 = to
+        self.pixels[y1:y2, x1:x2] = rgb(color) + (255,)
+
+    def width(self):
+        return self.pixels.shape[1]
+
+    def height(self):
+        return self.pixels.shape[0]
+
+
+@dataclass
+class RasterItem:
+    kind: str
+    coords: List[float]
+    options: Dict = field(default_factory=dict)
+
+
+class RasterCanvas:
+    """The subset of tk.Canvas GridVisualizer uses, rendered with NumPy"""
+
+    def __init__(self, width, height, bg="black"):
+        self.width = width
+        self.height = height
+        self.bg = rgb(bg)
+        self.items: Dict[int, RasterItem] = {}  # insertion order is the stacking order
+        self._ids = itertools.count(1)
+        self._fonts = {}
+
+    def _create(self, kind, coords, options):
+        item_id = next(self._ids)
+        self.items[item_id] = RasterItem(kind, list(coords), dict(options))
+        return item_id
+
+    def create_oval(self, *coords, **options):
+        return self._create("oval", coords, options)
+
+    def create_line(self, *coords, **options):
+        return self._create("line", coords, options)
+
+    def create_rectangle(self, *coords, **options):
+        return self._create("rectangle", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create("text", coords, options)
+
+    def create_image(self, *coords, **options):
+        return self._create("image", coords, options)
+
+    def coords(self, item_id, *coords):
+        if not coords:
+            return list(self.items[item_id].coords)
+        self.items[item_id].coords = list(coords)
+
+    def itemconfigure(self, item_id, **options):
+        self.items[item_id].options.update(options)
+
+    def tag_raise(self, item_id, above=None):
+        item = self.items.pop(item_id)
+        if above is None:
+            self.items[item_id] = item
+            return
+        order = list(self.items.items())
+        index = next(i for i, (other, _) in enumerate(order) if other == above) + 1
+        order.insert(index, (item_id, item))
+        self.items = dict(order)
+
+    def tag_lower(self, item_id, below=None):
+        item = self.items.pop(item_id)
+        order = list(self.items.items())
+        index = 0 if below is None else next(i for i, (other, _) in enumerate(order) if other == below)
+        order.insert(index, (item_id, item))
+        self.items = dict(order)
+
+    def delete(self, item_id):
+        self.items.pop(item_id, None)
+
+    def bbox(self, item_id):
+        item = self.items[item_id]
+        if item.kind != "text":
+            xs, ys = item.coords[0::2], item.coords[1::2]
+            return (min(xs), min(ys), max(xs), max(ys))
+        width, height = self._text_size(item.options.get("text", ""), item.options.get("font"))
+        left, top = self._text_origin(item, width, height)
+        return (left, top, left + width, top + height)
+
+    # Tk widget methods without an offscreen meaning
+    def pack(self, *args, **kwargs):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def canvasx(self, x):
+        return x
+
+    def canvasy(self, y):
+        return y
+
+    # Text
+    def _font(self, font):
+        size = int(font[1]) if font else 12
+        if size not in self._fonts:
+            try:
+                self._fonts[size] = ImageFont.truetype("DejaVuSans.ttf", size)
+            except OSError:
+                self._fonts[size] = ImageFont.load_default()
+        return self._fonts[size]
+
+    def _text_size(self, text, font):
+        if Image is not None and text:
+            left, top, right, bottom = self._font(font).getbbox(text)
+            return int(right - min(left, 0)), int(bottom - min(top, 0))
+        size = int(font[1]) if font else 12
+        return int(TEXT_WIDTH * size * len(text)), int(TEXT_HEIGHT * size)
+
+    @staticmethod
+    def _text_origin(item, width, height):
+        x, y = item.coords[:2]
+        anchor = item.options.get("anchor", "center")
+        anchor = "" if anchor == "center" else anchor
+        if "w" in anchor:
+            left = x
+        elif "e" in anchor:
+            left = x - width
+        else:
+            left = x - width / 2
+        if anchor.startswith("n"):
+            top = y
+        elif anchor.startswith("s"):
+            top = y - height
+        else:
+            top = y - height / 2
+        return int(round(left)), int(round(top))
+
+    # Rasterization
+    def _region(self, x1, y1, x2, y2):
+        """Clipped integer pixel bounds, None if empty"""
+        x1, x2 = max(int(np.floor(min(x1, x2))), 0), min(int(np.ceil(max(x1, x2))), self.width)
+        y1, y2 = max(int(np.floor(min(y1, y2))), 0), min(int(np.ceil(max(y1, y2))), self.height)
+        if x1 >= x2 or y1 >= y2:
+            return None
+        return x1, y1, x2, y2
+
+    def _paint(self, frame, region, mask, color):
+        x1, y1, x2, y2 = region
+        frame[y1:y2, x1:x2][mask] = color
+
+    def _draw_rectangle(self, frame, item):
+        x1, y1, x2, y2 = item.coords
+        fill, outline = rgb(item.options.get("fill")), rgb(item.options.get("outline", "black"))
+        width = item.options.get("width", 1) if outline else 0
+        region = self._region(x1, y1, x2, y2)
+        if region is None:
+            return
+        rx1, ry1, rx2, ry2 = region
+        if fill:
+            frame[ry1:ry2, rx1:rx2] = fill
+        if outline and width:
+            w = max(int(round(width)), 1)
+            frame[ry1:min(ry1 + w, ry2), rx1:rx2] = outline
+            frame[max(ry2 - w, ry1):ry2, rx1:rx2] = outline
+            frame[ry1:ry2, rx1:min(rx1 + w, rx2)] = outline
+            frame[ry1:ry2, max(rx2 - w, rx1):rx2] = outline
+
+    def _draw_oval(self, frame, item):
+        x1, y1, x2, y2 = item.coords
+        region = self._region(x1, y1, x2, y2)
+        color = rgb(item.options.get("fill")) or rgb(item.options.get("outline", "black"))
+        if region is None or color is None:
+            return
+        rx1, ry1, rx2, ry2 = region
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        ax, ay = max(abs(x2 - x1) / 2, 0.5), max(abs(y2 - y1) / 2, 0.5)
+        ys, xs = np.mgrid[ry1:ry2, rx1:rx2] + 0.5
+        self._paint(frame, region, ((xs - cx) / ax) ** 2 + ((ys - cy) / ay) ** 2 <= 1.0, color)
+
+    def _draw_line(self, frame, item):
+        color = rgb(item.options.get("fill", "black"))
+        if color is None:
+            return
+        half = max(item.options.get("width", 1), 1) / 2
+        points = item.coords
+        for x1, y1, x2, y2 in zip(points[0::2], points[1::2], points[2::2], points[3::2]):
+            region = self._region(min(x1, x2) - half, min(y1, y2) - half, max(x1, x2) + half, max(y1, y2) + half)
+            if region is None:
+                continue
+            rx1, ry1, rx2, ry2 = region
+            ys, xs = np.mgrid[ry1:ry2, rx1:rx2] + 0.5
+            dx, dy = x2 - x1, y2 - y1
+            length2 = dx * dx + dy * dy
+            t = np.clip(((xs - x1) * dx + (ys - y1) * dy) / length2, 0.0, 1.0) if length2 else 0.0
+            distance2 = (xs - x1 - t * dx) ** 2 + (ys - y1 - t * dy) ** 2
+            self._paint(frame, region, distance2 <= half * half + 0.25, color)
+
+    def _draw_text(self, frame, item):
+        text = item.options.get("text", "")
+        color = rgb(item.options.get("fill", "black"))
+        if Image is None or not text or color is None:
+            return
+        font = self._font(item.options.get("font"))
+        width, height = self._text_size(text, item.options.get("font"))
+        mask = Image.new("L", (max(width, 1), max(height, 1)), 0)
+        ImageDraw.Draw(mask).text((0, 0), text, fill=255, font=font)
+        left, top = self._text_origin(item, width, height)
+        region = self._region(left, top, left + width, top + height)
+        if region is None:
+            return
+        rx1, ry1, rx2, ry2 = region
+        alpha = np.asarray(mask)[ry1 - top:ry2 - top, rx1 - left:rx2 - left] > 127
+        self._paint(frame, region, alpha, color)
+
+    def _draw_image(self, frame, item):
+        image = item.options.get("image")
+        if image is None:
+            return
+        x, y = int(item.coords[0]), int(item.coords[1])  # anchor 'nw'
+        pixels = image.pixels
+        region = self._region(x, y, x + pixels.shape[1], y + pixels.shape[0])
+        if region is None:
+            return
+        rx1, ry1, rx2, ry2 = region
+        source = pixels[ry1 - y:ry2 - y, rx1 - x:rx2 - x]
+        self._paint(frame, region, source[..., 3] > 0, source[..., :3][source[..., 3] > 0])
+
+    def render(self) -> np.ndarray:
+        """The canvas as a (height, width, 3) uint8 RGB array"""
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = self.bg or (0, 0, 0)
+        for item in list(self.items.values()):
+            if item.options.get("state") == "hidden":
+                continue
+            getattr(self, f"_draw_{item.kind}")(frame, item)
+        return frame
+
+
+class HeadlessRoot:
+    """Event loop for RasterCanvas: after() timers and readable file handlers, no display"""
+
+    def __init__(self):
+        self._timers = []  # heap of (due, seq, callback)
+        self._cancelled = set()
+        self._seq = itertools.count()
+        self._handlers = {}  # fd -> callback(fd, mask)
+        self._quit = False
+        self.tk = self  # createfilehandler lives on root.tk in tkinter
+
+    def after(self, ms, callback, *args):
+        seq = next(self._seq)
+        heapq.heappush(self._timers, (time.monotonic() + ms / 1000, seq, lambda: callback(*args)))
+        return seq
+
+    def after_cancel(self, seq):
+        self._cancelled.add(seq)
+
+    def createfilehandler(self, fd, mask, callback):
+        self._handlers[fd] = callback
+
+    def deletefilehandler(self, fd):
+        self._handlers.pop(fd, None)
+
+    def configure(self, **options):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def quit(self):
+        self._quit = True
+
+    def mainloop(self):
+        self._quit = False
+        while not self._quit:
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+            if self._handlers:
+                ready, _, _ = select.select(list(self._handlers), [], [], timeout)
+                for fd in ready:
+                    self._handlers[fd](fd, 1)
+            elif timeout:
+                time.sleep(timeout)
+            elif timeout is None:
+                break  # nothing left to wait for
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now and not self._quit:
+                _, seq, callback = heapq.heappop(self._timers)
+                if seq in self._cancelled:
+                    self._cancelled.discard(seq)
+                    continue
+                callback()
+
+
+class FrameWriter:
+    """Writes rendered frames as numbered image files, or raw RGB24 to a file, pipe or stdout"""
+
+    def __init__(self, target: str):
+        self.target = target
+        self.frames = 0
+        self._stream = None
+        if target == "-":
+            self._stream = sys.stdout.buffer
+        elif "%" not in target:
+            self._stream = open(target, "wb")
+        elif os.path.dirname(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    def write(self, frame: np.ndarray):
+        if self._stream is not None:
+            try:
+                self._stream.write(frame.tobytes())
+                self._stream.flush()
+            except BrokenPipeError:
+                print("Frame output: reader went away, stopping")
+                self._stream = None
+                self.target = None
+                return
+        elif self.target is not None:
+            path = self.target % self.frames
+            if path.endswith(".png") and Image is not None:
+                Image.fromarray(frame).save(path)
+            else:
+                with open(path, "wb") as f:
+                    f.write(b"P6 %d %d 255\n" % (frame.shape[1], frame.shape[0]))
+                    f.write(frame.tobytes())
+        self.frames += 1
+
+    def close(self):
+        if self._stream is not None and self._stream is not sys.stdout.buffer:
+            self._stream.close()
+        self._stream = None
+
+
+def benchmark(points=200, frames=100, output=None):
+    """Render a scene with moving points offscreen and report the frame rate"""
+    from math import sin, cos
+    from grid_visualizer import GridVisualizer
+
+    viz = GridVisualizer(10, 6, backend="raster")
+    objects = [viz.add_point(0, 0, 4, "dodgerblue") for _ in range(points)]
+    writer = FrameWriter(output) if output else None
+    start = time.perf_counter()
+    for frame in range(frames):
+        for i, point in enumerate(objects):
+            point.x = 4 * sin(0.05 * frame + i)
+            point.y = 3 + 2.5 * cos(0.03 * frame + 2 * i)
+            viz.update_object(point)
+        viz.update()
+        image = viz.render_frame()
+        if writer:
+            writer.write(image)
+    elapsed = time.perf_counter() - start
+    if writer:
+        writer.close()
+    viz.stop()
+    # The frame rate depends heavily on the machine, so report what it was measured on
+    import platform
+    conditions = (f"Python {platform.python_version()}, NumPy {np.__version__}, "
+                  f"text {'Pillow' if Image is not None else 'off'}, {os.cpu_count()} CPUs, "
+                  f"{platform.processor() or platform.machine()}, output {output or 'none'}")
+    print(f"{frames} frames of {points} points at {viz.canvas_width}x{viz.canvas_height}: "
+          f"{frames / elapsed:.1f} fps ({elapsed / frames * 1000:.1f} ms per frame)\n  {conditions}",
+          file=sys.stderr if output == "-" else sys.stdout)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Offscreen GridVisualizer rendering benchmark")
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--output", help="frame output, e.g. frames/%%06d.ppm, session.rgb or -")
+    args = parser.parse_args()
+    benchmark(args.points, args.frames, args.output)
@@ -0,0 +1,396 @@
+"""
+Live GridVisualizer scene for remote viewers over HTTP (Server-Sent Events).
+
+The render tick hands every batch of applied draw commands to SceneStream, which
+only copies the object fields (no encoding, no network) on the Tk thread. A
+broadcaster thread keeps a mirror of the scene, folds the changes into it and,
+at most stream_rate times per second, encodes one diff for all viewers:
+
+    event: snapshot   {"seq", "width", "height", "ppm", "margin", "objects": {key: state}}
+    event: diff       {"seq", "set": {key: changed fields}, "del": [keys]}
+
+A viewer gets a snapshot when it joins, then diffs. One that falls more than
+CLIENT_BACKLOG messages behind is sent a fresh snapshot instead of the backlog.
+Object keys are small integers, point cloud layers are "cloud:<layer>"; states
+are in meters, like the GridVisualizer API.
+
+    GET /          a browser viewer (canvas, no dependencies)
+    GET /events    the event stream
+    GET /snapshot  the current scene as JSON
+
+python scene_stream.py --demo runs an offscreen visualizer with moving objects,
+serves it and checks that a localhost client reproduces the scene.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+import urllib.request
+from dataclasses import fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+from grid_visualizer import (VisualPoint, VisualLine, VisualText, VisualSquare, VisualRectangle,
+                             VisualPointCloud)
+
+STREAM_PORT = 8765
+STREAM_RATE = 20.0  # diffs per second at most
+CLIENT_BACKLOG = 64  # messages queued per viewer before it is resynchronized
+KEEPALIVE = 15.0  # seconds between comments on an idle stream
+DECIMALS = 3  # meters are sent with millimeter resolution
+
+_TYPES = {VisualPoint: "point", VisualLine: "line", VisualText: "text",
+          VisualSquare: "square", VisualRectangle: "rectangle"}
+# Fields sent per type, the canvas item ids stay local
+_FIELDS = {cls: [f.name for f in fields(cls) if not f.name.endswith("id")] for cls in _TYPES}
+
+
+def object_state(obj) -> dict:
+    state = {"type": _TYPES[type(obj)]}
+    for name in _FIELDS[type(obj)]:
+        value = getattr(obj, name)
+        state[name] = round(value, DECIMALS) if isinstance(value, float) else value
+    return state
+
+
+def cloud_state(cloud: VisualPointCloud) -> dict:
+    colors = cloud.colors if isinstance(cloud.colors, str) else list(cloud.colors)
+    return {"type": "cloud", "layer": cloud.layer, "color": colors, "radius_pixels": cloud.radius_pixels,
+            "xs": [round(float(x), DECIMALS) for x in cloud.xs],
+            "ys": [round(float(y), DECIMALS) for y in cloud.ys]}
+
+
+def _event(name, payload) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode()
+
+
+class _Client:
+    def __init__(self):
+        self.messages = queue.Queue(maxsize=CLIENT_BACKLOG)
+
+
+class SceneStream:
+    def __init__(self, viz, host="127.0.0.1", port=STREAM_PORT, rate=STREAM_RATE):
+        self.viz = viz
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.scene: Dict[object, dict] = {}  # mirror: key -> state
+        self.seq = 0
+        self.clients = set()
+        self.resyncs = 0
+        self._keys = {}  # id(obj) -> key of objects on the canvas
+        self._next_key = itertools.count(1)
+        self._changes = queue.Queue()  # batches of (key, state or None) from the Tk thread
+        self._set = {}  # key -> changed fields since the last diff
+        self._deleted = set()
+        self._stop = threading.Event()
+        self.server = None
+        viz.add_scene_listener(self._on_commands)
+
+    # Tk thread: copy fields, nothing else
+    def _on_commands(self, commands):
+        changes = []
+        for cmd, (obj,) in commands:
+            if cmd == 'cloud':
+                changes.append((f"cloud:{obj.layer}", cloud_state(obj)))
+            elif type(obj) not in _TYPES and cmd != 'remove':
+                continue  # raster layers are not streamed
+            elif cmd == 'remove':
+                key = self._keys.pop(id(obj), None)
+                if key is not None:
+                    changes.append((key, None))
+            else:
+                key = self._keys.get(id(obj))
+                if key is None:
+                    key = self._keys[id(obj)] = next(self._next_key)
+                changes.append((key, object_state(obj)))
+        if changes:
+            self._changes.put(changes)
+
+    # Broadcaster thread
+    def _fold(self, changes):
+        for key, state in changes:
+            if state is None:
+                if self.scene.pop(key, None) is not None:
+                    self._set.pop(key, None)
+                    self._deleted.add(key)
+                continue
+            old = self.scene.get(key)
+            delta = state if old is None else {k: v for k, v in state.items() if old.get(k) != v}
+            if delta:
+                self.scene[key] = state
+                self._set.setdefault(key, {}).update(delta)
+
+    def _snapshot(self) -> dict:
+        viz = self.viz
+        return {"seq": self.seq, "width": viz.width_meters, "height": viz.height_meters,
+                "ppm": viz.pixels_per_meter, "margin": viz.margin_pixels,
+                "objects": {str(key): state for key, state in self.scene.items()}}
+
+    def _flush(self):
+        if not self._set and not self._deleted:
+            return
+        self.seq += 1
+        # Deletions first: a key removed and added again within one diff is set afterwards
+        message = _event("diff", {"seq": self.seq, "del": [str(key) for key in self._deleted],
+                                  "set": {str(key): delta for key, delta in self._set.items()}})
+        self._set = {}
+        self._deleted = set()
+        for client in list(self.clients):
+            try:
+                client.messages.put_nowait(message)
+            except queue.Full:
+                self._send_snapshot(client)
+                self.resyncs += 1
+
+    def _send_snapshot(self, client):
+        """Replace everything queued for client by a snapshot (call with lock held)"""
+        client.messages = queue.Queue(maxsize=CLIENT_BACKLOG)
+        client.messages.put_nowait(_event("snapshot", self._snapshot()))
+
+    def _broadcast(self):
+        period = 1.0 / self.rate
+        next_flush = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                changes = self._changes.get(timeout=max(0.0, next_flush - time.monotonic()))
+                with self.lock:
+                    self._fold(changes)
+                    while True:  # everything that arrived meanwhile
+                        self._fold(self._changes.get_nowait())
+            except queue.Empty:
+                pass
+            if time.monotonic() >= next_flush:
+                with self.lock:
+                    self._flush()
+                next_flush = time.monotonic() + period
+
+    # HTTP side
+    def join(self) -> _Client:
+        client = _Client()
+        with self.lock:
+            self._send_snapshot(client)
+            self.clients.add(client)
+        return client
+
+    def leave(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def snapshot_json(self) -> bytes:
+        with self.lock:
+            return json.dumps(self._snapshot()).encode()
+
+    def start(self):
+        stream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/events":
+                    self._events()
+                elif self.path == "/snapshot":
+                    self._reply("application/json", stream.snapshot_json())
+                elif self.path == "/":
+                    self._reply("text/html; charset=utf-8", VIEWER_HTML.encode())
+                else:
+                    self.send_error(404)
+
+            def _reply(self, content_type, body):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _events(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                client = stream.join()
+                try:
+                    while not stream._stop.is_set():
+                        try:
+                            message = client.messages.get(timeout=KEEPALIVE)
+                        except queue.Empty:
+                            message = b": keepalive\n\n"
+                        self.wfile.write(message)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    stream.leave(client)
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._broadcast, daemon=True).start()
+        print(f"Scene stream on http://{self.host}:{self.port}/")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def client(url):
+    """Follow a scene stream: yields (event, payload, scene) with scene the client's mirror"""
+    scene = {}
+    with urllib.request.urlopen(url.rstrip("/") + "/events") as response:
+        event, data = None, []
+        for raw in response:
+            line = raw.decode().rstrip("\n")
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                data.append(line[6:])
+            elif not line and data:
+                payload = json.loads("".join(data))
+                if event == "snapshot":
+                    scene = dict(payload["objects"])
+                else:
+                    for key in payload["del"]:
+                        scene.pop(key, None)
+                    for key, delta in payload["set"].items():
+                        scene.setdefault(key, {}).update(delta)
+                yield event, payload, scene
+                event, data = None, []
+
+
+def demo(seconds=3.0):
+    """Offscreen visualizer with moving objects, served and followed by a localhost client"""
+    from math import sin
+    from grid_visualizer import GridVisualizer
+
+    viz = GridVisualizer(10, 6, backend="raster")
+    stream = SceneStream(viz, port=0).start()
+    points = [viz.add_point(0, 1, 5, "dodgerblue", f"Tag {i}") for i in range(5)]
+    line = viz.add_line(-2, 0, 0, "white", "0.0°")
+    viz.update()
+    time.sleep(0.2)
+
+    received = {"snapshot": 0, "diff": 0}
+    result = {}
+
+    def follow():
+        for event, payload, scene in client(f"http://127.0.0.1:{stream.port}"):
+            received[event] += 1
+            result["scene"] = dict(scene)
+
+    threading.Thread(target=follow, daemon=True).start()
+    start = time.monotonic()
+    frame = 0
+    while time.monotonic() - start < seconds:
+        for i, point in enumerate(points):
+            point.x = 4 * sin(0.1 * frame + i)
+            viz.update_object(point)
+        line.angle = 30 * sin(0.05 * frame)
+        viz.update_object(line)
+        if frame == 20:
+            viz.remove_object(points.pop())
+        viz.update()
+        frame += 1
+        time.sleep(0.01)
+    time.sleep(3 / STREAM_RATE)
+
+    expected = json.loads(stream.snapshot_json())["objects"]
+    matches = result.get("scene") == expected
+    print(f"{frame} frames, {received['snapshot']} snapshot(s) and {received['diff']} diffs received, "
+          f"client scene {'matches' if matches else 'DIFFERS FROM'} the server ({len(expected)} objects)")
+    stream.stop()
+    viz.stop()
+    return matches
+
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>KTI scene</title>
+<style>body{margin:0;background:#353535;color:#fff;font:12px Arial}canvas{display:block}</style></head>
+<body><canvas id="c"></canvas><script>
+const canvas = document.getElementById("c"), ctx = canvas.getContext("2d");
+let meta = null, scene = {}, dirty = false;
+const events = new EventSource("/events");
+events.addEventListener("snapshot", e => { const s = JSON.parse(e.data); meta = s; scene = s.objects; dirty = true; });
+events.addEventListener("diff", e => {
+  const d = JSON.parse(e.data);
+  for (const k of d.del) delete scene[k];
+  for (const k in d.set) scene[k] = Object.assign(scene[k] || {}, d.set[k]);
+  dirty = true;
+});
+function px(x, y) { return [meta.margin + (x + meta.width / 2) * meta.ppm, meta.margin + (meta.height - y) * meta.ppm]; }
+function label(text, x, y, align, base) {
+  if (!text) return;
+  ctx.fillStyle = "black"; ctx.textAlign = align; ctx.textBaseline = base; ctx.fillText(text, x, y);
+}
+function draw() {
+  requestAnimationFrame(draw);
+  if (!dirty || !meta) return;
+  dirty = false;
+  const w = meta.width * meta.ppm, h = meta.height * meta.ppm;
+  canvas.width = w + 2 * meta.margin; canvas.height = h + 3 * meta.margin;
+  ctx.fillStyle = "#6F6F6F"; ctx.fillRect(0, 0, canvas.width, canvas.height);
+  ctx.strokeStyle = "#333"; ctx.lineWidth = 1;
+  for (let x = 0; x <= w; x += meta.ppm) { ctx.beginPath(); ctx.moveTo(meta.margin + x, meta.margin); ctx.lineTo(meta.margin + x, meta.margin + h); ctx.stroke(); }
+  for (let y = 0; y <= h; y += meta.ppm) { ctx.beginPath(); ctx.moveTo(meta.margin, meta.margin + y); ctx.lineTo(meta.margin + w, meta.margin + y); ctx.stroke(); }
+  ctx.strokeStyle = "white"; ctx.lineWidth = 2; ctx.strokeRect(meta.margin, meta.margin, w, h);
+  ctx.font = "12px Arial";
+  for (const o of Object.values(scene)) {
+    if (o.type === "point") {
+      const [x, y] = px(o.x, o.y);
+      ctx.fillStyle = o.color; ctx.beginPath(); ctx.arc(x, y, o.radius_pixels, 0, 2 * Math.PI); ctx.fill();
+      label(o.text, x, y - o.radius_pixels - 5, "center", "bottom");
+    } else if (o.type === "line") {
+      const [x, y] = px(o.x, 0), a = o.angle * Math.PI / 180, len = w + h;
+      ctx.save(); ctx.beginPath(); ctx.rect(meta.margin, meta.margin, w, h); ctx.clip();
+      ctx.strokeStyle = o.color; ctx.lineWidth = o.thickness;
+      ctx.beginPath(); ctx.moveTo(x, y); ctx.lineTo(x + Math.sin(a) * len, y - Math.cos(a) * len); ctx.stroke();
+      ctx.restore();
+      label(o.text, x + Math.sin(a) * h * 0.1, y - Math.cos(a) * h * 0.1, "center", "middle");
+    } else if (o.type === "rectangle" || o.type === "square") {
+      const wp = o.type === "square" ? o.size_pixels : o.width_pixels, hp = o.type === "square" ? o.size_pixels : o.height_pixels;
+      let [x, y] = px(o.x, o.y);
+      if (o.type === "square" && o.relative_to_grid) y = meta.margin + h + hp / 2;
+      const fill = o.type === "square" ? o.color : o.fill, outline = o.type === "square" ? o.color : o.outline;
+      if (fill) { ctx.fillStyle = fill; ctx.fillRect(x - wp / 2, y - hp / 2, wp, hp); }
+      if (outline) { ctx.strokeStyle = outline; ctx.lineWidth = o.outline_width || 1; ctx.strokeRect(x - wp / 2, y - hp / 2, wp, hp); }
+      label(o.text, x, y, "center", "middle");
+    } else if (o.type === "text") {
+      const x = meta.margin + (o.x + meta.width / 2) * meta.ppm, y = meta.margin + h - o.y * meta.ppm;
+      ctx.font = (o.text_size || 12) + "px Arial";
+      const m = ctx.measureText(o.text), th = (o.text_size || 12) * 1.2;
+      if (o.background) { ctx.fillStyle = o.background; ctx.fillRect(x - m.width / 2 - 4, y - th / 2 - 4, m.width + 8, th + 8); }
+      ctx.fillStyle = o.background ? "black" : o.color; ctx.textAlign = "center"; ctx.textBaseline = "middle"; ctx.fillText(o.text, x, y);
+      ctx.font = "12px Arial";
+    } else if (o.type === "cloud") {
+      for (let i = 0; i < o.xs.length; i++) {
+        const [x, y] = px(o.xs[i], o.ys[i]);
+        ctx.fillStyle = typeof o.color === "string" ? o.color : o.color[i];
+        ctx.beginPath(); ctx.arc(x, y, o.radius_pixels, 0, 2 * Math.PI); ctx.fill();
+      }
+    }
+  }
+}
+draw();
+</script></body></html>
+"""
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="GridVisualizer scene stream")
+    parser.add_argument("--demo", action="store_true", help="serve a moving offscreen scene and check a local client")
+    parser.add_argument("--follow", metavar="URL", help="print the events of a running stream")
+    args = parser.parse_args()
+    if args.follow:
+        for event, payload, scene in client(args.follow):
+            print(f"{event} #{payload['seq']}: {len(scene)} objects")
+    else:
+        demo()
@@ -0,0 +1,253 @@
+"""
+Single-producer/single-consumer ring buffer in shared memory.
+
+Sensor processes (ble.py, rad.py) write fixed-size packed records into a ring
+the fusion process created; the fusion process reads them in place, without
+formatting, pipes or re-parsing.
+
+Layout: a header with the slot geometry and the head/tail sequence numbers, each
+on its own cache line, followed by slot_count slots of slot_size bytes. A slot
+holds <length:u32><pad:u32><payload>. The producer fills a slot and only then
+publishes it by storing head + 1; the consumer reads and then stores tail + 1.
+Each side only ever writes its own counter, so no lock is needed between them;
+a process with several producing threads must serialise its writes itself.
+
+Run this file to compare it with the line-buffered stdout pipe.
+"""
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+
+MAGIC = 0x4B544952  # "KTIR"
+HEADER_SIZE = 192
+HEAD_OFFSET = 64
+TAIL_OFFSET = 128
+GEOMETRY = struct.Struct("<III")  # magic, slot_count, slot_size
+COUNTER = struct.Struct("<Q")
+SLOT_HEADER = struct.Struct("<II")
+
+# Record formats shared by the producers and the fusion process
+BLE_RECORD = struct.Struct("<dHIhhhI")  # host time, station, tag, rssi, azimuth, elevation, anchor timestamp ms
+RADAR_HEADER = struct.Struct("<dIII")  # host time, frame number, timeCpuCycles, number of points; then float32 x, y pairs
+RADAR_MAX_POINTS = 256
+
+BLE_SLOT_SIZE = SLOT_HEADER.size + BLE_RECORD.size
+RADAR_SLOT_SIZE = SLOT_HEADER.size + RADAR_HEADER.size + RADAR_MAX_POINTS * 8
+
+
+def _open_existing(name, forked):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if not forked:
+            # Before Python 3.13 every attaching process registers the segment with its
+            # own resource tracker, which would unlink it under the owner on exit
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class ShmRing:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        magic, self.slot_count, self.slot_size = GEOMETRY.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{shm.name} is not a ring buffer")
+        self.name = shm.name
+        self.dropped = 0  # records the producer could not place because the ring was full
+        # Each side owns one counter and keeps a cached copy of the other one, so the
+        # shared header is only read again when the ring looks full (or empty)
+        self._write_seq = self._head()
+        self._read_seq = self._tail()
+        self._tail_seen = self._read_seq
+        self._head_seen = self._write_seq
+
+    @classmethod
+    def create(cls, slot_count, slot_size, name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + slot_count * slot_size)
+        GEOMETRY.pack_into(shm.buf, 0, MAGIC, slot_count, slot_size)
+        COUNTER.pack_into(shm.buf, HEAD_OFFSET, 0)
+        COUNTER.pack_into(shm.buf, TAIL_OFFSET, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name, forked=False):
+        """Open a ring created elsewhere; forked=True when sharing the owner's resource tracker"""
+        return cls(_open_existing(name, forked), owner=False)
+
+    def _head(self):
+        return COUNTER.unpack_from(self.buf, HEAD_OFFSET)[0]
+
+    def _tail(self):
+        return COUNTER.unpack_from(self.buf, TAIL_OFFSET)[0]
+
+    def _slot(self, seq):
+        return HEADER_SIZE + (seq % self.slot_count) * self.slot_size
+
+    def __len__(self):
+        return self._head() - self._tail()
+
+    # Producer side
+    def _full(self):
+        if self._write_seq - self._tail_seen < self.slot_count:
+            return False
+        self._tail_seen = self._tail()
+        if self._write_seq - self._tail_seen < self.slot_count:
+            return False
+        self.dropped += 1
+        return True
+
+    def _publish(self):
+        self._write_seq += 1
+        COUNTER.pack_into(self.buf, HEAD_OFFSET, self._write_seq)
+
+    def write(self, payload) -> bool:
+        """Copy payload into the next slot, False (and counted as dropped) if the ring is full"""
+        length = len(payload)
+        if length > self.slot_size - SLOT_HEADER.size:
+            raise ValueError(f"record of {length} bytes does not fit a {self.slot_size} byte slot")
+        if self._full():
+            return False
+        offset = self._slot(self._write_seq)
+        SLOT_HEADER.pack_into(self.buf, offset, length, 0)
+        self.buf[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + length] = payload
+        self._publish()
+        return True
+
+    def write_struct(self, record: struct.Struct, *values) -> bool:
+        """Pack values straight into the next slot"""
+        if self._full():
+            return False
+        offset = self._slot(self._write_seq)
+        SLOT_HEADER.pack_into(self.buf, offset, record.size, 0)
+        record.pack_into(self.buf, offset + SLOT_HEADER.size, *values)
+        self._publish()
+        return True
+
+    # Consumer side
+    def peek(self) -> Optional[memoryview]:
+        """The oldest unread record as a view into shared memory, valid until advance()"""
+        if self._read_seq == self._head_seen:
+            self._head_seen = self._head()
+            if self._read_seq == self._head_seen:
+                return None
+        offset = self._slot(self._read_seq)
+        length = SLOT_HEADER.unpack_from(self.buf, offset)[0]
+        start = offset + SLOT_HEADER.size
+        return self.buf[start:start + length]
+
+    def advance(self):
+        self._read_seq += 1
+        COUNTER.pack_into(self.buf, TAIL_OFFSET, self._read_seq)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def pack_radar(ring: ShmRing, t, frame_number, x_coords, y_coords, cpu_cycles=0) -> bool:
+    """Write one radar frame; frames with more than RADAR_MAX_POINTS points are truncated"""
+    count = min(len(x_coords), RADAR_MAX_POINTS)
+    points = [v for xy in zip(x_coords[:count], y_coords[:count]) for v in xy]
+    payload = (RADAR_HEADER.pack(t, frame_number, max(cpu_cycles, 0) & 0xFFFFFFFF, count)
+               + struct.pack(f"<{2 * count}f", *points))
+    return ring.write(payload)
+
+
+def unpack_radar(view):
+    """(t, frame_number, cpu_cycles, xs, ys) from a radar record; xs and ys are views, copy before advance()"""
+    import numpy as np
+    t, frame_number, cpu_cycles, count = RADAR_HEADER.unpack_from(view, 0)
+    points = np.frombuffer(view, dtype='<f4', count=2 * count, offset=RADAR_HEADER.size)
+    return t, frame_number, cpu_cycles, points[0::2], points[1::2]
+
+
+def _pipe_producer(fd, count, rate):
+    with os.fdopen(fd, 'w', buffering=1) as out:
+        period = 1.0 / rate if rate else 0
+        start = time.monotonic()
+        for i in range(count):
+            if period:
+                delay = start + i * period - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            # Same line format ble.py prints, plus the send time for the latency measurement
+            out.write(f"Station: 1 | Tag: 1 | RSSI: -55 dBm | Azimuth: {i % 90:<5}° | Elevation: 3    ° | "
+                      f"Timestamp: {i:<10} ms | Avg Frequency: 50.00 Hz | {time.monotonic_ns()}\n")
+
+
+def _shm_producer(name, count, rate):
+    ring = ShmRing.attach(name, forked=True)
+    period = 1.0 / rate if rate else 0
+    start = time.monotonic()
+    i = 0
+    while i < count:
+        if period:
+            delay = start + i * period - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        if ring.write_struct(BLE_RECORD, time.monotonic(), 1, 1, -55, i % 90, 3, i):
+            i += 1
+    ring.close()
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def benchmark(count=20000, rate=2000):
+    """Throughput at full speed and latency percentiles at a paced rate, pipe vs ring"""
+    import multiprocessing
+    from parsed_data import parse_string
+
+    def run_pipe(n, r):
+        read_fd, write_fd = os.pipe()
+        proc = multiprocessing.Process(target=_pipe_producer, args=(write_fd, n, r))
+        proc.start()
+        os.close(write_fd)
+        latencies = []
+        with os.fdopen(read_fd, 'r') as pipe:
+            for line in pipe:
+                if parse_string(line):
+                    latencies.append((time.monotonic_ns() - int(line.rsplit("|", 1)[1])) / 1e3)
+        proc.join()
+        return latencies
+
+    def run_shm(n, r):
+        ring = ShmRing.create(1024, BLE_SLOT_SIZE)
+        proc = multiprocessing.Process(target=_shm_producer, args=(ring.name, n, r))
+        proc.start()
+        latencies = []
+        while len(latencies) < n:
+            view = ring.peek()
+            if view is None:
+                time.sleep(0)
+                continue
+            t = BLE_RECORD.unpack_from(view)[0]
+            latencies.append((time.monotonic() - t) * 1e6)
+            view.release()
+            ring.advance()
+        proc.join()
+        ring.close()
+        return latencies
+
+    print(f"{'transport':>10} {'records/s':>12} {'p50 us':>10} {'p99 us':>10} {'max us':>10}")
+    for label, run in (("pipe", run_pipe), ("shm", run_shm)):
+        start = time.monotonic()
+        done = len(run(count, 0))
+        throughput = done / (time.monotonic() - start)
+        latencies = run(count // 10, rate)
+        print(f"{label:>10} {throughput:>12.0f} {_percentile(latencies, 50):>10.1f} "
+              f"{_percentile(latencies, 99):>10.1f} {max(latencies):>10.1f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,108 @@
+"""
+Array-backed display state for any number of BLE tags.
+
+Every tag gets a slot the first time it is seen; bearings per anchor, positions,
+velocities, radii and flags live in NumPy arrays indexed by slot. Sensor threads
+write single cells, the render tick reads and diffs whole columns at once, so the
+per-frame cost is a few vectorized operations plus one canvas update per tag that
+actually changed.
+"""
+from threading import Lock
+from typing import Dict, List, Tuple
+import numpy as np
+
+INITIAL_CAPACITY = 16
+MOVE_TOLERANCE = 0.005  # meters a tag has to move before it is redrawn
+
+
+class TagRegistry:
+    # array name -> fill value of unused slots
+    _ARRAYS = {"tags": 0, "azimuth": 0.0, "angle_dirty": False, "position": np.nan, "velocity": 0.0,
+               "updated": np.nan, "radius": 0.0, "inside": False, "drawn": np.nan, "drawn_radius": 0.0}
+
+    def __init__(self, anchor_count: int, capacity: int = INITIAL_CAPACITY):
+        self.anchor_count = anchor_count
+        self.lock = Lock()
+        self.slots: Dict[int, int] = {}  # tag number -> slot
+        self.count = 0
+        self.tags = np.zeros(capacity, dtype=int)
+        self.azimuth = np.zeros((capacity, anchor_count))  # smoothed bearing per anchor, degrees
+        self.angle_dirty = np.zeros((capacity, anchor_count), dtype=bool)
+        self.position = np.full((capacity, 2), np.nan)  # meters, at time updated
+        self.velocity = np.zeros((capacity, 2))  # m/s from the position tracker
+        self.updated = np.full(capacity, np.nan)  # host monotonic seconds
+        self.radius = np.zeros(capacity)  # uncertainty radius, meters
+        self.inside = np.zeros(capacity, dtype=bool)
+        self.drawn = np.full((capacity, 2), np.nan)  # position last sent to the canvas
+        self.drawn_radius = np.zeros(capacity)
+
+    def _grow(self):
+        capacity = 2 * len(self.tags)
+        for name, fill in self._ARRAYS.items():
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def slot(self, tag: int) -> int:
+        """Slot of tag, registered on first use; call with lock held"""
+        slot = self.slots.get(tag)
+        if slot is None:
+            if self.count == len(self.tags):
+                self._grow()
+            slot = self.slots[tag] = self.count
+            self.tags[slot] = tag
+            self.count += 1
+        return slot
+
+    def set_angle(self, tag: int, station: int, angle: float):
+        if not 1 <= station <= self.anchor_count:
+            return
+        with self.lock:
+            slot = self.slot(tag)
+            self.azimuth[slot, station - 1] = angle
+            self.angle_dirty[slot, station - 1] = True
+
+    def set_position(self, tag: int, t: float, x: float, y: float, radius: float, velocity=None):
+        with self.lock:
+            slot = self.slot(tag)
+            self.position[slot] = (x, y)
+            self.velocity[slot] = velocity if velocity is not None else (0.0, 0.0)
+            self.updated[slot] = t
+            self.radius[slot] = radius
+
+    def set_inside(self, tag: int, inside: bool):
+        with self.lock:
+            self.inside[self.slot(tag)] = inside
+
+    def take_angles(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(slots, stations, angles) of every bearing changed since the last call"""
+        with self.lock:
+            dirty = self.angle_dirty[:self.count]
+            slots, columns = np.nonzero(dirty)
+            angles = self.azimuth[slots, columns]
+            dirty[:] = False
+        return slots, columns + 1, angles
+
+    def take_moved(self, now: float, max_extrapolation: float,
+                   tolerance: float = MOVE_TOLERANCE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (slots, positions, radii) of tags whose position extrapolated to now, or radius,
+        differs from what was last drawn; the result is marked as drawn.
+        """
+        with self.lock:
+            n = self.count
+            age = np.clip(now - self.updated[:n], 0.0, max_extrapolation)
+            predicted = self.position[:n] + self.velocity[:n] * age[:, None]
+            known = ~np.isnan(predicted[:, 0])
+            moved = known & ((np.abs(predicted - self.drawn[:n]) > tolerance).any(axis=1)
+                             | np.isnan(self.drawn[:n, 0])
+                             | (self.radius[:n] != self.drawn_radius[:n]))
+            slots = np.nonzero(moved)[0]
+            self.drawn[slots] = predicted[slots]
+            self.drawn_radius[slots] = self.radius[slots]
+            return slots, predicted[slots], self.radius[slots]
+
+    def inside_tags(self) -> List[int]:
+        with self.lock:
+            return self.tags[:self.count][self.inside[:self.count]].tolist()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The sensor scripts import their neighbours by plain module name, like when run from their directories
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [root, os.path.join(root, "ble"), os.path.join(root, "radar")]
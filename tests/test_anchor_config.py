@@ -0,0 +1,51 @@
+import os
+import tty
+
+from anchor_config import AnchorSettings, configure_anchor
+from anchor_sim import AnchorSimulator
+
+
+def test_configure_switches_baud_rate():
+    with AnchorSimulator(baud_rate=115200, stream=False) as sim:
+        baud_rate, error = configure_anchor(sim.port, AnchorSettings(baud_rate=921600, report_interval_ms=20))
+        assert error is None
+        assert baud_rate == 921600
+        assert sim.baud_rate == 921600
+        assert sim.commands == [
+            "AT",
+            "ATE0",
+            "AT+UDFCFG=3,20",
+            "AT+UDFCFG=4,0",
+            "AT+UMRS=921600,2,8,1,1,1",
+            "AT",  # check at the new rate
+        ]
+
+
+def test_configure_already_at_rate_skips_switch():
+    with AnchorSimulator(baud_rate=921600, stream=False) as sim:
+        baud_rate, error = configure_anchor(sim.port, AnchorSettings(baud_rate=921600))
+        assert (baud_rate, error) == (921600, None)
+        assert not any(cmd.startswith("AT+UMRS") for cmd in sim.commands)
+
+
+def test_configure_without_answer_falls_back():
+    master, slave = os.openpty()  # nothing on the other end answers
+    try:
+        tty.setraw(slave)
+        port = os.ttyname(slave)
+        baud_rate, error = configure_anchor(port, AnchorSettings(baud_rate=921600))
+        assert baud_rate == 115200
+        assert error == f"{port}: anchor not responding to AT"
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def test_configure_error_reply_keeps_current_rate():
+    with AnchorSimulator(baud_rate=115200, stream=False) as sim:
+        settings = AnchorSettings(baud_rate=921600, extra_commands=["AT+UNKNOWN"])
+        baud_rate, error = configure_anchor(sim.port, settings)
+        assert baud_rate == 115200
+        assert error == f"{sim.port}: AT+UNKNOWN -> ERROR []"
+        assert sim.baud_rate == 115200
+        assert not any(cmd.startswith("AT+UMRS") for cmd in sim.commands)
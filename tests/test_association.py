@@ -0,0 +1,119 @@
+import numpy as np
+
+from association import CLUSTER_DISTANCE, GATE_MARGIN, associate, cluster_points
+from fusion import GHOST_X, GHOST_Y, filter_ghosts
+
+
+def clusters_by_pairs(xs, ys, distance=CLUSTER_DISTANCE):
+    """Single linkage over all pairs: sorted (points, x, y) of every cluster"""
+    count = len(xs)
+    labels = [-1] * count
+    for start in range(count):
+        if labels[start] >= 0:
+            continue
+        labels[start] = start
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            for j in range(count):
+                if labels[j] < 0 and (xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2 <= distance ** 2:
+                    labels[j] = start
+                    stack.append(j)
+    result = []
+    for label in set(labels):
+        members = [i for i in range(count) if labels[i] == label]
+        result.append((len(members), np.mean([xs[i] for i in members]), np.mean([ys[i] for i in members])))
+    return sorted(result)
+
+
+def associate_by_pairs(objects, tags, margin=GATE_MARGIN):
+    """Every object-tag pair inside the gate, nearest first: object index -> (tag, distance)"""
+    pairs = sorted((float(np.hypot(o.x - x, o.y - y)), k, tag)
+                   for k, o in enumerate(objects) for tag, (x, y, r) in tags.items()
+                   if np.hypot(o.x - x, o.y - y) <= r + margin)
+    matched, used = {}, set()
+    for distance, k, tag in pairs:
+        if k not in matched and tag not in used:
+            matched[k] = (tag, distance)
+            used.add(tag)
+    return matched
+
+
+def filter_ghosts_by_pairs(x_coords, y_coords):
+    """The loop filter_ghosts replaced, comparing every pair of points"""
+    xs, ys = [], []
+    for i in range(len(x_coords)):
+        if (abs(y_coords[i]) < GHOST_Y and
+            any(abs(x_coords[i] + x_coords[j]) < GHOST_X
+                for j in range(len(x_coords))
+                if j != i and abs(y_coords[j]) < GHOST_Y)):
+            continue
+        xs.append(x_coords[i])
+        ys.append(y_coords[i])
+    return xs, ys
+
+
+def test_clusters_match_all_pairs_linkage():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        centers = rng.uniform(-4, 4, (rng.integers(1, 8), 2))
+        points = np.concatenate([c + rng.normal(0, 0.2, (rng.integers(1, 12), 2)) for c in centers])
+        xs, ys = points[:, 0].tolist(), points[:, 1].tolist()
+        objects = cluster_points(xs, ys)
+        got = sorted((o.points, o.x, o.y) for o in objects)
+        expected = clusters_by_pairs(xs, ys)
+        assert [n for n, _, _ in got] == [n for n, _, _ in expected]
+        assert np.allclose([(x, y) for _, x, y in got], [(x, y) for _, x, y in expected])
+
+
+def test_chain_across_cells_is_one_cluster():
+    xs = [0.0, 0.35, 0.7, 1.05, 1.4]  # neighbours 0.35 apart, ends 1.4 apart
+    objects = cluster_points(xs, [0.0] * 5)
+    assert [(o.points, round(o.x, 6)) for o in objects] == [(5, 0.7)]
+    assert len(cluster_points([0.0, 0.41], [0.0, 0.0])) == 2
+    assert cluster_points([], []) == []
+
+
+def test_association_matches_all_pairs_gating():
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        xs, ys = rng.uniform(-5, 5, 20), rng.uniform(0, 8, 20)
+        objects = cluster_points(xs, ys)
+        tags = {tag: (float(rng.uniform(-5, 5)), float(rng.uniform(0, 8)), float(rng.uniform(0.2, 1.5)))
+                for tag in range(1, rng.integers(1, 10))}
+        expected = associate_by_pairs(objects, tags)
+        associate(objects, tags)
+        got = {k: (o.tag, o.distance) for k, o in enumerate(objects) if o.tag is not None}
+        assert got.keys() == expected.keys()
+        for k, (tag, distance) in expected.items():
+            assert got[k][0] == tag and np.isclose(got[k][1], distance)
+
+
+def test_gate_rejects_objects_outside_radius_plus_margin():
+    objects = cluster_points([0.0, 3.0], [2.0, 2.0])
+    associate(objects, {7: (0.0, 2.0 + 0.5 + GATE_MARGIN + 0.01, 0.5), 8: (3.0, 2.4, 0.2)})
+    assert [o.tag for o in objects] == [None, 8]
+
+
+def test_one_tag_goes_to_the_nearest_object():
+    objects = cluster_points([0.0, 1.0], [2.0, 2.0])
+    associate(objects, {1: (0.8, 2.0, 1.0)})
+    assert [o.tag for o in objects] == [None, 1]
+    assert np.isclose(objects[1].distance, 0.2)
+
+
+def test_filter_ghosts_matches_pairwise_loop():
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        count = int(rng.integers(0, 40))
+        xs = rng.uniform(-1, 1, count)
+        ys = rng.uniform(-0.5, 3, count)
+        mirrored = rng.random(count) < 0.3  # plant mirror images near the axis
+        xs = np.concatenate([xs, -xs[mirrored] + rng.normal(0, GHOST_X / 2, mirrored.sum())]).tolist()
+        ys = np.concatenate([ys, rng.uniform(-GHOST_Y, GHOST_Y, mirrored.sum())]).tolist()
+        assert filter_ghosts(xs, ys) == filter_ghosts_by_pairs(xs, ys)
+
+
+def test_point_on_the_axis_is_not_its_own_ghost():
+    assert filter_ghosts([0.0], [0.0]) == ([0.0], [0.0])
+    assert filter_ghosts([0.0, 0.0], [0.0, 0.01]) == ([], [])
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from channels import BLOCK, COALESCE, DROP_OLDEST, BoundedChannel
+
+
+def test_block_waits_for_the_consumer():
+    channel = BoundedChannel("block", 2, BLOCK, block_timeout=2.0)
+    channel.put(1)
+    channel.put(2)
+    timer = threading.Timer(0.1, channel.drain, args=(1,))
+    timer.start()
+    start = time.monotonic()
+    assert channel.put(3)
+    waited = time.monotonic() - start
+    timer.join()
+    assert 0.05 < waited < 1.0
+    assert channel.drain() == [2, 3]
+    stats = channel.snapshot()
+    assert stats.dropped == 0 and stats.blocked >= 0.05
+
+
+def test_block_drops_after_timeout_or_when_not_blocking():
+    channel = BoundedChannel("block", 1, BLOCK, block_timeout=0.05)
+    channel.put("kept")
+    start = time.monotonic()
+    assert not channel.put("late")
+    assert time.monotonic() - start >= 0.05
+    start = time.monotonic()
+    assert not channel.put("consumer", block=False)
+    assert time.monotonic() - start < 0.05
+    assert channel.drain() == ["kept"]
+    assert channel.snapshot().dropped == 2
+
+
+def test_drop_oldest_keeps_the_newest():
+    channel = BoundedChannel("frames", 3, DROP_OLDEST)
+    for i in range(10):
+        assert channel.put(i)
+    assert channel.drain() == [7, 8, 9]
+    stats = channel.snapshot()
+    assert (stats.puts, stats.dropped, stats.max_depth, stats.depth) == (10, 7, 3, 0)
+
+
+def test_drop_oldest_discards_items_older_than_max_lag():
+    channel = BoundedChannel("frames", 10, DROP_OLDEST, max_lag=0.05)
+    channel.put("stale")
+    time.sleep(0.08)
+    channel.put("fresh")
+    assert channel.drain() == ["fresh"]
+    stats = channel.snapshot()
+    assert stats.dropped == 1
+    assert stats.max_lag < 0.05  # the discarded item does not count as delivered lag
+
+
+@pytest.mark.parametrize("policy", [BLOCK, COALESCE])
+def test_max_lag_only_applies_to_drop_oldest(policy):
+    channel = BoundedChannel("lossless", 10, policy, max_lag=0.01)
+    channel.put("old", key="a")
+    time.sleep(0.03)
+    assert channel.drain() == ["old"]
+    assert channel.snapshot().max_lag >= 0.03
+
+
+def test_coalesce_replaces_in_place():
+    channel = BoundedChannel("draw", 3, COALESCE)
+    channel.put("a1", key="a")
+    channel.put("b1", key="b")
+    channel.put("a2", key="a")  # keeps a's place ahead of b
+    assert channel.drain() == ["a2", "b1"]
+    assert channel.snapshot().coalesced == 1
+
+
+def test_coalesce_full_channel():
+    channel = BoundedChannel("draw", 2, COALESCE, block_timeout=0.05)
+    channel.put("a", key="a")
+    channel.put("b", key="b")
+    assert channel.put("a2", key="a", block=False)  # an existing key needs no room
+    start = time.monotonic()
+    assert not channel.put("c", key="c", block=False)  # a new key does, and is dropped at once
+    assert time.monotonic() - start < 0.05
+    assert channel.put("remove", key="d", block=False, force=True)  # forced past capacity
+    assert len(channel) == 3
+    stats = channel.snapshot()
+    assert (stats.dropped, stats.overflowed, stats.coalesced) == (1, 1, 1)
+    assert channel.drain() == ["a2", "b", "remove"]
+
+
+def test_coalesce_new_key_blocks_like_block():
+    channel = BoundedChannel("draw", 1, COALESCE, block_timeout=0.05)
+    channel.put("a", key="a")
+    assert not channel.put("b", key="b")
+    assert channel.snapshot().blocked >= 0.05
+
+
+def test_drain_in_chunks_keeps_order():
+    channel = BoundedChannel("draw", 100, COALESCE)
+    for i in range(10):
+        channel.put(i, key=i)
+    assert channel.drain(4) == [0, 1, 2, 3]
+    assert channel.drain(4) == [4, 5, 6, 7]
+    assert channel.drain() == [8, 9]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedChannel("bad", 1, "fifo")
@@ -0,0 +1,82 @@
+import pytest
+
+import discovery
+from anchor_sim import AnchorSimulator
+from discovery import Discovery, PortInfo, ROLE_ANCHOR, ROLE_RADAR_CLI, ROLE_RADAR_DATA
+from radar_sim import RadarSimulator
+
+ANCHOR_1 = "6C1DEBA41F2B"
+ANCHOR_2 = "6C1DEBA41F3C"
+
+
+@pytest.fixture
+def devices():
+    with AnchorSimulator(anchor_id=ANCHOR_1) as a1, \
+            AnchorSimulator(anchor_id=ANCHOR_2, baud_rate=921600) as a2, \
+            RadarSimulator() as radar:
+        yield a1, a2, radar
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Ports probed, in call order"""
+    probed = []
+    probe_port = discovery.probe_port
+
+    def counting(port, *args, **kwargs):
+        probed.append(port)
+        return probe_port(port, *args, **kwargs)
+
+    monkeypatch.setattr(discovery, "probe_port", counting)
+    return probed
+
+
+def test_cold_probe_classifies_ports(devices, tmp_path):
+    a1, a2, radar = devices
+    result = discovery.discover_cached([a1.port, a2.port, radar.cli_port, radar.data_port],
+                                       path=str(tmp_path / "devices.json"))
+    roles = {p.port: (p.role, p.baud_rate, p.anchor_id) for p in result.ports}
+    assert roles[a1.port] == (ROLE_ANCHOR, 115200, ANCHOR_1)
+    assert roles[a2.port] == (ROLE_ANCHOR, 921600, ANCHOR_2)
+    assert roles[radar.cli_port] == (ROLE_RADAR_CLI, 115200, None)
+    assert roles[radar.data_port] == (ROLE_RADAR_DATA, 921600, None)  # silent, paired as the next port
+    assert result.radars() == [(radar.cli_port, radar.data_port)]
+    assert radar.commands == []  # the radar CLI only got a newline, no AT
+
+
+def test_cache_hit_skips_probing(devices, probes, tmp_path):
+    a1, a2, radar = devices
+    ports = [a1.port, a2.port, radar.cli_port, radar.data_port]
+    path = str(tmp_path / "devices.json")
+    cold = discovery.discover_cached(ports, path=path)
+    assert sorted(probes) == sorted(ports)
+    probes.clear()
+    cached = discovery.discover_cached(ports, path=path)
+    assert probes == []
+    assert cached.elapsed == 0.0
+    assert cached.ports == cold.ports
+
+
+def test_stale_cache_probes_again(devices, probes, tmp_path):
+    a1, a2, radar = devices
+    path = str(tmp_path / "devices.json")
+    discovery.discover_cached([a1.port, a2.port, radar.cli_port, radar.data_port], path=path)
+    probes.clear()
+    # a2 unplugged: the fingerprint no longer matches the cached one
+    remaining = [a1.port, radar.cli_port, radar.data_port]
+    result = discovery.discover_cached(remaining, path=path)
+    assert sorted(probes) == sorted(remaining)
+    assert [p.port for p in result.anchors()] == [a1.port]
+    assert discovery.load_cache(path).fingerprint == result.fingerprint
+
+
+def test_anchors_follow_configured_order():
+    result = Discovery("", [
+        PortInfo("/dev/ttyUSB10", ROLE_ANCHOR, 921600, anchor_id=ANCHOR_1),
+        PortInfo("/dev/ttyUSB2", ROLE_ANCHOR, 921600, anchor_id=ANCHOR_2),
+        PortInfo("/dev/ttyUSB3", ROLE_ANCHOR, 921600, anchor_id=None),
+        PortInfo("/dev/ttyACM0", ROLE_RADAR_CLI, 115200),
+    ])
+    assert [p.port for p in result.anchors()] == ["/dev/ttyUSB2", "/dev/ttyUSB3", "/dev/ttyUSB10"]
+    assert [p.port for p in result.anchors([ANCHOR_1, ANCHOR_2])] == ["/dev/ttyUSB10", "/dev/ttyUSB2", "/dev/ttyUSB3"]
+    assert [p.port for p in result.anchors([ANCHOR_2])] == ["/dev/ttyUSB2", "/dev/ttyUSB3", "/dev/ttyUSB10"]
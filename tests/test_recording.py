@@ -0,0 +1,28 @@
+from recording import MAGIC, RECORD_HEADER, RECORD_LINE, RECORD_SESSION, Recorder, read_records, replay
+
+
+def test_sessions_are_replayed_without_the_gap_between_them(tmp_path):
+    path = str(tmp_path / "anchors.rec")
+    for base in (1000.0, 90000.0):  # a second run a day later appends to the same file
+        recorder = Recorder(path)
+        recorder.add_line("1", "first", timestamp=base)
+        recorder.add_line("2", "second", timestamp=base + 0.05)
+        recorder.close()
+
+    types = [record[0] for record in read_records(path)]
+    assert types == [RECORD_SESSION, RECORD_LINE, RECORD_LINE] * 2
+
+    lines = []
+    count, elapsed = replay(path, lambda line, station: lines.append((station, line)))
+    assert count == 4
+    assert lines == [("1", "first"), ("2", "second")] * 2
+    assert 0.1 <= elapsed < 1.0  # both sessions' 50 ms spacing, not the day in between
+
+
+def test_recording_without_session_markers_still_replays(tmp_path):
+    path = tmp_path / "old.rec"  # written before session records existed
+    records = [RECORD_HEADER.pack(RECORD_LINE, t, 1, len(b"line")) + b"line" for t in (5.0, 5.05)]
+    path.write_bytes(MAGIC + b"".join(records))
+    count, elapsed = replay(str(path), lambda line, station: None)
+    assert count == 2
+    assert 0.05 <= elapsed < 0.5
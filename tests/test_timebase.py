@@ -0,0 +1,87 @@
+import numpy as np
+
+from timebase import CLOCK_WINDOW, DeviceClock, TimeBase
+
+
+def feed(clock, hz, seconds, period, skew_ppm=0.0, start_tick=0, wrap_bits=32, delay=0.002, jitter=0.003,
+         t0=100.0, seed=0):
+    """
+    Drive clock with a counter running skew_ppm fast, sent every period and received
+    delay + exponential jitter later; (produced, aligned) host times of every sample
+    """
+    rng = np.random.default_rng(seed)
+    produced, aligned = [], []
+    for i in range(int(seconds / period)):
+        t = t0 + i * period
+        raw = (start_tick + int(i * period * (1 + skew_ppm * 1e-6) * hz)) % (1 << wrap_bits)
+        produced.append(t)
+        aligned.append(clock.align(raw, t + delay + rng.exponential(jitter)))
+    return np.array(produced), np.array(aligned)
+
+
+def test_wrapping_skewed_counter_aligns_within_milliseconds():
+    # 16-bit millisecond counter wraps every 65.5 s, starting just before a wrap
+    clock = DeviceClock("anchor", 1000.0, wrap_bits=16)
+    produced, aligned = feed(clock, 1000.0, 300, 0.05, skew_ppm=80, start_tick=65000, wrap_bits=16)
+    settled = slice(CLOCK_WINDOW, None)
+    # The envelope settles on the smallest delay seen (2 ms); what is left is the 1 ms
+    # counter resolution and the slope noise of a 12.8 s window with 3 ms of jitter
+    error = aligned[settled] - produced[settled] - 0.002
+    assert np.median(np.abs(error)) < 0.0005
+    assert np.abs(error).max() < 0.0025
+    assert clock.stats.resets == 0
+
+
+def test_drift_is_estimated_over_a_long_window():
+    clock = DeviceClock("anchor", 1000.0, wrap_bits=16)
+    feed(clock, 1000.0, 600, 0.5, skew_ppm=80, wrap_bits=16)  # 128 s window
+    assert clock.stats.resets == 0
+    assert abs(clock.stats.drift_ppm + 80) < 20  # host seconds per device second is 1 - 80 ppm
+
+
+def test_running_fit_matches_full_refit():
+    clock = DeviceClock("anchor", 1000.0)
+    feed(clock, 1000.0, 120, 0.02, skew_ppm=-150, seed=1)  # many window turnovers and rebases
+    device, host = np.array(clock.samples).T
+    slope, _ = np.polyfit(device, host, 1)
+    assert abs(clock._slope - slope) < 1e-9
+    intercept = (host - slope * device).min()
+    assert abs(clock._intercept - intercept) < 0.0005  # envelope tolerance
+
+
+def test_jitter_is_measured_on_demand():
+    timebase = TimeBase()
+    for i in range(500):
+        timebase.align_ble(1, i * 20, 10.0 + i * 0.02 + 0.002 * (i % 2))
+    stats = timebase.stats()[0]
+    assert 0.0005 < stats.jitter < 0.0015  # residuals alternate between 0 and 2 ms
+
+
+def test_unknown_tick_rate_is_measured():
+    clock = DeviceClock("radar", None)
+    produced, aligned = feed(clock, 300e6, 60, 0.1, skew_ppm=40, start_tick=4_000_000_000, seed=2)
+    assert abs(clock.stats.rate / 300e6 - 1) < 5e-3
+    # Until the rate is known the receive time is passed through
+    assert np.all(aligned[:5] - produced[:5] >= 0.002)
+    error = aligned[-200:] - produced[-200:] - 0.002
+    assert np.abs(error).max() < 0.001
+    assert clock.stats.resets == 0
+
+
+def test_restart_resets_and_measures_again():
+    clock = DeviceClock("radar", None)
+    feed(clock, 200e6, 10, 0.1, seed=3)
+    # The device restarts: its counter starts over while host time goes on
+    produced, aligned = feed(clock, 200e6, 30, 0.1, t0=110.0, seed=4)
+    assert clock.stats.resets == 1
+    assert abs(clock.stats.rate / 200e6 - 1) < 5e-3
+    error = aligned[-100:] - produced[-100:] - 0.002
+    assert np.abs(error).max() < 0.001
+
+
+def test_to_host_matches_align():
+    clock = DeviceClock("anchor", 1000.0)
+    feed(clock, 1000.0, 20, 0.05, jitter=0.0)
+    raw = clock._last_raw
+    assert abs(clock.to_host(raw) - clock.to_host(raw - 50) - 0.05) < 1e-6
+    assert DeviceClock("idle", None).to_host(0) is None
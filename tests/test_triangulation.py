@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+
+from triangulation import PARALLEL_EPS, _lstsq_reference, triangulate_batch, triangulate_pair
+
+ANCHOR1_X = -1.8
+ANCHOR2_X = 1.8
+
+
+def random_bearings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(-80, 80, n), rng.uniform(-30, 30, n),
+            rng.uniform(-80, 80, n), rng.uniform(-30, 30, n))
+
+
+def determinant(az1, el1, az2, el2):
+    az1, el1, az2, el2 = map(np.radians, (az1, el1, az2, el2))
+    return (np.sin(az2) * np.cos(el2) * np.cos(az1) * np.cos(el1)
+            - np.sin(az1) * np.cos(el1) * np.cos(az2) * np.cos(el2))
+
+
+def test_closed_form_matches_lstsq():
+    az1, el1, az2, el2 = random_bearings(2000)
+    well_posed = np.abs(determinant(az1, el1, az2, el2)) > 1e-3
+    assert well_posed.sum() > 1900
+    for a1, e1, a2, e2 in zip(az1[well_posed], el1[well_posed], az2[well_posed], el2[well_posed]):
+        x, y, radius = triangulate_pair(ANCHOR1_X, ANCHOR2_X, a1, e1, a2, e2)
+        ref_x, ref_y = _lstsq_reference(ANCHOR1_X, ANCHOR2_X, a1, e1, a2, e2)
+        assert math.isclose(x, ref_x, rel_tol=1e-6, abs_tol=1e-9)
+        assert math.isclose(y, ref_y, rel_tol=1e-6, abs_tol=1e-9)
+        assert radius >= 0.2
+
+
+def test_batch_matches_pair():
+    az1, el1, az2, el2 = random_bearings(2000, seed=1)
+    xs, ys, radii, valid = triangulate_batch(ANCHOR1_X, ANCHOR2_X, az1, el1, az2, el2)
+    for i in range(len(az1)):
+        x, y, radius = triangulate_pair(ANCHOR1_X, ANCHOR2_X, az1[i], el1[i], az2[i], el2[i])
+        assert valid[i] == (x is not None)
+        if x is not None:
+            assert np.allclose([xs[i], ys[i], radii[i]], [x, y, radius], rtol=1e-9, atol=1e-12)
+
+
+def test_parallel_and_near_parallel_rays_have_no_intersection():
+    rng = np.random.default_rng(2)
+    az = rng.uniform(-80, 80, 200)
+    el = rng.uniform(-30, 30, 200)
+    for offset in (0.0, 1e-9, -1e-9):  # degrees between the bearings
+        az2 = az + offset
+        for a1, e1, a2 in zip(az, el, az2):
+            assert abs(determinant(a1, e1, a2, e1)) < PARALLEL_EPS
+            assert triangulate_pair(ANCHOR1_X, ANCHOR2_X, a1, e1, a2, e1) == (None, None, None)
+        xs, ys, radii, valid = triangulate_batch(ANCHOR1_X, ANCHOR2_X, az, el, az2, el)
+        assert not valid.any()
+        assert np.isnan(xs).all() and np.isnan(ys).all() and np.isnan(radii).all()
+
+
+def test_converging_rays_just_above_the_threshold_still_intersect():
+    # 0.01° apart: far away, but a proper intersection that lstsq agrees with
+    x, y, _ = triangulate_pair(ANCHOR1_X, ANCHOR2_X, 0.005, 0.0, -0.005, 0.0)
+    ref_x, ref_y = _lstsq_reference(ANCHOR1_X, ANCHOR2_X, 0.005, 0.0, -0.005, 0.0)
+    assert math.isclose(x, ref_x, abs_tol=1e-6)
+    assert math.isclose(y, ref_y, rel_tol=1e-6)
+    assert y > 10000
@@ -0,0 +1,253 @@
+"""
+Device clock alignment against host monotonic time.
+
+Radar frames carry timeCpuCycles (a free running u32 CPU cycle counter) and every
+BLE anchor stamps its reports with its own u32 millisecond clock. DeviceClock
+maps such a counter onto time.monotonic():
+
+- the counter is unwrapped into a continuous tick count
+- over a sliding window of (device seconds, host receive time) pairs a linear fit
+  gives the drift (clock rate error); its sums are kept running, so a sample
+  costs O(1) and not a pass over the window ...
+- ... and the intercept is moved down to the lower envelope of the samples, because
+  host receive time = device send time + a transport delay that is never negative.
+  The aligned time of a record therefore estimates when it was produced, and
+  host receive time - aligned time is its measured transport latency.
+
+A device that restarts (counter jumps against host time) starts a new window.
+
+The radar tick rate is not assumed: which core stamps timeCpuCycles, and at what
+clock, differs between the mmw demo builds (the xWR68xx demo uses its 600 MHz DSP,
+the AWR2944 demo a different core). A clock created without ticks_per_second
+measures it over its first min_fit_span seconds, returning receive times until
+then, and measures again after a restart.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+RADAR_CPU_HZ = None  # timeCpuCycles rate, measured per radar (set it to skip the measurement)
+BLE_TIMESTAMP_HZ = 1000.0  # u-blox anchors report milliseconds
+CLOCK_WINDOW = 256  # samples in the sliding fit
+MIN_FIT_SPAN = 2.0  # seconds of history before the drift estimate is trusted
+MAX_CLOCK_STEP = 1.0  # seconds the device and host clocks may disagree on an interval before a reset
+ENVELOPE_TOLERANCE = 5e-4  # seconds the envelope may be off across the window (below the anchors' 1 ms resolution)
+
+
+@dataclass
+class ClockStats:
+    name: str
+    samples: int = 0
+    resets: int = 0
+    drift_ppm: float = 0.0  # device clock rate error against rate, positive when the device runs slow
+    offset: float = 0.0  # host time at device time zero of the current window, seconds
+    latency: float = 0.0  # host receive time - aligned time of the last sample, seconds
+    max_latency: float = 0.0
+    jitter: float = 0.0  # RMS residual of the fit, seconds, updated by TimeBase.stats()
+    rate: float = 0.0  # ticks per second, nominal or measured
+
+
+class DeviceClock:
+    def __init__(self, name: str, ticks_per_second: Optional[float], wrap_bits: int = 32,
+                 window: int = CLOCK_WINDOW, min_fit_span: float = MIN_FIT_SPAN,
+                 max_step: float = MAX_CLOCK_STEP):
+        self.ticks_per_second = ticks_per_second  # None until measured
+        self.measured = ticks_per_second is None
+        self.wrap = 1 << wrap_bits
+        self.window = window
+        self.min_fit_span = min_fit_span
+        self.max_step = max_step
+        self.samples = deque()  # (device seconds since window start, host time), at most window
+        self.stats = ClockStats(name, rate=ticks_per_second or 0.0)
+        self._calibration_start = 0.0  # host time of the first sample of a measurement
+        self._last_raw: Optional[int] = None
+        self._last_host = 0.0
+        self._ticks = 0  # unwrapped tick count of the last sample, relative to the window start
+        self._slope = 1.0  # host seconds per device second
+        self._intercept = 0.0
+        self._clear_window()
+
+    def _clear_window(self):
+        self.samples.clear()
+        self._first = 0  # sequence number of samples[0]
+        # Running least-squares sums over the window, relative to a reference sample
+        self._d0 = self._h0 = 0.0
+        self._sd = self._sh = self._sdd = self._sdh = 0.0
+        self._since_rebase = 0
+        # Lower envelope candidates (seq, device, host, key), key = host - envelope slope * device
+        # increasing from the front, so the front is the sample with the smallest delay
+        self._envelope = deque()
+        self._envelope_slope = 1.0
+
+    def reset(self):
+        self._clear_window()
+        self._last_raw = None
+        self._ticks = 0
+        self._slope = 1.0
+        if self.measured:
+            self.ticks_per_second = None  # a restarted (or mismeasured) device is measured again
+        self.stats.resets += 1
+
+    def _unwrap(self, raw: int) -> int:
+        delta = (raw - self._last_raw) % self.wrap
+        return self._ticks + delta
+
+    def align(self, raw: int, host_time: float) -> float:
+        """Record a counter value received at host_time, returns the aligned host time it was produced"""
+        raw = int(raw) % self.wrap
+        if self.ticks_per_second is None:
+            return self._calibrate(raw, host_time)
+        if self._last_raw is not None:
+            ticks = self._unwrap(raw)
+            device_step = (ticks - self._ticks) / self.ticks_per_second
+            host_step = host_time - self._last_host
+            if abs(device_step - host_step) > self.max_step:
+                self.reset()
+                if self.ticks_per_second is None:
+                    return self._calibrate(raw, host_time)
+        if self._last_raw is None:
+            ticks = 0
+            self._intercept = host_time
+        self._last_raw = raw
+        self._last_host = host_time
+        self._ticks = ticks
+
+        device = ticks / self.ticks_per_second
+        self._add(device, host_time)
+        self._fit()
+
+        aligned = self._intercept + self._slope * device
+        stats = self.stats
+        stats.samples += 1
+        stats.latency = host_time - aligned
+        stats.max_latency = max(stats.max_latency, stats.latency)
+        return aligned
+
+    def _calibrate(self, raw: int, host_time: float) -> float:
+        if self._last_raw is None:
+            self._ticks = 0
+            self._calibration_start = host_time
+        else:
+            self._ticks = self._unwrap(raw)
+        self._last_raw = raw
+        elapsed = host_time - self._calibration_start
+        if self._ticks > 0 and elapsed >= self.min_fit_span:
+            self.ticks_per_second = self._ticks / elapsed
+            self.stats.rate = self.ticks_per_second
+            self._last_raw = None  # the first window starts with the next sample
+        return host_time
+
+    def _accumulate(self, d, h, sign):
+        d -= self._d0
+        h -= self._h0
+        self._sd += sign * d
+        self._sh += sign * h
+        self._sdd += sign * d * d
+        self._sdh += sign * d * h
+
+    def _add(self, device, host):
+        samples = self.samples
+        if not samples:
+            self._d0, self._h0 = device, host
+        elif len(samples) == self.window:
+            self._accumulate(*samples.popleft(), -1)
+            self._first += 1
+            if self._envelope[0][0] < self._first:
+                self._envelope.popleft()
+        samples.append((device, host))
+        self._accumulate(device, host, 1)
+        key = host - self._envelope_slope * device
+        envelope = self._envelope
+        while envelope and envelope[-1][3] >= key:
+            envelope.pop()
+        envelope.append((self._first + len(samples) - 1, device, host, key))
+        self._since_rebase += 1
+        if self._since_rebase >= self.window:
+            self._rebase()
+
+    def _rebase(self):
+        """Recompute the sums relative to the oldest sample, once per window so rounding cannot pile up"""
+        self._d0, self._h0 = self.samples[0]
+        self._sd = self._sh = self._sdd = self._sdh = 0.0
+        for d, h in self.samples:
+            self._accumulate(d, h, 1)
+        self._since_rebase = 0
+
+    def _rebuild_envelope(self, slope):
+        self._envelope.clear()
+        self._envelope_slope = slope
+        for i, (d, h) in enumerate(self.samples):
+            key = h - slope * d
+            while self._envelope and self._envelope[-1][3] >= key:
+                self._envelope.pop()
+            self._envelope.append((self._first + i, d, h, key))
+
+    def _fit(self):
+        samples = self.samples
+        n = len(samples)
+        span = samples[-1][0] - samples[0][0]
+        slope = 1.0
+        if n >= 3 and span >= self.min_fit_span:
+            denominator = n * self._sdd - self._sd * self._sd
+            if denominator > 0:
+                slope = (n * self._sdh - self._sd * self._sh) / denominator
+        # Lower envelope: the sample with the smallest delay defines the offset. The
+        # candidates are ordered for the slope they were built with, which is only
+        # redone once the fit has moved enough to pick a different sample
+        if abs(slope - self._envelope_slope) * span > ENVELOPE_TOLERANCE:
+            self._rebuild_envelope(slope)
+        _, d, h, _ = self._envelope[0]
+        self._slope = slope
+        self._intercept = h - slope * d
+        self.stats.drift_ppm = (slope - 1.0) * 1e6
+        self.stats.offset = self._intercept
+
+    def measure_jitter(self) -> float:
+        """RMS residual of the current fit; a pass over the window, so done on demand rather than per sample"""
+        if not self.samples:
+            return 0.0
+        squares = 0.0
+        for d, h in self.samples:
+            residual = h - self._slope * d - self._intercept
+            squares += residual * residual
+        self.stats.jitter = (squares / len(self.samples)) ** 0.5
+        return self.stats.jitter
+
+    def to_host(self, raw: int) -> Optional[float]:
+        """Aligned host time of a counter value near the last sample, without recording it"""
+        if self._last_raw is None or self.ticks_per_second is None:
+            return None
+        delta = (int(raw) - self._last_raw) % self.wrap
+        if delta > self.wrap // 2:
+            delta -= self.wrap  # slightly older than the last sample
+        return self._intercept + self._slope * (self._ticks + delta) / self.ticks_per_second
+
+
+class TimeBase:
+    """One DeviceClock per radar and per BLE anchor station"""
+
+    def __init__(self, radar_hz: float = RADAR_CPU_HZ, ble_hz: float = BLE_TIMESTAMP_HZ):
+        self.radar_hz = radar_hz
+        self.ble_hz = ble_hz
+        self.clocks = {}
+
+    def clock(self, name, ticks_per_second) -> DeviceClock:
+        clock = self.clocks.get(name)
+        if clock is None:
+            clock = self.clocks[name] = DeviceClock(name, ticks_per_second)
+        return clock
+
+    def align_radar(self, cycles: int, host_time: float, radar: int = 0) -> float:
+        if cycles is None or cycles < 0:
+            return host_time
+        return self.clock(f"radar {radar}", self.radar_hz).align(cycles, host_time)
+
+    def align_ble(self, station: int, timestamp_ms: int, host_time: float) -> float:
+        if timestamp_ms is None:
+            return host_time
+        return self.clock(f"station {station}", self.ble_hz).align(timestamp_ms, host_time)
+
+    def stats(self):
+        for clock in self.clocks.values():
+            clock.measure_jitter()
+        return [clock.stats for clock in self.clocks.values()]
@@ -0,0 +1,127 @@
+"""
+Constant-velocity Kalman trackers for tag angles and positions.
+
+Every update and prediction is a fixed handful of float operations on attributes,
+no buffers and no arrays, so the cost per BLE report is O(1) and allocation free.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Smoothing configuration (constant-velocity Kalman trackers)
+ANGLE_PROCESS_NOISE = 400.0  # deg^2/s^3, how hard the bearing may accelerate
+ANGLE_MEASUREMENT_NOISE = 9.0  # deg^2, variance of a single azimuth report
+POSITION_PROCESS_NOISE = 1.0  # m^2/s^3, walking pace changes
+POSITION_MEASUREMENT_NOISE = 0.1  # m^2, used when the solver gives no variance
+MAX_TRACK_GAP = 2.0  # seconds without reports before a track restarts
+MAX_EXTRAPOLATION = 0.3  # seconds the display may run ahead of the last report
+
+
+@dataclass
+class SmoothingConfig:
+    enable_angle_smoothing: bool = True
+    enable_position_smoothing: bool = True
+    angle_process_noise: float = ANGLE_PROCESS_NOISE
+    angle_measurement_noise: float = ANGLE_MEASUREMENT_NOISE
+    position_process_noise: float = POSITION_PROCESS_NOISE
+    position_measurement_noise: float = POSITION_MEASUREMENT_NOISE
+    max_track_gap: float = MAX_TRACK_GAP
+    max_extrapolation: float = MAX_EXTRAPOLATION
+
+    def angle_tracker(self) -> 'ScalarTracker':
+        return ScalarTracker(self.angle_process_noise, self.angle_measurement_noise, self.max_track_gap)
+
+    def position_tracker(self) -> 'PositionTracker':
+        return PositionTracker(self.position_process_noise, self.position_measurement_noise, self.max_track_gap)
+
+
+class ScalarTracker:
+    """
+    1D constant-velocity Kalman filter over (value, rate).
+
+    The 2x2 covariance is kept as three floats (p00, p01, p11). process_noise is
+    the white acceleration spectral density, in units^2 / s^3.
+    """
+
+    def __init__(self, process_noise: float, measurement_noise: float, max_gap: float = 2.0):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_gap = max_gap  # seconds without data before the track restarts
+        self.t: Optional[float] = None
+        self.value = 0.0
+        self.rate = 0.0
+        self.p00 = self.p01 = self.p11 = 0.0
+
+    def reset(self, t: float, value: float, variance: float):
+        self.t = t
+        self.value = value
+        self.rate = 0.0
+        self.p00 = variance
+        self.p01 = 0.0
+        self.p11 = variance  # no idea about the rate yet, on the scale of the value
+
+    def _predict(self, dt: float):
+        q = self.process_noise
+        self.value += self.rate * dt
+        self.p00 += dt * (2 * self.p01 + dt * self.p11) + q * dt * dt * dt / 3
+        self.p01 += dt * self.p11 + q * dt * dt / 2
+        self.p11 += q * dt
+
+    def update(self, t: float, z: float, variance: Optional[float] = None) -> float:
+        """Fold in measurement z taken at time t (seconds), returns the filtered value"""
+        r = self.measurement_noise if variance is None else variance
+        if self.t is None or t - self.t > self.max_gap or t < self.t - self.max_gap:
+            self.reset(t, z, r)
+            return z
+        dt = t - self.t
+        if dt > 0:
+            self._predict(dt)
+            self.t = t
+
+        s = self.p00 + r
+        k0 = self.p00 / s
+        k1 = self.p01 / s
+        innovation = z - self.value
+        self.value += k0 * innovation
+        self.rate += k1 * innovation
+        self.p11 -= k1 * self.p01
+        self.p01 -= k0 * self.p01
+        self.p00 -= k0 * self.p00
+        return self.value
+
+    def predict(self, t: float, max_extrapolation: float = 0.5) -> Optional[float]:
+        """Value extrapolated to time t without changing the state, None before the first update"""
+        if self.t is None:
+            return None
+        dt = min(max(t - self.t, 0.0), max_extrapolation)
+        return self.value + self.rate * dt
+
+
+class PositionTracker:
+    """Independent constant-velocity filters for X and Y sharing one time base"""
+
+    def __init__(self, process_noise: float, measurement_noise: float, max_gap: float = 2.0):
+        self.x = ScalarTracker(process_noise, measurement_noise, max_gap)
+        self.y = ScalarTracker(process_noise, measurement_noise, max_gap)
+
+    def update(self, t: float, x: float, y: float, variance: Optional[float] = None) -> Tuple[float, float]:
+        return self.x.update(t, x, variance), self.y.update(t, y, variance)
+
+    def predict(self, t: float, max_extrapolation: float = 0.5) -> Optional[Tuple[float, float]]:
+        if self.x.t is None:
+            return None
+        return self.x.predict(t, max_extrapolation), self.y.predict(t, max_extrapolation)
+
+
+class SmoothingFilter:
+    @staticmethod
+    def smooth_angle(value: float, tracker: ScalarTracker, config: SmoothingConfig, t: float) -> float:
+        if not config.enable_angle_smoothing:
+            return value
+        return tracker.update(t, value)
+
+    @staticmethod
+    def smooth_position(x: float, y: float, tracker: PositionTracker, config: SmoothingConfig,
+                        t: float, variance: Optional[float] = None) -> Tuple[float, float]:
+        if not config.enable_position_smoothing:
+            return x, y
+        return tracker.update(t, x, y, variance)
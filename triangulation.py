@@ -0,0 +1,296 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# Below this |determinant| the two bearings are treated as parallel
+PARALLEL_EPS = 1e-9
+BASE_UNCERTAINTY = 0.2  # minimum uncertainty in meters
+
+# Bearing noise model: ANGLE_SIGMA_DEG at RSSI_REF, growing as the signal weakens
+ANGLE_SIGMA_DEG = 5.0
+RSSI_REF = -60
+ANGLE_SIGMA_MIN_DEG = 1.0
+ANGLE_SIGMA_MAX_DEG = 30.0
+
+
+def triangulate_pair(
+    anchor1_x: float,
+    anchor2_x: float,
+    azimuth1: float,
+    elevation1: float,
+    azimuth2: float,
+    elevation2: float
+) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """
+    Intersect the bearings of two anchors placed on the X axis (closed form).
+
+    Angle Convention:
+    - Azimuth: 0° points up (+Y), 90° points right (+X), -90° points left (-X)
+    - Elevation: 0° is horizontal, 90° is straight up
+
+    Args:
+        anchor1_x: X position of the first anchor in meters
+        anchor2_x: X position of the second anchor in meters
+        azimuth1, elevation1: angles from the first anchor in degrees
+        azimuth2, elevation2: angles from the second anchor in degrees
+
+    Returns:
+        (x, y, uncertainty_radius) in meters, or (None, None, None) when the
+        bearings are parallel and have no single intersection
+    """
+    az1_rad = math.radians(azimuth1)
+    az2_rad = math.radians(azimuth2)
+    el1_rad = math.radians(elevation1)
+    el2_rad = math.radians(elevation2)
+
+    cos_el1 = math.cos(el1_rad)
+    cos_el2 = math.cos(el2_rad)
+    vec1_x = math.sin(az1_rad) * cos_el1
+    vec1_y = math.cos(az1_rad) * cos_el1
+    vec1_z = math.sin(el1_rad)
+    vec2_x = math.sin(az2_rad) * cos_el2
+    vec2_y = math.cos(az2_rad) * cos_el2
+    vec2_z = math.sin(el2_rad)
+
+    # [vec1_x -vec2_x; vec1_y -vec2_y] [t1 t2]^T = [anchor2_x - anchor1_x, 0]^T
+    det = vec2_x * vec1_y - vec1_x * vec2_y
+    if abs(det) < PARALLEL_EPS:
+        return None, None, None
+    t1 = -(anchor2_x - anchor1_x) * vec2_y / det
+
+    x = anchor1_x + vec1_x * t1
+    y = vec1_y * t1
+
+    # Both direction vectors are unit length, so the dot product is the cosine
+    dot_product = vec1_x * vec2_x + vec1_y * vec2_y + vec1_z * vec2_z
+    dot_product = max(min(dot_product, 1), -1)
+    angle_factor = math.sin(math.acos(dot_product) / 2)
+    uncertainty_radius = BASE_UNCERTAINTY + angle_factor * math.sqrt(x * x + y * y) / 2
+
+    return x, y, uncertainty_radius
+
+
+def triangulate_batch(anchor1_x, anchor2_x, azimuth1, elevation1, azimuth2, elevation2):
+    """
+    Vectorized triangulate_pair over any number of anchor pair readings.
+
+    All arguments are broadcast against each other, so anchor positions can be
+    scalars while the angles are arrays with one entry per tag (or per tag and
+    anchor pair).
+
+    Returns:
+        (x, y, uncertainty_radius, valid) arrays; x, y and radius are NaN where
+        valid is False (parallel bearings)
+    """
+    anchor1_x, anchor2_x, az1, el1, az2, el2 = np.broadcast_arrays(
+        np.asarray(anchor1_x, dtype=float), np.asarray(anchor2_x, dtype=float),
+        np.radians(azimuth1), np.radians(elevation1),
+        np.radians(azimuth2), np.radians(elevation2))
+
+    cos_el1 = np.cos(el1)
+    cos_el2 = np.cos(el2)
+    vec1_x = np.sin(az1) * cos_el1
+    vec1_y = np.cos(az1) * cos_el1
+    vec2_x = np.sin(az2) * cos_el2
+    vec2_y = np.cos(az2) * cos_el2
+
+    det = vec2_x * vec1_y - vec1_x * vec2_y
+    valid = np.abs(det) >= PARALLEL_EPS
+    safe_det = np.where(valid, det, 1.0)
+    t1 = -(anchor2_x - anchor1_x) * vec2_y / safe_det
+
+    x = anchor1_x + vec1_x * t1
+    y = vec1_y * t1
+
+    dot_product = np.clip(vec1_x * vec2_x + vec1_y * vec2_y + np.sin(el1) * np.sin(el2), -1, 1)
+    angle_factor = np.sin(np.arccos(dot_product) / 2)
+    radius = BASE_UNCERTAINTY + angle_factor * np.hypot(x, y) / 2
+
+    x = np.where(valid, x, np.nan)
+    y = np.where(valid, y, np.nan)
+    radius = np.where(valid, radius, np.nan)
+    return x, y, radius, valid
+
+
+@dataclass
+class AnchorPose:
+    x: float  # meters
+    y: float  # meters
+    height: float = 0.0  # meters
+    yaw: float = 0.0  # degrees, same convention as azimuth (0° faces +Y, 90° faces +X)
+
+
+def rssi_to_angle_sigma(rssi):
+    """Bearing standard deviation in degrees for a given RSSI (scalar or array)"""
+    sigma = ANGLE_SIGMA_DEG * np.power(10.0, (RSSI_REF - np.asarray(rssi, dtype=float)) / 20.0)
+    return np.clip(sigma, ANGLE_SIGMA_MIN_DEG, ANGLE_SIGMA_MAX_DEG)
+
+
+class AnchorArray:
+    """
+    Weighted least-squares ray intersection over N anchors with arbitrary poses.
+
+    Each bearing is a ray from its anchor. The solution minimizes the weighted sum
+    of squared perpendicular distances to all rays:
+        (sum w_i P_i) p = sum w_i P_i a_i,   P_i = I - d_i d_i^T
+    with d_i the unit ray direction and a_i the anchor position. Weights are the
+    bearing Fisher information 1 / (sigma_i^2 r_i^2), so the returned covariance
+    is (sum w_i P_i)^-1. The range r_i is only known after a first solve, which
+    uses 1 / sigma_i^2.
+    """
+
+    def __init__(self, poses: Sequence[AnchorPose], solve_height: bool = False):
+        self.poses = list(poses)
+        self.dims = 3 if solve_height else 2
+        yaw = np.radians([p.yaw for p in self.poses])
+        cos_yaw, sin_yaw = np.cos(yaw), np.sin(yaw)
+        zeros, ones = np.zeros_like(yaw), np.ones_like(yaw)
+        # Rotation about Z, clockwise seen from above to match the azimuth convention
+        self.rotations = np.stack([
+            np.stack([cos_yaw, sin_yaw, zeros], axis=-1),
+            np.stack([-sin_yaw, cos_yaw, zeros], axis=-1),
+            np.stack([zeros, zeros, ones], axis=-1),
+        ], axis=-2)  # (N, 3, 3)
+        self.positions = np.array([[p.x, p.y, p.height] for p in self.poses], dtype=float)[:, :self.dims]
+        self.identity = np.eye(self.dims)
+
+    def directions(self, azimuth, elevation):
+        """World-frame unit ray directions, shape (..., N, dims), from local angles in degrees"""
+        az = np.radians(azimuth)
+        el = np.radians(elevation)
+        cos_el = np.cos(el)
+        local = np.stack([np.sin(az) * cos_el, np.cos(az) * cos_el, np.sin(el)], axis=-1)
+        world = np.einsum('nij,...nj->...ni', self.rotations, local)[..., :self.dims]
+        norm = np.linalg.norm(world, axis=-1, keepdims=True)
+        return world / np.maximum(norm, PARALLEL_EPS)  # a vertical ray projects to 0 in 2D
+
+    def _normal_equations(self, projectors, weights):
+        A = np.einsum('...n,...nij->...ij', weights, projectors)
+        b = np.einsum('...n,...nij,nj->...i', weights, projectors, self.positions)
+        return A, b
+
+    def _solve(self, A, b):
+        # Scale-free degeneracy test, the weights can be anything from 1e-2 to 1e6
+        scale = (np.trace(A, axis1=-2, axis2=-1) / self.dims) ** self.dims
+        valid = np.abs(np.linalg.det(A)) > PARALLEL_EPS * np.maximum(scale, PARALLEL_EPS)
+        A = np.where(valid[..., None, None], A, self.identity)
+        return np.linalg.solve(A, b[..., None])[..., 0], valid
+
+    def solve(self, azimuth, elevation, sigma=None, mask=None):
+        """
+        Intersect the bearings of every tag in one batched solve.
+
+        Args:
+            azimuth, elevation: local angles in degrees, shape (T, N) or (N,)
+            sigma: bearing standard deviation in degrees per reading (see
+                   rssi_to_angle_sigma), defaults to ANGLE_SIGMA_DEG
+            mask: False for readings that should be ignored (no report yet)
+
+        Returns:
+            (position (T, dims), covariance (T, dims, dims), valid (T,)); position
+            and covariance are NaN where fewer than two usable bearings exist
+        """
+        azimuth = np.asarray(azimuth, dtype=float)
+        elevation = np.asarray(elevation, dtype=float)
+        if sigma is None:
+            sigma = np.full(azimuth.shape, ANGLE_SIGMA_DEG)
+        sigma_rad2 = np.radians(np.asarray(sigma, dtype=float)) ** 2
+        weights = 1.0 / sigma_rad2
+        if mask is not None:
+            weights = np.where(mask, weights, 0.0)
+
+        d = self.directions(azimuth, elevation)
+        projectors = self.identity - d[..., :, None] * d[..., None, :]
+
+        A, b = self._normal_equations(projectors, weights)
+        position, valid = self._solve(A, b)
+
+        ranges2 = np.sum((position[..., None, :] - self.positions) ** 2, axis=-1)
+        A, b = self._normal_equations(projectors, weights / np.maximum(ranges2, BASE_UNCERTAINTY ** 2))
+        position, valid2 = self._solve(A, b)
+        valid &= valid2
+
+        covariance = np.linalg.inv(np.where(valid[..., None, None], A, self.identity))
+        position = np.where(valid[..., None], position, np.nan)
+        covariance = np.where(valid[..., None, None], covariance, np.nan)
+        return position, covariance, valid
+
+    def solve_rssi(self, azimuth, elevation, rssi, mask):
+        """
+        solve() weighted by RSSI for a (T, N) batch of tags.
+
+        Returns:
+            (x (T,), y (T,), uncertainty_radius (T,), valid (T,)), NaN where not valid;
+            the radius is two standard deviations along the worst axis of the covariance
+        """
+        position, covariance, valid = self.solve(azimuth, elevation, rssi_to_angle_sigma(rssi), mask)
+        covariance = np.where(valid[..., None, None], covariance[..., :2, :2], np.eye(2))
+        worst = np.linalg.eigvalsh(covariance)[..., -1]
+        radius = np.where(valid, BASE_UNCERTAINTY + 2 * np.sqrt(np.maximum(worst, 0.0)), np.nan)
+        return position[..., 0], position[..., 1], radius, valid
+
+    def solve_one(self, azimuth: List[float], elevation: List[float], rssi: Optional[List[float]] = None,
+                  mask: Optional[List[bool]] = None):
+        """
+        Single tag convenience wrapper around solve().
+
+        Returns:
+            (x, y, uncertainty_radius) or (None, None, None), with the radius
+            taken as two standard deviations along the worst axis of the covariance
+        """
+        sigma = None if rssi is None else rssi_to_angle_sigma(rssi)
+        position, covariance, valid = self.solve(azimuth, elevation, sigma, mask)
+        if not valid:
+            return None, None, None
+        worst = np.linalg.eigvalsh(covariance[:2, :2])[-1]
+        return float(position[0]), float(position[1]), BASE_UNCERTAINTY + 2 * math.sqrt(max(worst, 0.0))
+
+
+def _lstsq_reference(anchor1_x, anchor2_x, azimuth1, elevation1, azimuth2, elevation2):
+    """The per-call np.linalg.lstsq solve triangulate_pair replaces, kept for comparison"""
+    az1, el1, az2, el2 = map(math.radians, (azimuth1, elevation1, azimuth2, elevation2))
+    A = np.array([
+        [math.sin(az1) * math.cos(el1), -math.sin(az2) * math.cos(el2)],
+        [math.cos(az1) * math.cos(el1), -math.cos(az2) * math.cos(el2)]
+    ])
+    b = np.array([anchor2_x - anchor1_x, 0])
+    t1, _ = np.linalg.lstsq(A, b, rcond=None)[0]
+    return anchor1_x + A[0, 0] * t1, A[1, 0] * t1
+
+
+def benchmark(tag_counts=(1, 100, 10000), anchor1_x=-1.8, anchor2_x=1.8):
+    """Print the per-solve cost of the lstsq, closed-form and batched paths"""
+    rng = np.random.default_rng(0)
+    print(f"{'tags':>6} {'lstsq':>10} {'closed':>10} {'batch':>10}  [us per solve]")
+    for n in tag_counts:
+        az1 = rng.uniform(5, 60, n)
+        az2 = rng.uniform(-60, -5, n)
+        el1 = rng.uniform(-10, 10, n)
+        el2 = rng.uniform(-10, 10, n)
+        args = list(zip(az1.tolist(), el1.tolist(), az2.tolist(), el2.tolist()))
+        repeats = max(1, 10000 // n)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for a1, e1, a2, e2 in args:
+                _lstsq_reference(anchor1_x, anchor2_x, a1, e1, a2, e2)
+        lstsq_us = (time.perf_counter() - start) / (repeats * n) * 1e6
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for a1, e1, a2, e2 in args:
+                triangulate_pair(anchor1_x, anchor2_x, a1, e1, a2, e2)
+        closed_us = (time.perf_counter() - start) / (repeats * n) * 1e6
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            triangulate_batch(anchor1_x, anchor2_x, az1, el1, az2, el2)
+        batch_us = (time.perf_counter() - start) / (repeats * n) * 1e6
+
+        print(f"{n:>6} {lstsq_us:>10.2f} {closed_us:>10.2f} {batch_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -8,7 +8,16 @@ from threading import Thread, Lock, Event
 from grid_visualizer import GridVisualizer
 from dataclasses import dataclass, field
 from parsed_data import ParsedDataBLE, ParsedDataRadar, parse_string
-from typing import Tuple, Optional, Dict, Deque
+from triangulation import AnchorPose
+from tracking import SmoothingConfig
+from fusion import FusionEngine, FusionConfig, run_ble, run_radar, run_ble_shm, run_radar_shm, run_scheduler
+from zones import ZoneIndex
+from channels import BoundedChannel, DROP_OLDEST
+from tag_registry import TagRegistry
+from radar_array import RadarPose
+from scene_stream import SceneStream
+from heatmap import OccupancyHeatmap
+from typing import Optional, Dict, Deque
 import numpy as np
 import time
 # Configuration constants
@@ -21,6 +30,17 @@ anchor1_dist = -1.8
 anchor2_dist = -anchor1_dist
 radar_dist = -0.7
 
+# Anchor poses in world coordinates, in station order
+ANCHOR_POSES = [
+    AnchorPose(x=anchor1_dist, y=0, height=0, yaw=0),
+    AnchorPose(x=anchor2_dist, y=0, height=0, yaw=0),
+]
+
+# Radar poses in world coordinates, one rad.py process each (see "radars" in radar/config.json)
+RADAR_POSES = [
+    RadarPose(x=radar_dist, y=0, yaw=0),
+]
+
 rectw = 90
 recth = 40
 
@@ -31,18 +51,55 @@ azlw = 1
 
 RADAR_POINTS_TRESHOLD = 2
 
-# Smoothing configuration
-ANGLE_SMOOTHING_WINDOW = 2  # Number of samples for moving average
-POSITION_SMOOTHING_WINDOW = 2
-SMOOTHING_WEIGHT = 0.3  # Weight for exponential smoothing (0-1)
+# Optional zones file (see zones.py), the keepout box above is used without it
+ZONES_FILE = "zones.json"
 
-@dataclass
-class SmoothingConfig:
-    enable_angle_smoothing: bool = True
-    enable_position_smoothing: bool = True
-    angle_window_size: int = ANGLE_SMOOTHING_WINDOW
-    position_window_size: int = POSITION_SMOOTHING_WINDOW
-    smoothing_weight: float = SMOOTHING_WEIGHT
+# Extra arguments for ble.py, e.g. ["--record", "session.bin"] or ["--replay", "session.bin"]
+BLE_ARGS = []
+
+# How the sensor processes hand data over: "pipe" (text lines on stdout) or "shm" (shared-memory rings)
+SENSOR_TRANSPORT = "pipe"
+
+# Fused scene evaluations per second, None to fuse on every sensor report
+FUSION_TICK_RATE = 20.0
+
+# Thread -> Tk channels. Draw commands coalesce per object and block the sensor threads
+# when DRAW_QUEUE_SIZE objects are pending; radar frames keep only the newest and are
+# skipped once older than DISPLAY_MAX_LAG seconds
+DRAW_QUEUE_SIZE = 512
+RADAR_FRAME_QUEUE_SIZE = 2
+DISPLAY_MAX_LAG = 0.2
+
+# Render only when something changed (producers wake the Tk loop) instead of polling every frame
+RENDER_ON_WAKEUP = True
+
+# "tk" for the window, or "raster" to render offscreen without a display and write
+# FRAME_RATE frames per second to FRAME_OUTPUT ("frames/%06d.ppm", a file or pipe, or "-")
+UI_BACKEND = "tk"
+FRAME_OUTPUT = None
+FRAME_RATE = 10
+
+# Heatmap of radar detections under the grid, fading with HEATMAP_HALF_LIFE seconds
+# and redrawn at most every HEATMAP_REFRESH seconds (None to disable); a cell with
+# HEATMAP_SATURATION detections is drawn in full color
+HEATMAP_HALF_LIFE = 120.0
+HEATMAP_CELL_SIZE = 0.1
+HEATMAP_REFRESH = 1.0
+HEATMAP_SATURATION = 20.0
+
+# Serve the live scene to browsers / remote viewers on this port (None to disable);
+# SCENE_STREAM_HOST "0.0.0.0" accepts viewers from other machines
+SCENE_STREAM_PORT = None
+SCENE_STREAM_HOST = "127.0.0.1"
+
+# Canvas overlay with render FPS, tick period, draw queue depth and p95 render time
+RENDER_OVERLAY = False
+
+# Tags without an entry in tag_configs are picked up and drawn when first seen
+AUTO_REGISTER_TAGS = True
+TAG_PALETTE = ["dodgerblue", "firebrick1", "green3", "orange", "purple1", "gold", "turquoise", "HotPink1"]
+
+smoothing_config = SmoothingConfig()
 
 @dataclass
 class TagConfig:
@@ -53,103 +110,42 @@ class TagConfig:
 @dataclass
 class UI_elements:
     viz: Optional[GridVisualizer] = None
-    # Azimuth TAG, ANCHOR
-    azimuth1_1: Optional[object] = None
-    azimuth1_2: Optional[object] = None
-    azimuth2_1: Optional[object] = None
-    azimuth2_2: Optional[object] = None
-    tag1: Optional[object] = None
-    tag2: Optional[object] = None
+    engine: Optional[FusionEngine] = None
+    tags: TagRegistry = field(default_factory=lambda: TagRegistry(len(ANCHOR_POSES)))
+    # Canvas objects per tag slot: the tag point and one azimuth line per anchor
+    tag_points: list = field(default_factory=list)
+    tag_lines: list = field(default_factory=list)
 
     keepout: Optional[object] = None
     radarDetected: Optional[object] = None
-    tag1Detected: Optional[object] = None
-    tag2Detected: Optional[object] = None
+    tagsDetected: Optional[object] = None
+    tagsDetectedText: str = ""
     safeDetected: Optional[object] = None
 
-    tag1Radiusm: float = 0
-    tag2Radiusm: float = 0
-
-    radarPoints: list[Optional[object]] = field(default_factory=lambda: [None, None])
-    
-    elevation1_1: float = 0
-    elevation1_2: float = 0
-    elevation2_1: float = 0
-    elevation2_2: float = 0
-    
-    # Smoothing buffers
-    angle_buffers: Dict[str, Deque[float]] = None
-    position_buffers: Dict[str, Deque[Tuple[float, float]]] = None
+    radar_frames: BoundedChannel = field(default_factory=lambda: BoundedChannel(
+        "radar frames", RADAR_FRAME_QUEUE_SIZE, DROP_OLDEST, max_lag=DISPLAY_MAX_LAG))
+    heatmap: OccupancyHeatmap = field(default_factory=lambda: OccupancyHeatmap(
+        -gwm/2, 0, gwm, ghm, HEATMAP_CELL_SIZE, HEATMAP_HALF_LIFE))
+    heatmap_drawn: float = 0.0
+    heatmap_shown: bool = False
     
     # Thread control
     stop_event: Event = None
     
     def __post_init__(self):
-        self.angle_buffers = {
-            'az1_1': deque(maxlen=ANGLE_SMOOTHING_WINDOW),
-            'az1_2': deque(maxlen=ANGLE_SMOOTHING_WINDOW),
-            'az2_1': deque(maxlen=ANGLE_SMOOTHING_WINDOW),
-            'az2_2': deque(maxlen=ANGLE_SMOOTHING_WINDOW),
-        }
-        self.position_buffers = {
-            'tag1': deque(maxlen=POSITION_SMOOTHING_WINDOW),
-            'tag2': deque(maxlen=POSITION_SMOOTHING_WINDOW),
-        }
         self.stop_event = Event()
 
-class SmoothingFilter:
-    @staticmethod
-    def smooth_angle(value: float, buffer: deque, config: SmoothingConfig) -> float:
-        if not config.enable_angle_smoothing:
-            return value
-            
-        buffer.append(value)
-        if len(buffer) < 2:
-            return value
-            
-        # Exponential moving average
-        return (config.smoothing_weight * value + 
-                (1 - config.smoothing_weight) * sum(buffer)/len(buffer))
-
-    @staticmethod
-    def smooth_position(x: float, y: float, buffer: deque, config: SmoothingConfig) -> Tuple[float, float]:
-        if not config.enable_position_smoothing:
-            return x, y
-            
-        buffer.append((x, y))
-        if len(buffer) < 2:
-            return x, y
-            
-        # Average x and y separately
-        smooth_x = config.smoothing_weight * x + (1 - config.smoothing_weight) * np.mean([p[0] for p in buffer])
-        smooth_y = config.smoothing_weight * y + (1 - config.smoothing_weight) * np.mean([p[1] for p in buffer])
-        return smooth_x, smooth_y
-
 ui_elements = UI_elements()
-smoothing_config = SmoothingConfig()
 tag_configs = {
     1: TagConfig(enabled=True, color="dodgerblue", name="Tag 1"),
     2: TagConfig(enabled=True, color="firebrick1", name="Tag 2")
 }
 
-def check_points_in_box(cords_x, cords_y, width, height, min_points):
-    half_width = width / 2
-    points_in_box = 0
-    
-    for i in range(0, len(parsed_data.x_coords)):
-        # Get coordinates from the visualization object
-        x = parsed_data.x_coords[i]
-        y = parsed_data.y_coords[i]
-        
-        # Check if point is within box boundaries
-        if abs(x) <= half_width and 0 <= y <= height:
-            points_in_box += 1
-            
-        # Early exit if we've found enough points
-        if points_in_box >= min_points:
-            return True
-            
-    return False
+def tag_config(tag: int) -> TagConfig:
+    config = tag_configs.get(tag)
+    if config is None:
+        config = tag_configs[tag] = TagConfig(enabled=AUTO_REGISTER_TAGS, color=TAG_PALETTE[tag % len(TAG_PALETTE)], name=f"Tag {tag}")
+    return config
 
 def circle_intersects_box(circle_x, circle_y, radius, box_height, box_width):
     """
@@ -183,310 +179,131 @@ def circle_intersects_box(circle_x, circle_y, radius, box_height, box_width):
     # If distance² is less than or equal to radius², there is intersection
     return distance_squared <= (radius * radius)
 
-def calculate_tag_position(
-    anchor_distance: float,
-    azimuth1: float,
-    elevation1: float,
-    azimuth2: float,
-    elevation2: float
-) -> Tuple[float, float, float]:
+def create_tag_elements(slot: int):
+    """Canvas objects for a newly registered tag slot (Tk thread)"""
+    config = tag_config(int(ui_elements.tags.tags[slot]))
+    ui_elements.tag_points.append(ui_elements.viz.add_point(0, 100, 0, config.color, config.name))
+    ui_elements.tag_lines.append([ui_elements.viz.add_line(pose.x, 0, 0, config.color, "0°", azlw)
+                                  for pose in ANCHOR_POSES])
+
+def update_tags():
     """
-    Calculate the 2D position of a BLE tag using data from two anchors.
-    
-    Angle Convention:
-    - Azimuth: 0° points up (+Y), 90° points right (+X), -90° points left (-X)
-    - Elevation: 0° is horizontal, 90° is straight up
-    
-    Args:
-        anchor_distance: Distance between anchors in meters (along X axis)
-        azimuth1: Azimuth angle from first anchor in degrees
-        elevation1: Elevation angle from first anchor in degrees
-        azimuth2: Azimuth angle from second anchor in degrees
-        elevation2: Elevation angle from second anchor in degrees
-    
-    Returns:
-        Tuple containing:
-        - x: X coordinate relative to midpoint between anchors (in meters)
-        - y: Y coordinate (in meters)
-        - uncertainty_radius: Estimated uncertainty radius based on vector differences
+    Draw every tag whose bearings or position changed, in one pass over the registry
+    (runs every render tick). True while extrapolated tags are still moving.
     """
-    # Convert angles to radians
-    az1_rad = math.radians(azimuth1)
-    az2_rad = math.radians(azimuth2)
-    el1_rad = math.radians(elevation1)
-    el2_rad = math.radians(elevation2)
-    
-    # Position anchors at (-distance/2, 0) and (distance/2, 0)
-    anchor1_x = -anchor_distance / 2
-    anchor2_x = anchor_distance / 2
-    
-    # Calculate 3D direction vectors from each anchor
-    vec1_x = math.sin(az1_rad) * math.cos(el1_rad)
-    vec1_y = math.cos(az1_rad) * math.cos(el1_rad)
-    vec1_z = math.sin(el1_rad)
-    
-    vec2_x = math.sin(az2_rad) * math.cos(el2_rad)
-    vec2_y = math.cos(az2_rad) * math.cos(el2_rad)
-    vec2_z = math.sin(el2_rad)
-    
-    # Use least squares to find intersection point (2D)
-    A = np.array([
-        [vec1_x, -vec2_x],
-        [vec1_y, -vec2_y]
-    ])
-    b = np.array([anchor2_x - anchor1_x, 0])
-    
-    try:
-        # Solve for scaling factors
-        t1, t2 = np.linalg.lstsq(A, b, rcond=None)[0]
-        
-        # Calculate intersection point from first anchor
-        x = anchor1_x + vec1_x * t1
-        y = vec1_y * t1
-        
-        # Calculate uncertainty based on the difference between 3D vectors
-        # Dot product of normalized vectors gives cosine of angle between them
-        vec1_norm = math.sqrt(vec1_x*vec1_x + vec1_y*vec1_y + vec1_z*vec1_z)
-        vec2_norm = math.sqrt(vec2_x*vec2_x + vec2_y*vec2_y + vec2_z*vec2_z)
-        
-        dot_product = (vec1_x*vec2_x + vec1_y*vec2_y + vec1_z*vec2_z) / (vec1_norm * vec2_norm)
-        # Clamp dot product to [-1, 1] to avoid numerical errors
-        dot_product = max(min(dot_product, 1), -1)
-        angle_between_vectors = math.acos(dot_product)
-        
-        # Scale uncertainty based on:
-        # 1. The angle between vectors (more angle = more uncertainty)
-        # 2. Distance from the anchors (further = more uncertainty)
-        base_uncertainty = 0.2  # minimum uncertainty in meters
-        distance_from_center = math.sqrt(x*x + y*y)
-        angle_factor = math.sin(angle_between_vectors/2)  # 0 when vectors parallel, 1 when perpendicular
-        
-        uncertainty_radius = base_uncertainty + (angle_factor * distance_from_center) /2 # divide by 2 because i said so
-        
-        return x, y, uncertainty_radius
-        
-    except np.linalg.LinAlgError:
-        # Handle case where lines are parallel or calculation fails
-        return None, None, None
-
-
-def update_tag_1_pos():
-    if not tag_configs[1].enabled or ui_elements.tag1 is None:
-        return
-        
-    x, y, radius = calculate_tag_position(
-        anchor2_dist-anchor1_dist,
-        ui_elements.azimuth1_1.angle,
-        ui_elements.elevation1_1,
-        ui_elements.azimuth1_2.angle,
-        ui_elements.elevation1_2)
-        
-    if x is not None and y is not None:
-        x, y = SmoothingFilter.smooth_position(
-            x, y, 
-            ui_elements.position_buffers['tag1'],
-            smoothing_config
-        )
-        ui_elements.tag1.x = x
-        ui_elements.tag1.y = y
-        ui_elements.tag1.radius_pixels = radius * pixels_per_meter
-        ui_elements.tag1Radiusm = radius
-        ui_elements.viz.update_object(ui_elements.tag1)
-
-def update_tag_2_pos():
-    if not tag_configs[2].enabled or ui_elements.tag2 is None:
+    registry = ui_elements.tags
+    viz = ui_elements.viz
+    while len(ui_elements.tag_points) < registry.count:
+        create_tag_elements(len(ui_elements.tag_points))
+
+    slots, stations, angles = registry.take_angles()
+    for slot, station, angle in zip(slots.tolist(), stations.tolist(), angles.tolist()):
+        line = ui_elements.tag_lines[slot][station - 1]
+        line.angle = angle
+        line.text = f"{angle:.1f}°"
+        viz.update_object(line)
+
+    slots, positions, radii = registry.take_moved(time.monotonic(), smoothing_config.max_extrapolation)
+    for slot, (x, y), radius in zip(slots.tolist(), positions.tolist(), radii.tolist()):
+        point = ui_elements.tag_points[slot]
+        point.x = x
+        point.y = y
+        point.radius_pixels = radius * pixels_per_meter
+        viz.update_object(point)
+
+    show_tags_in()
+    return len(slots) > 0
+
+def draw_radar_frames():
+    """Show the newest pending radar frame (runs every render tick)"""
+    frames = ui_elements.radar_frames.drain()
+    if frames:
+        xs, ys = frames[-1]
+        ui_elements.viz.set_point_cloud("radar", xs, ys, "orange red", 5)
+
+def draw_heatmap():
+    """
+    Redraw the detection heatmap every HEATMAP_REFRESH seconds while it is visible
+    (runs every render tick); once it has faded the layer is cleared and the tick
+    loop may idle until new radar frames wake it
+    """
+    heatmap = ui_elements.heatmap
+    now = time.monotonic()
+    if not heatmap.visible(now, HEATMAP_SATURATION):
+        if ui_elements.heatmap_shown:
+            ui_elements.viz.set_raster_layer("heatmap", None, heatmap.x, heatmap.y, heatmap.width, heatmap.height)
+            ui_elements.heatmap_shown = False
+        return False
+    if now - ui_elements.heatmap_drawn >= HEATMAP_REFRESH:
+        ui_elements.heatmap_drawn = now
+        ui_elements.heatmap_shown = True
+        ui_elements.viz.set_raster_layer("heatmap", heatmap.render(now, HEATMAP_SATURATION), heatmap.x, heatmap.y,
+                                         heatmap.width, heatmap.height)
+    return True  # keep ticking while it fades
+
+def print_channel_stats():
+    for stats in ui_elements.viz.channel_stats():
+        print(f"{stats.name}: depth {stats.depth}/{stats.capacity} (max {stats.max_depth}), "
+              f"{stats.dropped} dropped, {stats.overflowed} overflowed, {stats.coalesced} coalesced, "
+              f"lag {stats.last_lag * 1000:.1f} ms (max {stats.max_lag * 1000:.1f} ms)")
+    stats = ui_elements.viz.get_update_stats()
+    print(f"draw: {stats.requested} updates requested, {stats.coalesced} coalesced, "
+          f"{stats.applied} applied in {stats.ticks} ticks (max {stats.max_tick} per tick)")
+    stats = ui_elements.viz.get_render_stats()
+    print(f"render: {stats.fps:.0f} fps, tick {stats.interval_ms:.0f} ms, render p95 {stats.p95_ms:.1f} ms "
+          f"(max {stats.max_ms:.1f} ms), {stats.deferred} ticks over budget")
+
+def print_clock_stats():
+    for stats in ui_elements.engine.timebase.stats():
+        print(f"{stats.name}: {stats.rate:,.0f} Hz, drift {stats.drift_ppm:+.1f} ppm, jitter {stats.jitter * 1000:.2f} ms, "
+              f"latency {stats.latency * 1000:.1f} ms (max {stats.max_latency * 1000:.1f} ms), "
+              f"{stats.resets} resets")
+
+def show_banner(attr, visible, x, text, color):
+    banner = getattr(ui_elements, attr)
+    if visible and banner is None:
+        setattr(ui_elements, attr, ui_elements.viz.add_text(x, ghm-1, text, None, color, 40))
+    elif not visible and banner is not None:
+        ui_elements.viz.remove_object(banner)
+        setattr(ui_elements, attr, None)
+
+def show_tags_in():
+    """One banner naming the tags inside, or counting them once there are many"""
+    inside = ui_elements.tags.inside_tags()
+    if len(inside) > 2:
+        text = f"{len(inside)} tags IN!"
+    else:
+        text = " ".join(tag_config(tag).name for tag in inside) + " IN!"
+    if text == ui_elements.tagsDetectedText:
         return
-        
-    x, y, radius = calculate_tag_position(
-        anchor2_dist-anchor1_dist,
-        ui_elements.azimuth2_1.angle,
-        ui_elements.elevation2_1,
-        ui_elements.azimuth2_2.angle,
-        ui_elements.elevation2_2)
-        
-    if x is not None and y is not None:
-        x, y = SmoothingFilter.smooth_position(
-            x, y,
-            ui_elements.position_buffers['tag2'],
-            smoothing_config
-        )
-        ui_elements.tag2.x = x
-        ui_elements.tag2.y = y
-        ui_elements.tag2.radius_pixels = radius * pixels_per_meter
-        ui_elements.tag2Radiusm = radius
-        ui_elements.viz.update_object(ui_elements.tag2)
-
-def update_ble(parsed_data):
-    if str(parsed_data.tag) == "1" and tag_configs[1].enabled:
-        # TAG 1
-        if str(parsed_data.station) == "1" and ui_elements.azimuth1_1 is not None:
-            smooth_angle = SmoothingFilter.smooth_angle(
-                parsed_data.azimuth,
-                ui_elements.angle_buffers['az1_1'],
-                smoothing_config
-            )
-            ui_elements.azimuth1_1.angle = smooth_angle
-            ui_elements.azimuth1_1.text = f"{smooth_angle:.1f}°"
-            ui_elements.elevation1_1 = parsed_data.elevation
-            ui_elements.viz.update_object(ui_elements.azimuth1_1)
-        elif ui_elements.azimuth1_2 is not None:
-            smooth_angle = SmoothingFilter.smooth_angle(
-                parsed_data.azimuth,
-                ui_elements.angle_buffers['az1_2'],
-                smoothing_config
-            )
-            ui_elements.azimuth1_2.angle = smooth_angle
-            ui_elements.azimuth1_2.text = f"{smooth_angle:.1f}°"
-            ui_elements.elevation1_2 = parsed_data.elevation
-            ui_elements.viz.update_object(ui_elements.azimuth1_2)
-        update_tag_1_pos()
-        # detected =  circle_intersects_box(ui_elements.tag1.x, ui_elements.tag1.y, ui_elements.tag1Radiusm, kpthm+4, kpthwm+4)
-        detected = ui_elements.tag1.y < 2.5
-        if detected and ui_elements.tag1Detected == None:
-                    ui_elements.tag1Detected = ui_elements.viz.add_text(gwm+2, ghm-1,   "Tag 1 IN!", None, "green2", 40)
-        if not detected and ui_elements.tag1Detected != None:
-                ui_elements.viz.remove_object(ui_elements.tag1Detected)
-                ui_elements.tag1Detected = None
-    elif str(parsed_data.tag) == "2" and tag_configs[2].enabled:
-        # TAG 2
-        if str(parsed_data.station) == "1" and ui_elements.azimuth2_1 is not None:
-            smooth_angle = SmoothingFilter.smooth_angle(
-                parsed_data.azimuth,
-                ui_elements.angle_buffers['az2_1'],
-                smoothing_config
-            )
-            ui_elements.azimuth2_1.angle = smooth_angle
-            ui_elements.azimuth2_1.text = f"{smooth_angle:.1f}°"
-            ui_elements.elevation2_1 = parsed_data.elevation
-            ui_elements.viz.update_object(ui_elements.azimuth2_1)
-        elif ui_elements.azimuth2_2 is not None:
-            smooth_angle = SmoothingFilter.smooth_angle(
-                parsed_data.azimuth,
-                ui_elements.angle_buffers['az2_2'],
-                smoothing_config
-            )
-            ui_elements.azimuth2_2.angle = smooth_angle
-            ui_elements.azimuth2_2.text = f"{smooth_angle:.1f}°"
-            ui_elements.elevation2_2 = parsed_data.elevation
-            ui_elements.viz.update_object(ui_elements.azimuth2_2)
-        update_tag_2_pos()
-        # detected =  circle_intersects_box(ui_elements.tag2.x, ui_elements.tag2.y, ui_elements.tag2Radiusm, kpthm+4, kpthwm+4)
-        detected = ui_elements.tag2.y < 2.5
-        if detected and ui_elements.tag2Detected == None:
-                    ui_elements.tag2Detected = ui_elements.viz.add_text(gwm+6, ghm-1,   "Tag 2 IN!", None, "green2", 40)
-        if not detected and ui_elements.tag2Detected != None:
-                ui_elements.viz.remove_object(ui_elements.tag2Detected)
-                ui_elements.tag2Detected = None
-
-    detected = ((ui_elements.tag1Detected != None) or (ui_elements.tag2Detected != None)) and (ui_elements.radarDetected != None)
-    if detected and ui_elements.safeDetected == None:
-        ui_elements.safeDetected = ui_elements.viz.add_text(gwm+14, ghm-1, "   Safe  ", None, "cyan2", 40)
-    if not detected and ui_elements.safeDetected != None:
-        ui_elements.viz.remove_object(ui_elements.safeDetected)
-        ui_elements.safeDetected = None
-        
-def update_radar(parsed_data):
-    # delete old points
-    for point in ui_elements.radarPoints:
-        ui_elements.viz.remove_object(point)
-    
-    # Counter for points in box
-    points_in_box = 0
-    half_width = kpthwm / 2
-    
-    for i in range(0, len(parsed_data.x_coords)):
-        # Skip symmetrical points near y=0
-        if (abs(parsed_data.y_coords[i]) < 0.1 and 
-            any(abs(parsed_data.x_coords[i] + parsed_data.x_coords[j]) < 0.15 
-                for j in range(len(parsed_data.x_coords)) 
-                if j != i and abs(parsed_data.y_coords[j]) < 0.1)):
-            continue
-        
-        # Check if point is in box before adding it
-        if abs(parsed_data.x_coords[i]) <= half_width and 0 <= parsed_data.y_coords[i] <= kpthm:
-            points_in_box += 1
-            
-        ui_elements.radarPoints.append(
-            ui_elements.viz.add_point(
-                parsed_data.x_coords[i], 
-                parsed_data.y_coords[i], 
-                5, 
-                "orange red", 
-                ""
-            )
-        )
-    # print(points_in_box)
-    if points_in_box >= RADAR_POINTS_TRESHOLD and ui_elements.radarDetected == None:
-        ui_elements.radarDetected = ui_elements.viz.add_text(gwm+10, ghm-1, "  Radar! ", None, "red2", 40)
-
-    if points_in_box <= 1 and ui_elements.radarDetected != None:
-            ui_elements.viz.remove_object(ui_elements.radarDetected)
-            ui_elements.radarDetected = None
-
-
-
-def run_radar():
-    parser = ParsedDataRadar()
-    process = subprocess.Popen(
-        ['python', '-u', './radar/rad.py'],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1
-    )
-    try:
-        for line in process.stdout:
-            line = line.strip()
-            if "Connected" in line:
-                print("Radar configured succesfully")
-                continue
-            if line:
-                if parser.parse_string(line):
-                    update_radar(parser)
-    finally:
-        traceback.print_exc()
-        process.terminate()
-        process.wait()
-
-
-def run_ble():
-    process = subprocess.Popen(
-        ['python', '-u', './ble/ble.py'],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1
-    )
-    try:
-        while not ui_elements.stop_event.is_set():
-            stdout_line = process.stdout.readline()
-            if not stdout_line:
-                break
-            if "Station" in stdout_line:
-                parsed_data = parse_string(stdout_line)
-                if parsed_data:
-                    update_ble(parsed_data)
-    finally:
-        traceback.print_exc()
-        process.terminate()
-        process.wait()
+    show_banner("tagsDetected", False, 0, "", "")
+    ui_elements.tagsDetectedText = text
+    show_banner("tagsDetected", bool(inside), gwm+4, text, "green2")
 
-def create_ui_elements_for_tag(tag_num: int):
-    if not tag_configs[tag_num].enabled:
+def on_fusion_event(event):
+    """Record FusionEngine events in the tag registry and radar channel, the render tick draws them"""
+    if event.tag is not None and not tag_config(event.tag).enabled:
         return
-        
-    if tag_num == 1:
-        ui_elements.azimuth1_1 = ui_elements.viz.add_line(anchor1_dist, 0, 25, "cyan", "", azlw)
-        ui_elements.azimuth1_2 = ui_elements.viz.add_line(anchor2_dist, 0, -25, "cyan", "", azlw)
-        ui_elements.tag1 = ui_elements.viz.add_point(0, 100, 0, tag_configs[1].color, tag_configs[1].name)
-        ui_elements.azimuth1_1.text = "0°"
-        ui_elements.azimuth1_2.text = "0°"
-    else:
-        ui_elements.azimuth2_1 = ui_elements.viz.add_line(anchor1_dist, 0, 10, "HotPink1", "", azlw)
-        ui_elements.azimuth2_2 = ui_elements.viz.add_line(anchor2_dist, 0, -30, "HotPink1", "", azlw)
-        ui_elements.tag2 = ui_elements.viz.add_point(0, 100, 0, tag_configs[2].color, tag_configs[2].name)
-        ui_elements.azimuth2_1.text = "0°"
-        ui_elements.azimuth2_2.text = "0°"
+
+    if event.kind == "angle":
+        tag, station = event.key
+        ui_elements.tags.set_angle(tag, station, event.value)
+    elif event.kind == "tag":
+        x, y, radius = event.value
+        ui_elements.tags.set_position(event.tag, event.t, x, y, radius, ui_elements.engine.tag_velocity(event.tag))
+    elif event.kind == "radar":
+        ui_elements.radar_frames.put(event.value)
+        if HEATMAP_REFRESH:
+            ui_elements.heatmap.add(*event.value, event.t)
+    elif event.kind == "decision":
+        if event.key == "tag_in":
+            ui_elements.tags.set_inside(event.tag, event.value)
+        elif event.key == "radar":
+            show_banner("radarDetected", event.value, gwm+10, "  Radar! ", "red2")
+        elif event.key == "safe":
+            show_banner("safeDetected", event.value, gwm+14, "   Safe  ", "cyan2")
+    # Registry and radar channel writes are picked up by tick callbacks, not draw commands
+    ui_elements.viz.wake()
 
 def main():
     ui_elements.viz = GridVisualizer(
@@ -494,13 +311,24 @@ def main():
         height_meters=ghm,
         background_canvas="#6F6F6F",
         background_ui="#353535",
-        pixels_per_meter=pixels_per_meter)
+        pixels_per_meter=pixels_per_meter,
+        command_queue_size=DRAW_QUEUE_SIZE,
+        show_overlay=RENDER_OVERLAY,
+        wakeup=RENDER_ON_WAKEUP,
+        backend=UI_BACKEND,
+        frame_output=FRAME_OUTPUT,
+        frame_rate=FRAME_RATE)
+    ui_elements.viz.add_channel(ui_elements.radar_frames)
+    if SCENE_STREAM_PORT is not None:
+        SceneStream(ui_elements.viz, SCENE_STREAM_HOST, SCENE_STREAM_PORT).start()
 
     # BLE anchors
     rect1 = ui_elements.viz.add_rectangle(anchor1_dist, -recth/pixels_per_meter/2, rectw, recth, "yellow", None, 1, "Anchor 1")
     rect2 = ui_elements.viz.add_rectangle(anchor2_dist, -recth/pixels_per_meter/2, rectw, recth, "yellow", None, 1, "Anchor 2")
-    # Radar
-    rect3 = ui_elements.viz.add_rectangle(radar_dist, -recth/pixels_per_meter/2, rectw, recth, "red", None, 1, "Radar") #/2*3 Y axis to put it under ble
+    # Radars
+    for i, pose in enumerate(RADAR_POSES):
+        label = "Radar" if len(RADAR_POSES) == 1 else f"Radar {i + 1}"
+        ui_elements.viz.add_rectangle(pose.x, pose.y - recth/pixels_per_meter/2, rectw, recth, "red", None, 1, label) #/2*3 Y axis to put it under ble
     # Radar keepout
     ui_elements.keepout = ui_elements.viz.add_rectangle(radar_dist, kpthm/2, pixels_per_meter*kpthwm, pixels_per_meter*kpthm, None, "Red", 1)
 
@@ -511,21 +339,36 @@ def main():
     # ui_elements.viz.add_text(gwm+10, ghm-1, "  Radar! ", None, "red2", 40)
     # ui_elements.viz.add_text(gwm+14, ghm-1, "   Safe  ", None, "cyan2", 40)
 
-    # Create UI elements for enabled tags
-    create_ui_elements_for_tag(1)
-    create_ui_elements_for_tag(2)
-
-    # Update initial positions for enabled tags
-    if tag_configs[1].enabled:
-        update_tag_1_pos()
-    if tag_configs[2].enabled:
-        update_tag_2_pos()
+    ui_elements.engine = FusionEngine(FusionConfig(
+        anchor_poses=ANCHOR_POSES,
+        smoothing=smoothing_config,
+        keepout_width=kpthwm,
+        keepout_height=kpthm,
+        radar_points_threshold=RADAR_POINTS_TRESHOLD,
+        zones=ZoneIndex.load(ZONES_FILE) if os.path.exists(ZONES_FILE) else None,
+        radar_poses=RADAR_POSES,
+        tick_rate=FUSION_TICK_RATE,
+        tags=None if AUTO_REGISTER_TAGS else {tag for tag, config in tag_configs.items() if config.enabled}))
+    ui_elements.engine.subscribe(on_fusion_event)
+    ui_elements.viz.add_tick_callback(update_tags)
+    ui_elements.viz.add_tick_callback(draw_radar_frames)
+    if HEATMAP_REFRESH:
+        ui_elements.viz.add_tick_callback(draw_heatmap)
+
+    if SENSOR_TRANSPORT == "shm":
+        ble_reader, radar_reader = run_ble_shm, run_radar_shm
+    else:
+        ble_reader, radar_reader = run_ble, run_radar
 
-    ble_thread = Thread(target=run_ble, daemon=False)
+    ble_thread = Thread(target=ble_reader, args=(ui_elements.engine, ui_elements.stop_event, BLE_ARGS), daemon=False)
     ble_thread.start()
 
-    radar_thread = Thread(target=run_radar, daemon=False)
-    radar_thread.start()
+    # One reader (and rad.py process) per radar, they configure and stream in parallel
+    for radar in range(len(RADAR_POSES)):
+        Thread(target=radar_reader, args=(ui_elements.engine, ui_elements.stop_event, radar), daemon=False).start()
+
+    if FUSION_TICK_RATE:
+        Thread(target=run_scheduler, args=(ui_elements.engine, ui_elements.stop_event), daemon=True).start()
 
     try:
         ui_elements.viz.start()
@@ -534,6 +377,8 @@ def main():
         ui_elements.stop_event.set()
         # Wait for threads to finish
         ble_thread.join(timeout=2.0)
+        print_channel_stats()
+        print_clock_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Polygon and circle zones with a uniform grid index.
+
+ZoneIndex.contains(xs, ys) answers "which zones contain each of these N points"
+for a whole frame at once. Every grid cell stores the (padded) list of zones
+whose bounding box overlaps it, so a point is only tested exactly against the
+few zones near it and the cost grows with points, not with zones x points.
+
+Zones file format (JSON):
+    {"cell_size": 0.5,
+     "zones": [
+        {"name": "keepout", "role": "keepout", "type": "polygon",
+         "points": [[-1, 0], [1, 0], [1, 2], [-1, 2]]},
+        {"name": "door", "role": "presence", "type": "circle",
+         "center": [0, 1], "radius": 0.5}]}
+"""
+import json
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import numpy as np
+
+CELL_SIZE = 0.5  # meters
+ROLE_KEEPOUT = "keepout"  # radar detections inside count as an intrusion
+ROLE_PRESENCE = "presence"  # tags inside count as present
+
+
+@dataclass
+class Zone:
+    name: str
+    role: str = ROLE_KEEPOUT
+    points: Optional[List[Tuple[float, float]]] = None  # polygon vertices
+    center: Optional[Tuple[float, float]] = None  # circle
+    radius: float = 0.0
+
+    @classmethod
+    def rectangle(cls, name, x_min, y_min, x_max, y_max, role=ROLE_KEEPOUT):
+        return cls(name, role, points=[(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)])
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("type", "polygon") == "circle":
+            return cls(data["name"], data.get("role", ROLE_KEEPOUT),
+                       center=tuple(data["center"]), radius=float(data["radius"]))
+        return cls(data["name"], data.get("role", ROLE_KEEPOUT),
+                   points=[tuple(p) for p in data["points"]])
+
+    @property
+    def is_circle(self):
+        return self.center is not None
+
+    def bounds(self):
+        if self.is_circle:
+            cx, cy = self.center
+            return cx - self.radius, cy - self.radius, cx + self.radius, cy + self.radius
+        xs = [p[0] for p in self.points]
+        ys = [p[1] for p in self.points]
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+class ZoneIndex:
+    def __init__(self, zones: List[Zone], cell_size: float = CELL_SIZE):
+        self.zones = list(zones)
+        self.names = [z.name for z in self.zones]
+        self.roles = np.array([z.role for z in self.zones])
+        self.cell_size = cell_size
+        count = len(self.zones)
+
+        self.is_circle = np.array([z.is_circle for z in self.zones], dtype=bool)
+        self.centers = np.array([z.center if z.is_circle else (0.0, 0.0) for z in self.zones], dtype=float).reshape(count, 2)
+        self.radii2 = np.array([z.radius ** 2 for z in self.zones], dtype=float)
+
+        # Polygon edges padded to the longest polygon; NaN edges never cross a ray
+        max_edges = max([len(z.points) for z in self.zones if not z.is_circle] + [1])
+        self.edges = np.full((count, max_edges, 4), np.nan)
+        for i, z in enumerate(self.zones):
+            if z.is_circle:
+                continue
+            p = np.array(z.points, dtype=float)
+            self.edges[i, :len(p), :2] = p
+            self.edges[i, :len(p), 2:] = np.roll(p, -1, axis=0)
+
+        bounds = np.array([z.bounds() for z in self.zones], dtype=float).reshape(count, 4)
+        if count:
+            self.origin = bounds[:, :2].min(axis=0)
+            extent = bounds[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            extent = np.zeros(2)
+        self.shape = np.maximum(np.ceil(extent / cell_size).astype(int), 1)
+
+        # Cell -> candidate zone ids, padded with -1
+        cells = [[] for _ in range(int(self.shape[0] * self.shape[1]))]
+        for i, (x0, y0, x1, y1) in enumerate(bounds):
+            c0 = self._cell_coords(np.array([x0, y0]))
+            c1 = self._cell_coords(np.array([x1, y1]))
+            for cx in range(c0[0], c1[0] + 1):
+                for cy in range(c0[1], c1[1] + 1):
+                    cells[cx * self.shape[1] + cy].append(i)
+        width = max([len(c) for c in cells] + [1])
+        self.cell_table = np.full((len(cells), width), -1, dtype=np.int32)
+        for k, c in enumerate(cells):
+            self.cell_table[k, :len(c)] = c
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            config = json.load(f)
+        return cls([Zone.from_dict(z) for z in config.get("zones", [])],
+                   config.get("cell_size", CELL_SIZE))
+
+    def _cell_coords(self, point):
+        c = np.floor((point - self.origin) / self.cell_size).astype(int)
+        return np.clip(c, 0, self.shape - 1)
+
+    def contains(self, xs, ys) -> np.ndarray:
+        """Boolean matrix (N points, Z zones), True where the zone contains the point"""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        result = np.zeros((len(xs), len(self.zones)), dtype=bool)
+        if len(xs) == 0 or not self.zones:
+            return result
+
+        cx = np.floor((xs - self.origin[0]) / self.cell_size).astype(int)
+        cy = np.floor((ys - self.origin[1]) / self.cell_size).astype(int)
+        in_grid = (cx >= 0) & (cx < self.shape[0]) & (cy >= 0) & (cy < self.shape[1])
+        cell = np.where(in_grid, cx * self.shape[1] + cy, 0)
+        candidates = np.where(in_grid[:, None], self.cell_table[cell], -1)  # (N, K)
+
+        point_idx, slot = np.nonzero(candidates >= 0)
+        zone_idx = candidates[point_idx, slot]
+        px = xs[point_idx]
+        py = ys[point_idx]
+
+        inside = np.zeros(len(zone_idx), dtype=bool)
+        circle = self.is_circle[zone_idx]
+        if circle.any():
+            d = np.stack([px[circle], py[circle]], axis=-1) - self.centers[zone_idx[circle]]
+            inside[circle] = np.einsum('ij,ij->i', d, d) <= self.radii2[zone_idx[circle]]
+        polygon = ~circle
+        if polygon.any():
+            e = self.edges[zone_idx[polygon]]  # (M, E, 4)
+            x = px[polygon, None]
+            y = py[polygon, None]
+            x0, y0, x1, y1 = e[..., 0], e[..., 1], e[..., 2], e[..., 3]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                straddles = (y0 > y) != (y1 > y)
+                x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+                crossings = straddles & (x < x_cross)
+            inside[polygon] = (np.count_nonzero(crossings, axis=1) % 2) == 1
+
+        result[point_idx[inside], zone_idx[inside]] = True
+        return result
+
+    def count(self, xs, ys) -> np.ndarray:
+        """Number of points inside each zone"""
+        return self.contains(xs, ys).sum(axis=0)
+
+    def role_mask(self, role) -> np.ndarray:
+        return self.roles == role